@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
@@ -7,10 +7,10 @@ from flask_bcrypt import Bcrypt
 from config import Config
 import redis
 import sqlalchemy as sa
-from sqlalchemy.orm import sessionmaker
+from app.read_replica import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 bcrypt = Bcrypt()
@@ -20,6 +20,13 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Per-backend engine profile; explicit SQLALCHEMY_ENGINE_OPTIONS still win
+    from app.engine import engine_options, configure_sqlite, is_sqlite, PoolMetrics
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -35,17 +42,67 @@ def create_app(config_class=Config):
     except Exception:
         app.cache = None
 
-    # Optional read-replica engine/session factory for read-only operations
+    # Two-tier cache: in-process LRU in front of Redis, or on its own when Redis is not configured
+    from app.cache import TieredCache
+    app.cache_layer = TieredCache(
+        app.cache,
+        max_entries=app.config.get('CACHE_L1_MAX_ENTRIES', 1024),
+        l1_ttl=app.config.get('CACHE_L1_TTL', 5),
+        channel=app.config.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate'),
+        logger=app.logger,
+        lease_ttl=app.config.get('CACHE_LEASE_TTL', 30),
+        lease_wait=app.config.get('CACHE_LEASE_WAIT', 10)
+    )
+    if not app.config.get('TESTING'):
+        app.cache_layer.start_listener()
+
+    # Optional read-replica engine; db.session routes request reads to it (see app.read_replica)
     app.read_engine = None
-    app.read_session_factory = None
     read_url = app.config.get('DATABASE_READ_URL') or getattr(config_class, 'DATABASE_READ_URL', '')
     if read_url:
         try:
-            app.read_engine = sa.create_engine(read_url, pool_pre_ping=True, future=True)
-            app.read_session_factory = sessionmaker(bind=app.read_engine, autoflush=False, autocommit=False, future=True)
+            app.read_engine = sa.create_engine(read_url, **{'pool_pre_ping': True, **engine_options(read_url, app.config)})
         except Exception:
             app.read_engine = None
-            app.read_session_factory = None
+
+    # SQLite pragmas, PostgreSQL tenant context (row-level security) and live pool
+    # checkout statistics (reported by system health)
+    from app.tenant import install_tenant_context
+    with app.app_context():
+        engines = {'primary': db.engine, 'replica': app.read_engine}
+    app.pool_metrics = {}
+    for name, engine in engines.items():
+        if engine is None:
+            continue
+        if is_sqlite(engine.url):
+            configure_sqlite(engine, app.config)
+        elif engine.dialect.name == 'postgresql':
+            install_tenant_context(engine)
+        app.pool_metrics[name] = PoolMetrics(engine)
+
+    # Session hooks that invalidate cached list responses on commit
+    from app import response_cache  # noqa: F401
+
+    # Per-school in-process autocomplete, kept current by session hooks
+    from app.autocomplete import AutocompleteIndexes
+    app.autocomplete = AutocompleteIndexes(
+        max_schools=app.config.get('AUTOCOMPLETE_MAX_SCHOOLS', 64),
+        idle_ttl=app.config.get('AUTOCOMPLETE_IDLE_TTL', 900)
+    )
+
+    # Reject logged-out tokens and tokens issued before a role/password change
+    from app.revocation import is_token_revoked
+
+    @jwt.token_in_blocklist_loader
+    def check_token_revoked(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload)
+
+    @app.after_request
+    def add_request_metrics(response):
+        # Lets tests and diagnostics confirm the user was resolved at most once per request
+        if app.config.get('EXPOSE_REQUEST_METRICS'):
+            response.headers['X-Identity-Lookups'] = str(g.get('identity_lookups', 0))
+        return response
 
     # Register blueprints (auth required, others optional)
     from app.routes.auth import auth_bp
@@ -99,6 +156,27 @@ def create_app(config_class=Config):
     except Exception:
         pass
 
+    try:
+        from app.routes.autocomplete import autocomplete_bp
+        app.register_blueprint(autocomplete_bp, url_prefix='/api/autocomplete')
+    except Exception:
+        pass
+
+    try:
+        from app.routes.exports import exports_bp
+        app.register_blueprint(exports_bp, url_prefix='/api/exports')
+    except Exception:
+        pass
+
+    # CLI maintenance commands
+    from app.commands import attendance_cli, grades_cli, schools_cli, dashboard_cli, queries_cli, search_cli
+    app.cli.add_command(attendance_cli)
+    app.cli.add_command(grades_cli)
+    app.cli.add_command(schools_cli)
+    app.cli.add_command(dashboard_cli)
+    app.cli.add_command(queries_cli)
+    app.cli.add_command(search_cli)
+
     # Create database tables
     with app.app_context():
         db.create_all()
@@ -0,0 +1,236 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Student, Teacher, User
+from app.models.helpers import track_model_changes
+from app.response_cache import generations_shared, get_generation, mark_entity_changed
+
+# In-process autocomplete over each school's student names, student codes
+# and teacher codes. A school's index is built on first use and kept current
+# from this process's commits. Those commits also bump the school's
+# 'autocomplete' generation, so an index whose generation falls behind
+# (another process wrote) is rebuilt on its next lookup. Without Redis each
+# process has its own generations and never sees another's bumps, so indexes
+# are rebuilt once they are CACHE_L1_TTL old instead. Indexes are evicted when
+# a school goes idle or is least recently used. Lookups of a current index
+# never touch the database.
+
+GENERATION_ENTITY = 'autocomplete'
+
+class PrefixIndex:
+    """Sorted (key, kind, id) tuples over one school's students and teachers"""
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.keys = []
+        self.entries = {}
+        self.by_user = {}
+        self.built_at = self.last_used = time.monotonic()
+        # Commits update the index while other threads search it
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _keys_for(entry):
+        name = (entry['name'] or '').lower()
+        keys = {name, (entry['code'] or '').lower()}
+        # Every word of the name, so "smi" finds "John Smith"
+        keys.update(name.split())
+        keys.discard('')
+        return keys
+
+    def add(self, kind, entity_id, user_id, code, name):
+        with self._lock:
+            self.remove(kind, entity_id)
+            entry = {'type': kind, 'id': entity_id, 'user_id': user_id, 'code': code, 'name': name}
+            self.entries[(kind, entity_id)] = entry
+            self.by_user[user_id] = (kind, entity_id)
+            for key in self._keys_for(entry):
+                bisect.insort(self.keys, (key, kind, entity_id))
+
+    def remove(self, kind, entity_id):
+        with self._lock:
+            entry = self.entries.pop((kind, entity_id), None)
+            if entry is None:
+                return
+            if self.by_user.get(entry['user_id']) == (kind, entity_id):
+                del self.by_user[entry['user_id']]
+            for key in self._keys_for(entry):
+                position = bisect.bisect_left(self.keys, (key, kind, entity_id))
+                if position < len(self.keys) and self.keys[position] == (key, kind, entity_id):
+                    del self.keys[position]
+
+    def rename(self, user_id, name):
+        """Update the name of the student or teacher belonging to a user; False if the user is unknown"""
+        with self._lock:
+            key = self.by_user.get(user_id)
+            if key is None:
+                return False
+            entry = self.entries[key]
+            self.add(entry['type'], entry['id'], user_id, entry['code'], name)
+            return True
+
+    def search(self, prefix, limit=10, kinds=None):
+        """Up to limit entries with a name, name word or code starting with prefix"""
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            position = bisect.bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(results) < limit:
+                key, kind, entity_id = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if (kind, entity_id) in seen or (kinds and kind not in kinds):
+                    continue
+                seen.add((kind, entity_id))
+                entry = self.entries[(kind, entity_id)]
+                results.append({'type': kind, 'id': entity_id, 'code': entry['code'], 'name': entry['name']})
+        return results
+
+    def __len__(self):
+        return len(self.entries)
+
+class AutocompleteIndexes:
+    """Per-school prefix indexes with lazy builds and LRU/idle eviction"""
+
+    def __init__(self, max_schools=64, idle_ttl=900):
+        self.max_schools = max_schools
+        self.idle_ttl = idle_ttl
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _build(self, school_id, generation):
+        index = PrefixIndex(generation)
+        students = db.session.query(Student.id, Student.user_id, Student.student_id, User.first_name, User.last_name).join(
+            User, Student.user_id == User.id
+        ).filter(Student.school_id == school_id)
+        teachers = db.session.query(Teacher.id, Teacher.user_id, Teacher.teacher_id, User.first_name, User.last_name).join(
+            User, Teacher.user_id == User.id
+        ).filter(Teacher.school_id == school_id)
+        for kind, rows in (('student', students), ('teacher', teachers)):
+            for entity_id, user_id, code, first_name, last_name in rows:
+                index.add(kind, entity_id, user_id, code, f'{first_name} {last_name}')
+        return index
+
+    def _evict(self):
+        now = time.monotonic()
+        with self._lock:
+            for school_id in [school_id for school_id, index in self._indexes.items() if now - index.last_used > self.idle_ttl]:
+                del self._indexes[school_id]
+            while len(self._indexes) > self.max_schools:
+                self._indexes.popitem(last=False)
+
+    @staticmethod
+    def _is_current(index, generation):
+        if index is None or index.generation != generation:
+            return False
+        return generations_shared() or time.monotonic() - index.built_at < current_app.cache_layer.l1_ttl
+
+    def get(self, school_id):
+        """The school's index, building it on first use or after another process changed the school"""
+        generation = get_generation(GENERATION_ENTITY, school_id)
+        with self._lock:
+            index = self._indexes.get(school_id)
+            if self._is_current(index, generation):
+                self._indexes.move_to_end(school_id)
+                index.last_used = time.monotonic()
+                return index
+            build_lock = self._build_locks.setdefault(school_id, threading.Lock())
+        with build_lock:
+            with self._lock:
+                index = self._indexes.get(school_id)
+            if not self._is_current(index, generation):
+                index = self._build(school_id, generation)
+                with self._lock:
+                    self._indexes[school_id] = index
+            index.last_used = time.monotonic()
+        self._evict()
+        return index
+
+    def search(self, school_id, prefix, limit=10, kinds=None):
+        return self.get(school_id).search(prefix, limit, kinds)
+
+    def apply(self, changes):
+        """Apply committed changes ({school_id: [(kind, old, new)]}) to loaded indexes"""
+        for school_id, school_changes in changes.items():
+            with self._lock:
+                index = self._indexes.get(school_id)
+            if index is None:
+                continue
+            try:
+                generation = get_generation(GENERATION_ENTITY, school_id)
+            except Exception:
+                generation = None
+            # Our commit bumped the generation once; anything more means another process wrote too
+            if generation != index.generation + 1 or not self._apply_to(index, school_changes):
+                with self._lock:
+                    self._indexes.pop(school_id, None)
+                continue
+            index.generation = generation
+
+    @staticmethod
+    def _apply_to(index, school_changes):
+        names = {}
+        for kind, old, new in school_changes:
+            if kind == 'user':
+                if new is not None:
+                    names[new['id']] = f"{new['first_name']} {new['last_name']}"
+                    # Users without a student/teacher profile are not indexed
+                    index.rename(new['id'], names[new['id']])
+                continue
+            if old is not None:
+                index.remove(kind, old['id'])
+            if new is not None:
+                user_key = index.by_user.get(new['user_id'])
+                name = names.get(new['user_id']) or (index.entries[user_key]['name'] if user_key else None)
+                if name is None:
+                    # A profile for a user this index has never seen: rebuild instead
+                    return False
+                index.add(kind, new['id'], new['user_id'], new['code'], name)
+        return True
+
+def _collect(kind, code_column=None):
+    def collect(session, changes):
+        pending = session.info.setdefault('autocomplete_changes', [])
+        for old, new in changes:
+            if code_column:
+                old = dict(old, code=old[code_column]) if old is not None else None
+                new = dict(new, code=new[code_column]) if new is not None else None
+            pending.append((kind, old, new))
+            for values in (old, new):
+                if values is not None:
+                    mark_entity_changed(session, GENERATION_ENTITY, values['school_id'])
+    return collect
+
+track_model_changes(User, ('id', 'first_name', 'last_name', 'school_id'), _collect('user'))
+track_model_changes(Student, ('id', 'user_id', 'student_id', 'school_id'), _collect('student', 'student_id'))
+track_model_changes(Teacher, ('id', 'user_id', 'teacher_id', 'school_id'), _collect('teacher', 'teacher_id'))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    pending = session.info.pop('autocomplete_changes', None)
+    if not pending:
+        return
+    indexes = getattr(current_app, 'autocomplete', None)
+    if indexes is None:
+        return
+    by_school = {}
+    for kind, old, new in pending:
+        # User changes come first so a new profile can find its user's name
+        for school_id in {values['school_id'] for values in (old, new) if values is not None}:
+            by_school.setdefault(school_id, []).append((kind, old, new))
+    for school_changes in by_school.values():
+        school_changes.sort(key=lambda change: change[0] != 'user')
+    indexes.apply(by_school)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('autocomplete_changes', None)
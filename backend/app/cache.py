@@ -0,0 +1,353 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+class LocalCache:
+    """Bounded, thread-safe in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class CacheMetrics:
+    """Hit/miss counters per tier"""
+    FIELDS = (
+        'l1_hits', 'l1_misses', 'l2_hits', 'l2_misses', 'l2_errors',
+        'invalidations_sent', 'invalidations_received',
+        'computations', 'coalesced_local', 'coalesced_remote'
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts['l1_hits'] + counts['l1_misses']
+        counts['l1_hit_rate'] = round(counts['l1_hits'] / lookups, 4) if lookups else 0
+        l2_lookups = counts['l2_hits'] + counts['l2_misses']
+        counts['l2_hit_rate'] = round(counts['l2_hits'] / l2_lookups, 4) if l2_lookups else 0
+        return counts
+
+# Deletes a lease only if it is still held by the caller
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+class SingleFlight:
+    """Coalesce concurrent computations of the same key.
+
+    Within a process, callers that arrive while a computation is running wait
+    for it and share its result. With Redis, a lease (SET NX PX) additionally
+    elects one process; the others poll lookup() until the leader has stored
+    its result, and compute themselves only if the lease disappears or the
+    wait times out.
+    """
+
+    def __init__(self, redis_client=None, lease_ttl=30, wait_timeout=10, poll_interval=0.05, metrics=None):
+        self.redis = redis_client
+        self.lease_ttl = lease_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.metrics = metrics or CacheMetrics()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, compute, lookup=None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and not flight.failed:
+                self.metrics.incr('coalesced_local')
+                return flight.result
+            return self._compute(compute)
+        try:
+            flight.result = self._run_with_lease(key, compute, lookup)
+            return flight.result
+        except Exception:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _compute(self, compute):
+        self.metrics.incr('computations')
+        return compute()
+
+    def _run_with_lease(self, key, compute, lookup):
+        if self.redis is None or lookup is None:
+            return self._compute(compute)
+        lease_key = f'lease:{key}'
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis.set(lease_key, token, nx=True, px=int(self.lease_ttl * 1000))
+        except Exception:
+            self.metrics.incr('l2_errors')
+            return self._compute(compute)
+        if acquired:
+            try:
+                return self._compute(compute)
+            finally:
+                try:
+                    self.redis.eval(_RELEASE_LEASE_SCRIPT, 1, lease_key, token)
+                except Exception:
+                    self.metrics.incr('l2_errors')
+
+        # Another process holds the lease: wait for its result
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                value = lookup()
+                if value is not None:
+                    self.metrics.incr('coalesced_remote')
+                    return value
+                if not self.redis.exists(lease_key):
+                    # Leader finished without storing a result (or died); re-check once
+                    value = lookup()
+                    if value is not None:
+                        self.metrics.incr('coalesced_remote')
+                        return value
+                    break
+                time.sleep(self.poll_interval)
+        except Exception:
+            self.metrics.incr('l2_errors')
+        return self._compute(compute)
+
+class TieredCache:
+    """Two-tier cache: a local LRU (L1) in front of Redis (L2).
+
+    With Redis, L1 entries live at most l1_ttl seconds and deletes/increments
+    are broadcast on a pub/sub channel so other workers drop their L1 copies.
+    Without Redis, L1 is the only tier and keeps entries for their full TTL.
+    Values are stored as given (bytes/str/int); callers serialize payloads.
+    """
+
+    def __init__(self, redis_client=None, max_entries=1024, l1_ttl=5, channel='cache:invalidate', logger=None,
+                 lease_ttl=30, lease_wait=10):
+        self.redis = redis_client
+        self.local = LocalCache(max_entries)
+        self.l1_ttl = l1_ttl
+        self.channel = channel
+        self.metrics = CacheMetrics()
+        self.flights = SingleFlight(redis_client, lease_ttl=lease_ttl, wait_timeout=lease_wait, metrics=self.metrics)
+        self.logger = logger
+        self.origin = f'{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._listener = None
+        # Counters without Redis: outside the LRU so they are never evicted
+        self._counters = {}
+        self._counters_lock = threading.Lock()
+
+    @property
+    def distributed(self):
+        return self.redis is not None
+
+    def _l1_ttl(self, ttl):
+        if not self.distributed:
+            return ttl
+        return min(ttl, self.l1_ttl) if ttl else self.l1_ttl
+
+    def get(self, key):
+        hit, value = self.local.get(key)
+        if hit:
+            self.metrics.incr('l1_hits')
+            return value
+        self.metrics.incr('l1_misses')
+        if not self.distributed:
+            return None
+        try:
+            value = self.redis.get(key)
+        except Exception:
+            self.metrics.incr('l2_errors')
+            return None
+        if value is None:
+            self.metrics.incr('l2_misses')
+            return None
+        self.metrics.incr('l2_hits')
+        self.local.set(key, value, self.l1_ttl)
+        return value
+
+    def set(self, key, value, ttl=None, broadcast=False):
+        """Store a value; broadcast=True also drops other workers' L1 copies of an overwritten key"""
+        if self.distributed:
+            try:
+                self.redis.set(key, value, ex=ttl)
+            except Exception:
+                self.metrics.incr('l2_errors')
+            if broadcast:
+                self._publish(key)
+        self.local.set(key, value, self._l1_ttl(ttl))
+
+    def add(self, key, value, ttl=None):
+        """Store a value only if the key is absent; return the value now stored"""
+        if self.distributed:
+            try:
+                if not self.redis.set(key, value, ex=ttl, nx=True):
+                    value = self.redis.get(key) or value
+            except Exception:
+                self.metrics.incr('l2_errors')
+            self.local.set(key, value, self._l1_ttl(ttl))
+            return value
+        hit, current = self.local.get(key)
+        if hit:
+            return current
+        self.local.set(key, value, ttl)
+        return value
+
+    def get_or_set(self, key, compute, ttl=None):
+        """Get a value, computing it at most once across concurrent callers on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def compute_and_store():
+            # A concurrent leader may have stored the value since our miss
+            value = self.get(key)
+            if value is None:
+                value = compute()
+                self.set(key, value, ttl)
+            return value
+
+        lookup = (lambda: self.redis.get(key)) if self.distributed else None
+        value = self.flights.do(key, compute_and_store, lookup)
+        self.local.set(key, value, self._l1_ttl(ttl))
+        return value
+
+    @staticmethod
+    def _counter_seed():
+        # Microseconds since the epoch: a counter that was lost (Redis eviction or
+        # restart) restarts above any value it reached, so values never repeat
+        return time.time_ns() // 1000
+
+    def get_counter(self, key):
+        """Current value of a counter, starting a missing one from the clock"""
+        if not self.distributed:
+            with self._counters_lock:
+                return self._counters.setdefault(key, self._counter_seed())
+        value = self.get(key)
+        if value is None:
+            value = self.add(key, str(self._counter_seed()).encode())
+        return int(value)
+
+    def incr(self, key):
+        """Atomically increment a counter and drop every worker's L1 copy of it"""
+        if self.distributed:
+            self.redis.set(key, self._counter_seed(), nx=True)
+            value = int(self.redis.incr(key))
+            self.local.set(key, str(value).encode(), self.l1_ttl)
+            self._publish(key)
+            return value
+        with self._counters_lock:
+            value = self._counters[key] = self._counters.get(key, self._counter_seed()) + 1
+        return value
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        self.local.delete(*keys)
+        if self.distributed:
+            try:
+                self.redis.delete(*keys)
+            except Exception:
+                self.metrics.incr('l2_errors')
+            self._publish(*keys)
+
+    def _publish(self, *keys):
+        try:
+            self.redis.publish(self.channel, '\n'.join((self.origin,) + keys))
+            self.metrics.incr('invalidations_sent')
+        except Exception:
+            self.metrics.incr('l2_errors')
+
+    def _handle_message(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        origin, *keys = data.split('\n')
+        if origin == self.origin:
+            return
+        self.local.delete(*keys)
+        self.metrics.incr('invalidations_received')
+
+    def start_listener(self):
+        """Subscribe to the invalidation channel in a daemon thread (no-op without Redis)"""
+        if not self.distributed or self._listener is not None:
+            return
+        self._listener = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Messages may have been missed while disconnected
+                self.local.clear()
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self._handle_message(message['data'])
+            except Exception:
+                if self.logger:
+                    self.logger.warning('Cache invalidation listener disconnected, retrying')
+                time.sleep(1)
+
+    def stats(self):
+        stats = self.metrics.snapshot()
+        stats.update({'l1_entries': len(self.local), 'l1_max_entries': self.local.max_entries, 'distributed': self.distributed})
+        return stats
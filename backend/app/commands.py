@@ -0,0 +1,73 @@
+import click
+from flask.cli import AppGroup
+from app import db
+
+attendance_cli = AppGroup('attendance', help='Attendance maintenance commands')
+grades_cli = AppGroup('grades', help='Grade maintenance commands')
+schools_cli = AppGroup('schools', help='School maintenance commands')
+dashboard_cli = AppGroup('dashboard', help='Dashboard snapshot commands')
+queries_cli = AppGroup('queries', help='Query performance checks')
+search_cli = AppGroup('search', help='Search index commands')
+
+@attendance_cli.command('rebuild-summary')
+@click.option('--school-id', type=int, default=None, help='Only rebuild rows for this school')
+def rebuild_attendance_summary(school_id):
+    """Rebuild the attendance_daily_summary rollup from raw attendance"""
+    from app.models import AttendanceDailySummary
+
+    rows = AttendanceDailySummary.rebuild(school_id=school_id)
+    db.session.commit()
+    click.echo(f'Rebuilt {rows} attendance summary rows')
+
+@grades_cli.command('rebuild-statistics')
+def rebuild_grade_statistics():
+    """Rebuild the per-student and per-class grade running totals"""
+    from app.models import StudentSubjectGradeStatistics, ClassSubjectGradeStatistics
+
+    for model in (StudentSubjectGradeStatistics, ClassSubjectGradeStatistics):
+        rows = model.rebuild()
+        click.echo(f'Rebuilt {rows} {model.__tablename__} rows')
+    db.session.commit()
+
+@schools_cli.command('reconcile-counters')
+@click.option('--school-id', type=int, default=None, help='Only reconcile this school')
+def reconcile_school_counters(school_id):
+    """Repair drift in School counters and Class.current_strength"""
+    from app.models import reconcile_counters
+
+    repaired = reconcile_counters(school_id=school_id)
+    db.session.commit()
+    click.echo(f'Repaired {repaired} counter rows')
+
+@dashboard_cli.command('refresh')
+def refresh_dashboard():
+    """Recompute the super admin dashboard snapshot (run from a scheduler)"""
+    from app.dashboard import refresh_dashboard_snapshot
+
+    snapshot = refresh_dashboard_snapshot()
+    click.echo(f"Dashboard snapshot version {snapshot['version']} computed at {snapshot['computed_at']}")
+
+@search_cli.command('rebuild')
+@click.option('--school-id', type=int, default=None, help='Only rebuild entries for this school')
+def rebuild_search(school_id):
+    """Rebuild the student/user search entries from users and students"""
+    from app.models import rebuild_search_entries
+
+    rows = rebuild_search_entries(school_id=school_id)
+    db.session.commit()
+    click.echo(f'Rebuilt {rows} search entries')
+
+@queries_cli.command('check-plans')
+def check_plans():
+    """Fail if a hot tenant-scoped query plan falls back to a full table scan"""
+    from app.query_plans import check_query_plans
+
+    results = check_query_plans()
+    if results is None:
+        click.echo(f'Query plan checks are not supported on {db.engine.dialect.name}')
+        return
+    regressions = {name: scans for name, scans in results.items() if scans}
+    for name, scans in results.items():
+        click.echo(f"{'FULL SCAN' if scans else 'ok':9}  {name}" + (f" ({'; '.join(scans)})" if scans else ''))
+    if regressions:
+        raise SystemExit(1)
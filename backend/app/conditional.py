@@ -0,0 +1,43 @@
+import hashlib
+from datetime import timezone
+from flask import request, jsonify, current_app
+
+# Conditional GET support. Validators are derived from updated_at columns and
+# the response-cache generation counters, so a 304 can be answered before the
+# body is serialized (and, for lists, before any query runs).
+
+def make_etag(*parts):
+    """Weak-comparison ETag value for the given validator parts"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:24]
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+def is_not_modified(etag=None, last_modified=None):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current validators"""
+    if request.if_none_match:
+        return etag is not None and request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return _as_utc(last_modified) <= request.if_modified_since
+    return False
+
+def _set_validators(response, etag, last_modified):
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    # Responses are per user: allow private caching but always revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def conditional_response(build_payload, etag=None, last_modified=None, status=200):
+    """Return 304 if the client's copy is current, otherwise build and send the JSON payload"""
+    if is_not_modified(etag, last_modified):
+        return _set_validators(current_app.response_class(status=304), etag, last_modified)
+    response = jsonify(build_payload())
+    response.status_code = status
+    return _set_validators(response, etag, last_modified)
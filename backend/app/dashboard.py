@@ -0,0 +1,121 @@
+import json
+import threading
+import uuid
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+# The snapshot lives in the two-tier cache (app.cache_layer). Without Redis
+# every worker keeps its own and never sees another worker's writes, so a
+# snapshot is only considered fresh for CACHE_L1_TTL there.
+SNAPSHOT_KEY = 'dashboard:super_admin:snapshot'
+FRESH_KEY = 'dashboard:super_admin:fresh'
+VERSION_KEY = 'dashboard:super_admin:version'
+REFRESH_LOCK_KEY = 'dashboard:super_admin:refreshing'
+
+# Models whose writes make the cross-tenant dashboard stale
+_TRACKED_TABLES = ('schools', 'users', 'students', 'teachers', 'classes', 'subjects')
+
+def _cache():
+    return current_app.cache_layer
+
+def _fresh_ttl():
+    cache = _cache()
+    ttl = current_app.config.get('DASHBOARD_SNAPSHOT_TTL', 60)
+    return ttl if cache.distributed else min(ttl, cache.l1_ttl)
+
+def compute_dashboard():
+    """Compute the cross-tenant super admin dashboard"""
+    from app.models import School, User, Student, Teacher, Class, Subject
+
+    # One round trip for every global total
+    totals = db.session.query(
+        db.select(db.func.count(School.id)).scalar_subquery(),
+        db.select(db.func.count(User.id)).scalar_subquery(),
+        db.select(db.func.count(Student.id)).scalar_subquery(),
+        db.select(db.func.count(Teacher.id)).scalar_subquery(),
+        db.select(db.func.count(Class.id)).scalar_subquery(),
+        db.select(db.func.count(Subject.id)).scalar_subquery()
+    ).one()
+    schools = School.query.order_by(School.id).all()
+
+    return {
+        'total_schools': totals[0],
+        'total_users': totals[1],
+        'total_students': totals[2],
+        'total_teachers': totals[3],
+        'total_classes': totals[4],
+        'total_subjects': totals[5],
+        'schools': [school.to_dict() for school in schools]
+    }
+
+def refresh_dashboard_snapshot():
+    """Recompute the snapshot and store it with a new version stamp"""
+    snapshot = compute_dashboard()
+    cache = _cache()
+    snapshot['version'] = cache.incr(VERSION_KEY)
+    snapshot['computed_at'] = datetime.utcnow().isoformat()
+    cache.set(SNAPSHOT_KEY, json.dumps(snapshot).encode('utf-8'),
+              ttl=current_app.config.get('DASHBOARD_SNAPSHOT_MAX_AGE', 3600), broadcast=True)
+    cache.set(FRESH_KEY, b'1', ttl=_fresh_ttl(), broadcast=True)
+    cache.delete(REFRESH_LOCK_KEY)
+    return snapshot
+
+def _refresh_in_background(app):
+    with app.app_context():
+        try:
+            refresh_dashboard_snapshot()
+        except Exception:
+            app.logger.exception('Dashboard snapshot refresh failed')
+            _cache().delete(REFRESH_LOCK_KEY)
+        finally:
+            db.session.remove()
+
+def get_dashboard_snapshot():
+    """Get the super admin dashboard, serving a stale snapshot while a refresh runs.
+
+    Only the first request after the snapshot expires completely computes it
+    inline; otherwise a stale snapshot is returned immediately and a single
+    background thread (guarded by a cache lock) recomputes it.
+    """
+    cache = _cache()
+    cached = cache.get(SNAPSHOT_KEY)
+    if not cached:
+        return dict(refresh_dashboard_snapshot(), stale=False)
+
+    snapshot = json.loads(cached)
+    stale = cache.get(FRESH_KEY) is None
+    token = uuid.uuid4().hex.encode()
+    if stale and cache.add(REFRESH_LOCK_KEY, token, ttl=60) == token:
+        app = current_app._get_current_object()
+        threading.Thread(target=_refresh_in_background, args=(app,), daemon=True).start()
+    snapshot['stale'] = stale
+    return snapshot
+
+def mark_dashboard_stale():
+    """Force the next dashboard request to trigger a refresh"""
+    _cache().delete(FRESH_KEY)
+
+@event.listens_for(Session, 'after_flush')
+def _note_dashboard_changes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        table = getattr(obj, '__tablename__', None)
+        if table in _TRACKED_TABLES and (table == 'schools' or obj not in session.dirty):
+            session.info['dashboard_stale'] = True
+            return
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dashboard(session):
+    if session.info.pop('dashboard_stale', False):
+        try:
+            mark_dashboard_stale()
+        except Exception:
+            # The dashboard keeps serving the old snapshot until its fresh marker expires
+            _cache().metrics.incr('l2_errors')
+            current_app.logger.exception('Could not mark the dashboard snapshot stale')
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dashboard_changes(session):
+    session.info.pop('dashboard_stale', None)
@@ -1,14 +1,44 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask import jsonify, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from app.models import User
+from app.models.user import RoleMixin, UserRole
+
+class TokenPrincipal(RoleMixin):
+    """Authorization view of the current user built from JWT claims"""
+    
+    def __init__(self, user_id, role, school_id):
+        self.id = user_id
+        self.role = UserRole(role)
+        self.school_id = school_id
+
+def get_current_user():
+    """Get the authenticated user, loading it (with its school) once per request"""
+    if 'current_user' not in g:
+        g.identity_lookups = g.get('identity_lookups', 0) + 1
+        current_user_id = get_jwt_identity()
+        g.current_user = None
+        if current_user_id is not None:
+            g.current_user = User.query.options(joinedload(User.school)).filter_by(id=current_user_id).first()
+    return g.current_user
+
+def get_current_principal():
+    """Get the role and school of the current user from token claims, falling back to the database"""
+    if 'current_principal' not in g:
+        claims = get_jwt()
+        if 'role' in claims:
+            g.current_principal = TokenPrincipal(get_jwt_identity(), claims['role'], claims.get('school_id'))
+        else:
+            # Tokens issued before claims were embedded
+            g.current_principal = get_current_user()
+    return g.current_principal
 
 def super_admin_required(f):
     """Decorator to require super admin role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user or not current_user.is_super_admin():
             return jsonify({'success': False, 'message': 'Super Admin access required'}), 403
@@ -19,8 +49,7 @@ def school_admin_required(f):
     """Decorator to require school admin or higher role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user or not current_user.is_admin_level():
             return jsonify({'success': False, 'message': 'School Admin access required'}), 403
@@ -31,8 +60,7 @@ def admin_required(f):
     """Decorator to require any admin-level role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user or not current_user.is_admin_level():
             return jsonify({'success': False, 'message': 'Admin access required'}), 403
@@ -43,8 +71,7 @@ def teacher_required(f):
     """Decorator to require teacher or higher role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user or not (current_user.is_teacher() or current_user.is_admin_level()):
             return jsonify({'success': False, 'message': 'Teacher access required'}), 403
@@ -55,8 +82,7 @@ def student_required(f):
     """Decorator to require student or higher role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user or not (current_user.is_student() or current_user.is_teacher() or current_user.is_admin_level()):
             return jsonify({'success': False, 'message': 'Student access required'}), 403
@@ -67,8 +93,7 @@ def school_access_required(f):
     """Decorator to ensure user has access to the school"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user:
             return jsonify({'success': False, 'message': 'Authentication required'}), 401
@@ -93,8 +118,7 @@ def can_manage_school_required(f):
     """Decorator to ensure user can manage the school"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user:
             return jsonify({'success': False, 'message': 'Authentication required'}), 401
@@ -119,8 +143,7 @@ def can_manage_users_required(f):
     """Decorator to ensure user can manage other users"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_principal()
         
         if not current_user:
             return jsonify({'success': False, 'message': 'Authentication required'}), 401
@@ -135,7 +158,6 @@ def can_manage_users_required(f):
             return jsonify({'success': False, 'message': 'User ID required'}), 400
         
         # Get target user
-        from app.models import User
         target_user = User.query.get(target_user_id)
         if not target_user:
             return jsonify({'success': False, 'message': 'Target user not found'}), 404
@@ -0,0 +1,130 @@
+import threading
+import time
+import sqlalchemy as sa
+from flask import has_request_context, request
+from sqlalchemy import event
+from app.read_replica import READ_METHODS
+
+# Per-backend engine profiles. Server databases get a sized, recycled,
+# pre-pinged connection pool; SQLite gets connect-time pragmas (WAL,
+# synchronous=NORMAL, busy timeout). In write requests SQLite transactions
+# open with BEGIN IMMEDIATE right before their first write, so two
+# concurrent writers queue on the busy timeout instead of failing with
+# "database is locked" when a read upgrades, while the reads and work
+# (password hashing) before the first write hold no lock at all.
+
+# Statements that never write; anything else opens the write transaction first
+_READ_ONLY_PREFIXES = ('SELECT', 'PRAGMA', 'EXPLAIN')
+_PENDING_WRITE = 'sqlite_pending_write_transaction'
+
+def is_sqlite(url):
+    return sa.engine.make_url(url).get_backend_name() == 'sqlite'
+
+def engine_options(url, config):
+    """Engine keyword arguments for a database URL under the app configuration"""
+    if is_sqlite(url):
+        # SQLite pooling is chosen by SQLAlchemy/Flask-SQLAlchemy; tuning happens per connection
+        return {}
+    return {
+        'pool_size': config.get('DATABASE_POOL_SIZE', 10),
+        'max_overflow': config.get('DATABASE_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DATABASE_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DATABASE_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+def configure_sqlite(engine, config):
+    """Apply the SQLite pragmas to every new connection and begin write transactions IMMEDIATE at their first write"""
+    pragmas = (
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    )
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see begin_transaction below)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            if value not in (None, ''):
+                cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin_transaction(connection):
+        # A deferred transaction that reads and then writes cannot wait for the lock
+        # (SQLite returns SQLITE_BUSY at once to avoid deadlock); IMMEDIATE waits on
+        # busy_timeout. Until the first write, statements run in autocommit.
+        if has_request_context() and request.method not in READ_METHODS:
+            connection.info[_PENDING_WRITE] = True
+        else:
+            connection.info.pop(_PENDING_WRITE, None)
+            connection.exec_driver_sql('BEGIN')
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def begin_write_transaction(connection, cursor, statement, parameters, context, executemany):
+        if connection.info.get(_PENDING_WRITE) and not statement.lstrip().upper().startswith(_READ_ONLY_PREFIXES):
+            del connection.info[_PENDING_WRITE]
+            cursor.execute('BEGIN IMMEDIATE')
+
+    @event.listens_for(engine, 'commit')
+    @event.listens_for(engine, 'rollback')
+    def end_transaction(connection):
+        # connection.info outlives the checkout; a transaction that never wrote has nothing to end
+        connection.info.pop(_PENDING_WRITE, None)
+
+class PoolMetrics:
+    """Connection pool checkout counters for one engine"""
+    FIELDS = ('connects', 'checkouts', 'checkins', 'invalidations', 'peak_checked_out')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._hold_time = 0.0
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.counts['connects'] += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.monotonic()
+        with self._lock:
+            self.counts['checkouts'] += 1
+            self._checked_out += 1
+            self.counts['peak_checked_out'] = max(self.counts['peak_checked_out'], self._checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop('checked_out_at', None) if connection_record else None
+        with self._lock:
+            self.counts['checkins'] += 1
+            if checked_out_at is not None:
+                self._checked_out -= 1
+                self._hold_time += time.monotonic() - checked_out_at
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.counts['invalidations'] += 1
+
+    def snapshot(self):
+        pool = self.engine.pool
+        with self._lock:
+            stats = dict(self.counts)
+            stats['checked_out'] = self._checked_out
+            checkins = stats['checkins']
+            stats['avg_hold_ms'] = round(self._hold_time / checkins * 1000, 2) if checkins else 0
+        stats['pool_class'] = type(pool).__name__
+        # QueuePool exposes live sizing; other pools (StaticPool, NullPool) do not
+        if hasattr(pool, 'checkedin'):
+            stats.update(
+                pool_size=pool.size(),
+                idle=pool.checkedin(),
+                overflow=pool.overflow()
+            )
+        return stats
@@ -5,7 +5,12 @@ from .teacher import Teacher
 from .class_model import Class
 from .subject import Subject
 from .attendance import Attendance
+from .attendance_summary import AttendanceDailySummary
 from .grade import Grade
+from .grade_statistics import StudentSubjectGradeStatistics, ClassSubjectGradeStatistics
+from .counters import reconcile_counters
+from .search import SearchEntry, search_statement, search_user_ids, rebuild_search_entries
+from .revoked_token import RevokedToken
 
 __all__ = [
     'User',
@@ -14,5 +19,10 @@ __all__ = [
     'Class',
     'Subject',
     'Attendance',
+    'AttendanceDailySummary',
     'Grade',
+    'StudentSubjectGradeStatistics',
+    'ClassSubjectGradeStatistics',
+    'SearchEntry',
+    'RevokedToken',
 ]
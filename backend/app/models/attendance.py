@@ -1,7 +1,11 @@
 from app import db
+from app.models.serialization import SerializerMixin
+from app.models.helpers import month_expression, upsert_rows
 from datetime import datetime, date
 
-class Attendance(db.Model):
+ATTENDANCE_STATUSES = ('present', 'absent', 'late', 'excused')
+
+class Attendance(SerializerMixin, db.Model):
     """Attendance model for tracking student attendance"""
     __tablename__ = 'attendance'
     
@@ -26,8 +30,24 @@ class Attendance(db.Model):
     # Composite unique constraint
     __table_args__ = (
         db.UniqueConstraint('student_id', 'class_id', 'subject_id', 'date', name='unique_attendance'),
+        # Tenant-scoped summaries over a date range
+        db.Index('ix_attendance_school_date_status', 'school_id', 'date', 'status'),
     )
     
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'student_name': 'get_student_name',
+        'class_name': 'get_class_name',
+        'subject_name': 'get_subject_name',
+        'teacher_name': 'get_teacher_name',
+    }
+    FIELD_LOADERS = {
+        'student_name': ('student', 'user'),
+        'class_name': ('class_obj',),
+        'subject_name': ('subject',),
+        'teacher_name': ('teacher', 'user'),
+    }
+    
     def __init__(self, **kwargs):
         super(Attendance, self).__init__(**kwargs)
         if not self.date:
@@ -93,18 +113,14 @@ class Attendance(db.Model):
         }
         return status_colors.get(self.status, 'gray')
     
-    def to_dict(self):
-        """Convert attendance to dictionary"""
+    def serialize_columns(self):
+        """Convert attendance to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'student_id': self.student_id,
-            'student_name': self.get_student_name(),
             'class_id': self.class_id,
-            'class_name': self.get_class_name(),
             'subject_id': self.subject_id,
-            'subject_name': self.get_subject_name(),
             'teacher_id': self.teacher_id,
-            'teacher_name': self.get_teacher_name(),
             'date': self.date.isoformat() if self.date else None,
             'status': self.status,
             'time_in': self.time_in.isoformat() if self.time_in else None,
@@ -121,37 +137,133 @@ class Attendance(db.Model):
         }
     
     @classmethod
-    def get_attendance_summary(cls, class_id=None, subject_id=None, date=None, start_date=None, end_date=None):
-        """Get attendance summary for given parameters"""
-        query = cls.query
+    def _summary_group_columns(cls, source):
+        """Columns an attendance summary can be grouped by, for raw rows or the daily rollup"""
+        columns = {
+            'school': source.school_id,
+            'class': source.class_id,
+            'subject': source.subject_id,
+            'date': source.date,
+            'month': month_expression(source.date),
+        }
+        if source is cls:
+            columns['student'] = cls.student_id
+            columns['teacher'] = cls.teacher_id
+        return columns
+    
+    @classmethod
+    def build_summary(cls, total_records=0, counts=None):
+        """Build a summary dictionary from a total and per-status counts"""
+        counts = counts or {}
+        summary = {'total_records': total_records}
+        for status in ATTENDANCE_STATUSES:
+            summary[status] = counts.get(status, 0)
+        summary['attendance_percentage'] = round((summary['present'] / total_records * 100), 2) if total_records > 0 else 0
+        return summary
+    
+    @classmethod
+    def summarize(cls, group_by=None, school_id=None, class_id=None, subject_id=None, student_id=None,
+                  date=None, start_date=None, end_date=None, use_rollup=True):
+        """Count every attendance status in a single query.
         
-        if class_id:
-            query = query.filter_by(class_id=class_id)
-        if subject_id:
-            query = query.filter_by(subject_id=subject_id)
-        if date:
-            query = query.filter_by(date=date)
-        if start_date:
-            query = query.filter(cls.date >= start_date)
-        if end_date:
-            query = query.filter(cls.date <= end_date)
+        Filters accept a single value or a list of values. When group_by is given
+        (a name or list of names from 'school', 'class', 'subject', 'student',
+        'teacher', 'date', 'month') a dictionary of summaries keyed by the group value is
+        returned instead of a single summary. Unless use_rollup is False, queries
+        that do not need per-student or per-teacher detail read the
+        attendance_daily_summary rollup instead of raw attendance rows.
+        """
+        group_names = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        statement = cls.summary_statement(group_names, school_id=school_id, class_id=class_id, subject_id=subject_id,
+                                          student_id=student_id, date=date, start_date=start_date, end_date=end_date,
+                                          use_rollup=use_rollup)
+        keys = len(group_names)
         
-        total_records = query.count()
-        present_count = query.filter_by(status='present').count()
-        absent_count = query.filter_by(status='absent').count()
-        late_count = query.filter_by(status='late').count()
-        excused_count = query.filter_by(status='excused').count()
+        if not keys:
+            row = db.session.execute(statement).one()
+            return cls.build_summary(row[0] or 0, dict(zip(ATTENDANCE_STATUSES, (value or 0 for value in row[1:]))))
         
-        attendance_percentage = round((present_count / total_records * 100), 2) if total_records > 0 else 0
+        summaries = {}
+        for row in db.session.execute(statement):
+            group_key = row[0] if keys == 1 else tuple(row[:keys])
+            values = row[keys:]
+            summaries[group_key] = cls.build_summary(values[0], dict(zip(ATTENDANCE_STATUSES, (value or 0 for value in values[1:]))))
+        return summaries
+    
+    @classmethod
+    def summary_statement(cls, group_by=None, school_id=None, class_id=None, subject_id=None, student_id=None,
+                          date=None, start_date=None, end_date=None, use_rollup=True):
+        """The SELECT summarize() runs: group keys followed by the total and one count per status"""
+        from .attendance_summary import AttendanceDailySummary
         
-        return {
-            'total_records': total_records,
-            'present': present_count,
-            'absent': absent_count,
-            'late': late_count,
-            'excused': excused_count,
-            'attendance_percentage': attendance_percentage
-        }
+        group_names = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        # The daily rollup covers everything except per-student and per-teacher figures
+        source = cls
+        if use_rollup and student_id is None and not {'student', 'teacher'} & set(group_names):
+            source = AttendanceDailySummary
+        
+        group_columns = cls._summary_group_columns(source)
+        for name in group_names:
+            if name not in group_columns:
+                raise ValueError(f"Cannot group attendance summary by '{name}'")
+        keys = [group_columns[name] for name in group_names]
+        
+        if source is cls:
+            columns = [db.func.count(cls.id)] + [
+                db.func.sum(db.case((cls.status == status, 1), else_=0)) for status in ATTENDANCE_STATUSES
+            ]
+        else:
+            columns = [db.func.sum(getattr(source, column)) for column in source.count_columns()]
+        statement = db.select(*keys, *columns).select_from(source)
+        
+        filters = ((source.school_id, school_id), (source.class_id, class_id), (source.subject_id, subject_id),
+                   (source.date, date))
+        if source is cls:
+            filters += ((cls.student_id, student_id),)
+        for column, value in filters:
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                statement = statement.where(column.in_(list(value)))
+            else:
+                statement = statement.where(column == value)
+        if start_date:
+            statement = statement.where(source.date >= start_date)
+        if end_date:
+            statement = statement.where(source.date <= end_date)
+        return statement.group_by(*keys) if keys else statement
+    
+    @classmethod
+    def get_attendance_summary(cls, class_id=None, subject_id=None, date=None, start_date=None, end_date=None):
+        """Get attendance summary for given parameters"""
+        return cls.summarize(class_id=class_id, subject_id=subject_id, date=date, start_date=start_date, end_date=end_date)
+    
+    @classmethod
+    def bulk_upsert(cls, school_id, class_id, subject_id, date, teacher_id, records):
+        """Write a whole register (records: dicts with student_id, status and optional
+        remarks/time_in/time_out) in one statement; re-submitting updates in place"""
+        from .attendance_summary import AttendanceDailySummary
+        
+        now = datetime.utcnow()
+        rows = [{
+            'student_id': record['student_id'],
+            'class_id': class_id,
+            'subject_id': subject_id,
+            'teacher_id': teacher_id,
+            'date': date,
+            'status': record['status'],
+            'time_in': record.get('time_in'),
+            'time_out': record.get('time_out'),
+            'remarks': record.get('remarks'),
+            'school_id': school_id,
+            'created_at': now,
+            'updated_at': now
+        } for record in records]
+        upsert_rows(db.session.connection(), cls.__table__, rows,
+                    ('student_id', 'class_id', 'subject_id', 'date'),
+                    ('teacher_id', 'status', 'time_in', 'time_out', 'remarks', 'updated_at'))
+        # The statement bypasses the ORM, so the rollup row is recounted here
+        return AttendanceDailySummary.refresh(school_id, class_id, subject_id, date)
     
     def __repr__(self):
         return f'<Attendance {self.student_id} - {self.date} - {self.status}>'
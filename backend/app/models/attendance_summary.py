@@ -0,0 +1,110 @@
+from app import db
+from app.models.helpers import apply_counter_deltas, track_model_changes, upsert_rows
+from app.models.attendance import Attendance, ATTENDANCE_STATUSES
+from datetime import datetime
+
+SUMMARY_KEY_COLUMNS = ('school_id', 'class_id', 'subject_id', 'date')
+
+class AttendanceDailySummary(db.Model):
+    """Daily attendance rollup per school, class and subject.
+
+    Rows are maintained from Attendance writes by the session hooks below, so
+    reports over days, weeks and months never have to scan raw attendance.
+    """
+    __tablename__ = 'attendance_daily_summary'
+
+    # Plain ids, not foreign keys: counts are decremented after the flush that deletes the
+    # attendance, when that flush may already have removed the class or subject itself
+    school_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    class_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subject_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    date = db.Column(db.Date, primary_key=True)
+    total_records = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Integer, nullable=False, default=0)
+    excused = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_attendance_daily_summary_school_date', 'school_id', 'date'),
+    )
+
+    @classmethod
+    def count_columns(cls):
+        """Counter columns in the order of ATTENDANCE_STATUSES, preceded by the total"""
+        return ['total_records'] + list(ATTENDANCE_STATUSES)
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Add per-key counter deltas ({key tuple: {column: delta}}) to the rollup"""
+        apply_counter_deltas(connection, cls.__table__, SUMMARY_KEY_COLUMNS, deltas, 'total_records')
+
+    @classmethod
+    def rebuild(cls, school_id=None, class_id=None, subject_id=None, start_date=None, end_date=None, session=None):
+        """Recompute rollup rows from raw attendance (whole table or a filtered slice)"""
+        session = session or db.session
+        table = cls.__table__
+        raw_filters = []
+        rollup_filters = []
+        for column, value in (('school_id', school_id), ('class_id', class_id), ('subject_id', subject_id)):
+            if value is not None:
+                raw_filters.append(getattr(Attendance, column) == value)
+                rollup_filters.append(table.c[column] == value)
+        if start_date:
+            raw_filters.append(Attendance.date >= start_date)
+            rollup_filters.append(table.c.date >= start_date)
+        if end_date:
+            raw_filters.append(Attendance.date <= end_date)
+            rollup_filters.append(table.c.date <= end_date)
+
+        session.execute(table.delete().where(*rollup_filters))
+
+        keys = [Attendance.school_id, Attendance.class_id, Attendance.subject_id, Attendance.date]
+        source = db.select(
+            *keys,
+            db.func.count(Attendance.id),
+            *(db.func.sum(db.case((Attendance.status == status, 1), else_=0)) for status in ATTENDANCE_STATUSES),
+            db.literal(datetime.utcnow())
+        ).where(*raw_filters).group_by(*keys)
+        result = session.execute(
+            table.insert().from_select(list(SUMMARY_KEY_COLUMNS) + cls.count_columns() + ['updated_at'], source)
+        )
+        return result.rowcount
+
+    @classmethod
+    def refresh(cls, school_id, class_id, subject_id, date):
+        """Recount a single rollup row from raw attendance (after bulk writes that bypass the session hooks)"""
+        table = cls.__table__
+        key_values = dict(school_id=school_id, class_id=class_id, subject_id=subject_id, date=date)
+        counts = db.session.execute(
+            db.select(
+                db.func.count(Attendance.id),
+                *(db.func.sum(db.case((Attendance.status == status, 1), else_=0)) for status in ATTENDANCE_STATUSES)
+            ).where(*(getattr(Attendance, column) == value for column, value in key_values.items()))
+        ).one()
+        counts = dict(zip(cls.count_columns(), (value or 0 for value in counts)))
+        if not counts['total_records']:
+            db.session.execute(table.delete().where(*(table.c[column] == value for column, value in key_values.items())))
+            return counts
+        upsert_rows(db.session.connection(), table, [dict(key_values, updated_at=datetime.utcnow(), **counts)],
+                    SUMMARY_KEY_COLUMNS, cls.count_columns() + ['updated_at'])
+        return counts
+
+    def __repr__(self):
+        return f'<AttendanceDailySummary {self.school_id}/{self.class_id}/{self.subject_id} {self.date}>'
+
+def _apply_attendance_changes(session, changes):
+    """Turn Attendance row changes into rollup deltas and write them in the flush transaction"""
+    deltas = {}
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            counts = deltas.setdefault(tuple(values[column] for column in SUMMARY_KEY_COLUMNS), {})
+            counts['total_records'] = counts.get('total_records', 0) + sign
+            if values['status'] in ATTENDANCE_STATUSES:
+                counts[values['status']] = counts.get(values['status'], 0) + sign
+    AttendanceDailySummary.apply_deltas(session.connection(), deltas)
+
+track_model_changes(Attendance, SUMMARY_KEY_COLUMNS + ('status',), _apply_attendance_changes)
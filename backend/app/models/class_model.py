@@ -1,7 +1,8 @@
 from app import db
+from app.models.serialization import SerializerMixin
 from datetime import datetime
 
-class Class(db.Model):
+class Class(SerializerMixin, db.Model):
     """Class model for managing school classes and sections"""
     __tablename__ = 'classes'
     
@@ -24,18 +25,36 @@ class Class(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_classes_school_id', 'school_id'),
+    )
+    
     # Relationships
     students = db.relationship('Student', back_populates='current_class', lazy='dynamic')
     subjects = db.relationship('Subject', backref='class_obj', cascade='all, delete-orphan')
     attendances = db.relationship('Attendance', backref='class_obj', cascade='all, delete-orphan')
     grades = db.relationship('Grade', backref='class_obj', cascade='all, delete-orphan')
     
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'class_teacher_name': 'get_class_teacher_name',
+    }
+    EXPANDABLE_FIELDS = {
+        'subjects': 'get_subject_list',
+        'attendance_summary': 'get_attendance_summary',
+    }
+    FIELD_LOADERS = {
+        'class_teacher_name': ('class_teacher', 'user'),
+        'subjects': ('subjects',),
+    }
+    
     def __init__(self, **kwargs):
         super(Class, self).__init__(**kwargs)
-        self.update_current_strength()
+        if self.current_strength is None:
+            self.current_strength = 0
     
     def update_current_strength(self):
-        """Update current class strength"""
+        """Recount current class strength (normally maintained by app.models.counters)"""
         self.current_strength = self.students.count()
     
     def get_full_name(self):
@@ -66,29 +85,35 @@ class Class(db.Model):
         """Get list of students in this class"""
         return [student.to_dict() for student in self.students.all()]
     
-    def get_attendance_summary(self, date=None):
+    def get_attendance_summary(self, date=None, counts=None):
         """Get attendance summary for the class"""
         from .attendance import Attendance
         
-        query = Attendance.query.filter_by(class_id=self.id)
-        if date:
-            query = query.filter_by(date=date)
+        if counts is None:
+            counts = Attendance.summarize(class_id=self.id, date=date)
         
         total_students = self.current_strength
-        present_students = query.filter_by(status='present').count()
-        absent_students = query.filter_by(status='absent').count()
-        late_students = query.filter_by(status='late').count()
+        present_students = counts['present']
         
         return {
             'total_students': total_students,
             'present': present_students,
-            'absent': absent_students,
-            'late': late_students,
+            'absent': counts['absent'],
+            'late': counts['late'],
             'attendance_percentage': round((present_students / total_students * 100), 2) if total_students > 0 else 0
         }
     
-    def to_dict(self):
-        """Convert class to dictionary"""
+    @classmethod
+    def get_attendance_summaries(cls, classes, date=None):
+        """Get attendance summaries for many classes in a single query"""
+        from .attendance import Attendance
+        
+        counts = Attendance.summarize(group_by='class', class_id=[class_obj.id for class_obj in classes], date=date)
+        empty = Attendance.build_summary()
+        return {class_obj.id: class_obj.get_attendance_summary(counts=counts.get(class_obj.id, empty)) for class_obj in classes}
+    
+    def serialize_columns(self):
+        """Convert class to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'name': self.name,
@@ -99,14 +124,11 @@ class Class(db.Model):
             'current_strength': self.current_strength,
             'available_seats': self.get_available_seats(),
             'class_teacher_id': self.class_teacher_id,
-            'class_teacher_name': self.get_class_teacher_name(),
             'room_number': self.room_number,
             'schedule': self.schedule,
             'description': self.description,
             'status': self.status,
             'is_full': self.is_full(),
-            'subjects': self.get_subject_list(),
-            'attendance_summary': self.get_attendance_summary(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
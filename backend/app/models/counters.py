@@ -0,0 +1,138 @@
+from app import db
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.helpers import track_model_changes
+from app.models.school import School
+from app.models.user import User, UserRole
+from app.models.class_model import Class
+from app.models.subject import Subject
+from app.models.student import Student
+
+# School counter column for each user role; super admins are not counted
+ROLE_COUNTERS = {
+    UserRole.STUDENT: 'student_count',
+    UserRole.TEACHER: 'teacher_count',
+    UserRole.SCHOOL_ADMIN: 'admin_count',
+    UserRole.PRINCIPAL: 'admin_count',
+    UserRole.DIRECTOR: 'admin_count',
+}
+
+SCHOOL_COUNTERS = ('student_count', 'teacher_count', 'admin_count', 'class_count', 'subject_count')
+
+def _role_counter(role):
+    """Counter column for a role given as a UserRole, its name or its value"""
+    if isinstance(role, str):
+        try:
+            role = UserRole[role.upper()]
+        except KeyError:
+            return None
+    return ROLE_COUNTERS.get(role)
+
+def _increment(session, table, column, deltas):
+    """Add {row id: delta} to a counter column and expire the cached attribute"""
+    connection = session.connection()
+    for row_id, delta in deltas.items():
+        if row_id is None or not delta:
+            continue
+        connection.execute(
+            table.update().where(table.c.id == row_id).values({
+                column: db.func.coalesce(table.c[column], 0) + delta,
+                # Counters are derived data; keep updated_at for real edits
+                'updated_at': table.c.updated_at,
+            })
+        )
+    session.info.setdefault('expired_counters', []).extend(
+        (table, column, row_id) for row_id, delta in deltas.items() if row_id is not None and delta
+    )
+
+def _counter_deltas(changes, counter_for, key_column):
+    """Group (old, new) changes into {counter column: {row id: delta}}"""
+    deltas = {}
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            column = counter_for(values)
+            if column:
+                counts = deltas.setdefault(column, {})
+                counts[values[key_column]] = counts.get(values[key_column], 0) + sign
+    return deltas
+
+def _apply_user_changes(session, changes):
+    for column, deltas in _counter_deltas(changes, lambda values: _role_counter(values['role']), 'school_id').items():
+        _increment(session, School.__table__, column, deltas)
+
+def _apply_class_changes(session, changes):
+    for column, deltas in _counter_deltas(changes, lambda values: 'class_count', 'school_id').items():
+        _increment(session, School.__table__, column, deltas)
+
+def _apply_subject_changes(session, changes):
+    for column, deltas in _counter_deltas(changes, lambda values: 'subject_count', 'school_id').items():
+        _increment(session, School.__table__, column, deltas)
+
+def _apply_student_changes(session, changes):
+    for column, deltas in _counter_deltas(changes, lambda values: 'current_strength', 'current_class_id').items():
+        _increment(session, Class.__table__, column, deltas)
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_counters(session, flush_context):
+    """Reload counters that were changed with SQL the next time they are read"""
+    models = {School.__table__: School, Class.__table__: Class}
+    for table, column, row_id in session.info.pop('expired_counters', []):
+        obj = session.identity_map.get(inspect(models[table]).identity_key_from_primary_key((row_id,)))
+        if obj is not None:
+            session.expire(obj, [column])
+
+track_model_changes(User, ('school_id', 'role'), _apply_user_changes)
+track_model_changes(Class, ('school_id',), _apply_class_changes)
+track_model_changes(Subject, ('school_id',), _apply_subject_changes)
+track_model_changes(Student, ('current_class_id',), _apply_student_changes)
+
+def reconcile_counters(school_id=None, session=None):
+    """Recompute School counters and Class.current_strength, returning the number of rows repaired"""
+    session = session or db.session
+    repaired = 0
+
+    user_counts = session.query(User.school_id, User.role, db.func.count(User.id)).group_by(User.school_id, User.role)
+    class_counts = session.query(Class.school_id, db.func.count(Class.id)).group_by(Class.school_id)
+    subject_counts = session.query(Subject.school_id, db.func.count(Subject.id)).group_by(Subject.school_id)
+    schools = session.query(School)
+    if school_id is not None:
+        user_counts = user_counts.filter(User.school_id == school_id)
+        class_counts = class_counts.filter(Class.school_id == school_id)
+        subject_counts = subject_counts.filter(Subject.school_id == school_id)
+        schools = schools.filter_by(id=school_id)
+
+    expected = {}
+    for sid, role, count in user_counts:
+        column = _role_counter(role)
+        if column:
+            expected.setdefault(sid, {}).setdefault(column, 0)
+            expected[sid][column] += count
+    for sid, count in class_counts:
+        expected.setdefault(sid, {})['class_count'] = count
+    for sid, count in subject_counts:
+        expected.setdefault(sid, {})['subject_count'] = count
+
+    for school in schools:
+        counts = expected.get(school.id, {})
+        values = {column: counts.get(column, 0) for column in SCHOOL_COUNTERS}
+        if any(getattr(school, column) != value for column, value in values.items()):
+            for column, value in values.items():
+                setattr(school, column, value)
+            repaired += 1
+
+    strengths = dict(
+        session.query(Student.current_class_id, db.func.count(Student.id))
+        .filter(Student.current_class_id.isnot(None)).group_by(Student.current_class_id)
+    )
+    classes = session.query(Class)
+    if school_id is not None:
+        classes = classes.filter_by(school_id=school_id)
+    for class_obj in classes:
+        strength = strengths.get(class_obj.id, 0)
+        if class_obj.current_strength != strength:
+            class_obj.current_strength = strength
+            repaired += 1
+
+    return repaired
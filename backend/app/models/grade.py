@@ -1,7 +1,19 @@
 from app import db
+from app.models.serialization import SerializerMixin
+from app.models.helpers import month_expression
 from datetime import datetime
 
-class Grade(db.Model):
+# Minimum percentage for each letter grade, highest first; anything lower is an F
+LETTER_GRADE_THRESHOLDS = ((90, 'A'), (80, 'B'), (70, 'C'), (60, 'D'))
+
+def letter_grade_for(percentage):
+    """Letter grade for a percentage"""
+    for minimum, letter in LETTER_GRADE_THRESHOLDS:
+        if percentage >= minimum:
+            return letter
+    return 'F'
+
+class Grade(SerializerMixin, db.Model):
     """Grade model for managing student grades and academic performance"""
     __tablename__ = 'grades'
     
@@ -29,6 +41,26 @@ class Grade(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Tenant-scoped lookups: per-student/subject statistics and report date ranges
+    __table_args__ = (
+        db.Index('ix_grades_school_student_subject', 'school_id', 'student_id', 'subject_id'),
+        db.Index('ix_grades_school_date_assigned', 'school_id', 'date_assigned'),
+    )
+    
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'student_name': 'get_student_name',
+        'class_name': 'get_class_name',
+        'subject_name': 'get_subject_name',
+        'teacher_name': 'get_teacher_name',
+    }
+    FIELD_LOADERS = {
+        'student_name': ('student', 'user'),
+        'class_name': ('class_obj',),
+        'subject_name': ('subject',),
+        'teacher_name': ('teacher', 'user'),
+    }
+    
     def __init__(self, **kwargs):
         super(Grade, self).__init__(**kwargs)
         self.calculate_percentage()
@@ -44,16 +76,7 @@ class Grade(db.Model):
         if not self.percentage:
             return
         
-        if self.percentage >= 90:
-            self.letter_grade = 'A'
-        elif self.percentage >= 80:
-            self.letter_grade = 'B'
-        elif self.percentage >= 70:
-            self.letter_grade = 'C'
-        elif self.percentage >= 60:
-            self.letter_grade = 'D'
-        else:
-            self.letter_grade = 'F'
+        self.letter_grade = letter_grade_for(self.percentage)
     
     def get_student_name(self):
         """Get student name"""
@@ -120,18 +143,14 @@ class Grade(db.Model):
         }
         return grade_colors.get(self.letter_grade, 'gray')
     
-    def to_dict(self):
-        """Convert grade to dictionary"""
+    def serialize_columns(self):
+        """Convert grade to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'student_id': self.student_id,
-            'student_name': self.get_student_name(),
             'class_id': self.class_id,
-            'class_name': self.get_class_name(),
             'subject_id': self.subject_id,
-            'subject_name': self.get_subject_name(),
             'teacher_id': self.teacher_id,
-            'teacher_name': self.get_teacher_name(),
             'assignment_name': self.assignment_name,
             'assignment_type': self.assignment_type,
             'score': float(self.score) if self.score else None,
@@ -154,32 +173,175 @@ class Grade(db.Model):
         }
     
     @classmethod
-    def get_class_average(cls, class_id, subject_id=None):
-        """Get class average grade"""
-        query = cls.query.filter_by(class_id=class_id)
-        if subject_id:
-            query = query.filter_by(subject_id=subject_id)
+    def build_summary(cls, total_grades=0, total_score=0, passing_grades=0):
+        """Build a summary dictionary from grade totals"""
+        return {
+            'total_grades': total_grades,
+            'average_score': round(float(total_score) / total_grades, 2) if total_grades > 0 else 0,
+            'passing_grades': passing_grades,
+            'passing_rate': round(passing_grades / total_grades * 100, 2) if total_grades > 0 else 0
+        }
+    
+    @classmethod
+    def summarize(cls, group_by=None, school_id=None, class_id=None, subject_id=None, student_id=None,
+                  start_date=None, end_date=None):
+        """Get grade count, average score and passing rate in a single query.
         
-        grades = query.all()
-        if not grades:
-            return 0
+        Works like Attendance.summarize; dates filter on date_assigned and group_by
+        accepts 'school', 'class', 'subject', 'student', 'teacher', 'assignment_type'
+        and 'month'.
+        """
+        group_names = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        statement = cls.summary_statement(group_names, school_id=school_id, class_id=class_id, subject_id=subject_id,
+                                          student_id=student_id, start_date=start_date, end_date=end_date)
+        keys = len(group_names)
         
-        total_percentage = sum(grade.percentage for grade in grades if grade.percentage)
-        return round(total_percentage / len(grades), 2)
+        if not keys:
+            total_grades, total_score, passing_grades = db.session.execute(statement).one()
+            return cls.build_summary(total_grades or 0, total_score or 0, passing_grades or 0)
+        
+        summaries = {}
+        for row in db.session.execute(statement):
+            group_key = row[0] if keys == 1 else tuple(row[:keys])
+            total_grades, total_score, passing_grades = row[keys:]
+            summaries[group_key] = cls.build_summary(total_grades, total_score or 0, passing_grades or 0)
+        return summaries
+    
+    @classmethod
+    def summary_statement(cls, group_by=None, school_id=None, class_id=None, subject_id=None, student_id=None,
+                          start_date=None, end_date=None):
+        """The SELECT summarize() runs: group keys followed by count, score sum and passing count"""
+        group_columns = {
+            'school': cls.school_id,
+            'class': cls.class_id,
+            'subject': cls.subject_id,
+            'student': cls.student_id,
+            'teacher': cls.teacher_id,
+            'assignment_type': cls.assignment_type,
+            'month': month_expression(cls.date_assigned),
+        }
+        group_names = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        for name in group_names:
+            if name not in group_columns:
+                raise ValueError(f"Cannot group grade summary by '{name}'")
+        keys = [group_columns[name] for name in group_names]
+        
+        statement = db.select(
+            *keys,
+            db.func.count(cls.id),
+            db.func.sum(cls.score),
+            db.func.sum(db.case((cls.letter_grade == 'F', 0), else_=1))
+        )
+        for column, value in ((cls.school_id, school_id), (cls.class_id, class_id), (cls.subject_id, subject_id),
+                              (cls.student_id, student_id)):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                statement = statement.where(column.in_(list(value)))
+            else:
+                statement = statement.where(column == value)
+        if start_date:
+            statement = statement.where(cls.date_assigned >= start_date)
+        if end_date:
+            statement = statement.where(cls.date_assigned <= end_date)
+        return statement.group_by(*keys) if keys else statement
+    
+    @classmethod
+    def get_class_statistics(cls, class_id, subject_id=None, value='percentage'):
+        """Get class grade count, average and standard deviation from the running totals"""
+        from .grade_statistics import ClassSubjectGradeStatistics
+        
+        totals = ClassSubjectGradeStatistics.get_totals(class_id=class_id, subject_id=subject_id)
+        return ClassSubjectGradeStatistics.describe(totals, value)
+    
+    @classmethod
+    def get_student_statistics(cls, student_id, subject_id=None, value='percentage'):
+        """Get student grade count, average and standard deviation from the running totals"""
+        from .grade_statistics import StudentSubjectGradeStatistics
+        
+        totals = StudentSubjectGradeStatistics.get_totals(student_id=student_id, subject_id=subject_id)
+        return StudentSubjectGradeStatistics.describe(totals, value)
+    
+    @classmethod
+    def get_class_average(cls, class_id, subject_id=None):
+        """Get class average grade"""
+        return cls.get_class_statistics(class_id, subject_id)['average']
     
     @classmethod
     def get_student_average(cls, student_id, subject_id=None):
         """Get student average grade"""
-        query = cls.query.filter_by(student_id=student_id)
-        if subject_id:
-            query = query.filter_by(subject_id=subject_id)
+        return cls.get_student_statistics(student_id, subject_id)['average']
+    
+    @staticmethod
+    def grade_scores(scores, max_score):
+        """Percentages and letter grades for a whole batch of scores out of max_score"""
+        factor = 100.0 / float(max_score)
+        percentages = [round(float(score) * factor, 2) for score in scores]
+        return percentages, [letter_grade_for(percentage) for percentage in percentages]
+    
+    @staticmethod
+    def describe_scores(scores, percentages, letters):
+        """Mean, median, spread and letter distribution of an assessment"""
+        import statistics
         
-        grades = query.all()
-        if not grades:
-            return 0
+        if not scores:
+            return {'count': 0}
+        distribution = {letter: 0 for _, letter in LETTER_GRADE_THRESHOLDS}
+        distribution['F'] = 0
+        for letter in letters:
+            distribution[letter] += 1
+        return {
+            'count': len(scores),
+            'mean_score': round(statistics.fmean(scores), 2),
+            'median_score': round(statistics.median(scores), 2),
+            'std_dev': round(statistics.pstdev(scores), 2),
+            'min_score': min(scores),
+            'max_score': max(scores),
+            'mean_percentage': round(statistics.fmean(percentages), 2),
+            'passing_rate': round((len(letters) - distribution['F']) / len(letters) * 100, 2),
+            'distribution': distribution
+        }
+    
+    @classmethod
+    def bulk_create(cls, school_id, class_id, subject_id, teacher_id, assignment, entries):
+        """Insert grades for a whole assessment with one executemany INSERT.
+
+        assignment holds the shared fields (assignment_name, assignment_type,
+        max_score, date_assigned, due_date); entries are dicts with student_id,
+        score and optional remarks/submitted_date/status. Returns the class
+        statistics for the batch.
+        """
+        from .grade_statistics import record_new_grades
         
-        total_percentage = sum(grade.percentage for grade in grades if grade.percentage)
-        return round(total_percentage / len(grades), 2)
+        max_score = float(assignment.get('max_score') or 100)
+        scores = [float(entry['score']) for entry in entries]
+        percentages, letters = cls.grade_scores(scores, max_score)
+        now = datetime.utcnow()
+        rows = [{
+            'student_id': entry['student_id'],
+            'class_id': class_id,
+            'subject_id': subject_id,
+            'teacher_id': teacher_id,
+            'school_id': school_id,
+            'assignment_name': assignment['assignment_name'],
+            'assignment_type': assignment['assignment_type'],
+            'score': score,
+            'max_score': max_score,
+            'percentage': percentage,
+            'letter_grade': letter,
+            'remarks': entry.get('remarks'),
+            'date_assigned': assignment.get('date_assigned') or now.date(),
+            'due_date': assignment.get('due_date'),
+            'submitted_date': entry.get('submitted_date'),
+            'status': entry.get('status') or 'graded',
+            'created_at': now,
+            'updated_at': now
+        } for entry, score, percentage, letter in zip(entries, scores, percentages, letters)]
+        if rows:
+            db.session.execute(cls.__table__.insert(), rows)
+            # The insert bypasses the ORM, so running totals are updated here
+            record_new_grades(db.session, rows)
+        return cls.describe_scores(scores, percentages, letters)
     
     def __repr__(self):
         return f'<Grade {self.student_id} - {self.assignment_name} - {self.letter_grade}>'
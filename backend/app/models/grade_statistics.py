@@ -0,0 +1,139 @@
+from app import db
+from app.models.helpers import apply_counter_deltas, track_model_changes
+from app.models.grade import Grade
+from datetime import datetime
+import math
+
+GRADE_STATISTIC_COLUMNS = ('grade_count', 'score_sum', 'score_sq_sum', 'percentage_sum', 'percentage_sq_sum')
+
+class GradeStatisticsMixin:
+    """Running totals of scores and percentages for a group of grades"""
+    grade_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0)
+    percentage_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Add per-key running-total deltas ({key tuple: {column: delta}})"""
+        apply_counter_deltas(connection, cls.__table__, cls.KEY_COLUMNS, deltas, 'grade_count')
+
+    @classmethod
+    def get_totals(cls, **filters):
+        """Sum the running totals of every row matching the key filters"""
+        row = db.session.execute(cls.totals_statement(**filters)).one()
+        return dict(zip(GRADE_STATISTIC_COLUMNS, (value or 0 for value in row)))
+
+    @classmethod
+    def totals_statement(cls, **filters):
+        """The SELECT get_totals() runs"""
+        return db.select(
+            *(db.func.sum(getattr(cls, column)) for column in GRADE_STATISTIC_COLUMNS)
+        ).filter_by(**{key: value for key, value in filters.items() if value is not None})
+
+    @classmethod
+    def get_grouped_totals(cls, group_column, values):
+        """Sum running totals per value of group_column in a single query"""
+        rows = db.session.execute(cls.grouped_totals_statement(group_column, values))
+        return {row[0]: dict(zip(GRADE_STATISTIC_COLUMNS, (value or 0 for value in row[1:]))) for row in rows}
+
+    @classmethod
+    def grouped_totals_statement(cls, group_column, values):
+        """The SELECT get_grouped_totals() runs"""
+        column = getattr(cls, group_column)
+        return db.select(
+            column, *(db.func.sum(getattr(cls, name)) for name in GRADE_STATISTIC_COLUMNS)
+        ).where(column.in_(list(values))).group_by(column)
+
+    @classmethod
+    def rebuild(cls, session=None):
+        """Recompute every row from the grades table"""
+        session = session or db.session
+        table = cls.__table__
+        session.execute(table.delete())
+        keys = [getattr(Grade, column) for column in cls.KEY_COLUMNS]
+        score = db.func.coalesce(Grade.score, 0)
+        percentage = db.func.coalesce(Grade.percentage, 0)
+        source = db.select(
+            *keys,
+            db.func.count(Grade.id),
+            db.func.sum(score),
+            db.func.sum(score * score),
+            db.func.sum(percentage),
+            db.func.sum(percentage * percentage),
+            db.literal(datetime.utcnow())
+        ).group_by(*keys)
+        result = session.execute(
+            table.insert().from_select(list(cls.KEY_COLUMNS) + list(GRADE_STATISTIC_COLUMNS) + ['updated_at'], source)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def describe(totals, value='score'):
+        """Count, mean and population standard deviation of score or percentage"""
+        count = totals['grade_count']
+        if count <= 0:
+            return {'count': 0, 'average': 0, 'std_dev': 0}
+        mean = totals[f'{value}_sum'] / count
+        variance = max(0.0, totals[f'{value}_sq_sum'] / count - mean * mean)
+        return {'count': count, 'average': round(mean, 2), 'std_dev': round(math.sqrt(variance), 2)}
+
+class StudentSubjectGradeStatistics(GradeStatisticsMixin, db.Model):
+    """Running grade totals per student and subject"""
+    __tablename__ = 'grade_statistics_student_subject'
+    KEY_COLUMNS = ('student_id', 'subject_id')
+
+    student_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subject_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f'<StudentSubjectGradeStatistics {self.student_id}/{self.subject_id}>'
+
+class ClassSubjectGradeStatistics(GradeStatisticsMixin, db.Model):
+    """Running grade totals per class and subject"""
+    __tablename__ = 'grade_statistics_class_subject'
+    KEY_COLUMNS = ('class_id', 'subject_id')
+
+    class_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subject_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    __table_args__ = (
+        db.Index('ix_grade_statistics_class_subject_subject', 'subject_id'),
+    )
+
+    def __repr__(self):
+        return f'<ClassSubjectGradeStatistics {self.class_id}/{self.subject_id}>'
+
+GRADE_STATISTICS_MODELS = (StudentSubjectGradeStatistics, ClassSubjectGradeStatistics)
+
+def _apply_grade_changes(session, changes):
+    """Turn Grade row changes into running-total deltas and write them in the flush transaction"""
+    deltas = {model: {} for model in GRADE_STATISTICS_MODELS}
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            score = float(values['score'] or 0)
+            percentage = float(values['percentage'] or 0)
+            increments = {
+                'grade_count': 1,
+                'score_sum': score,
+                'score_sq_sum': score * score,
+                'percentage_sum': percentage,
+                'percentage_sq_sum': percentage * percentage,
+            }
+            for model in GRADE_STATISTICS_MODELS:
+                counts = deltas[model].setdefault(tuple(values[column] for column in model.KEY_COLUMNS), {})
+                for column, value in increments.items():
+                    counts[column] = counts.get(column, 0) + sign * value
+    connection = session.connection()
+    for model, model_deltas in deltas.items():
+        model.apply_deltas(connection, model_deltas)
+
+def record_new_grades(session, rows):
+    """Add grades inserted outside the ORM (bulk statements) to the running totals"""
+    _apply_grade_changes(session, [(None, row) for row in rows])
+
+track_model_changes(Grade, ('student_id', 'class_id', 'subject_id', 'score', 'percentage'), _apply_grade_changes)
@@ -0,0 +1,161 @@
+from app import db
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+def month_expression(column):
+    """Get a 'YYYY-MM' expression for a date column on the current database backend"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return db.func.to_char(column, 'YYYY-MM')
+    if dialect in ('mysql', 'mariadb'):
+        return db.func.date_format(column, '%Y-%m')
+    return db.func.strftime('%Y-%m', column)
+
+def estimate_count(query, cap=10000):
+    """Estimate the number of rows a query returns without a full COUNT(*).
+
+    On PostgreSQL the planner's row estimate is used; elsewhere rows are
+    counted up to cap. Returns (count, exact).
+    """
+    session = query.session
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = query.order_by(None).limit(None).statement.compile(
+            dialect=session.get_bind().dialect, compile_kwargs={'literal_binds': True}
+        )
+        plan = session.execute(db.text(f'EXPLAIN (FORMAT JSON) {statement}')).scalar()
+        return int(plan[0]['Plan']['Plan Rows']), False
+    capped = query.order_by(None).limit(cap + 1).subquery()
+    count = session.query(db.func.count()).select_from(capped).scalar()
+    return min(count, cap), count <= cap
+
+def keyset_page(query, column, after_id=None, limit=50):
+    """Narrow a query to the page after after_id, fetching one extra row to tell whether more follow"""
+    if after_id:
+        query = query.filter(column > after_id)
+    return query.order_by(column).limit(limit + 1)
+
+def apply_counter_deltas(connection, table, key_columns, deltas, count_column):
+    """Add per-key deltas ({key tuple: {column: delta}}) to a counter table.
+
+    Uses a single upsert when the backend supports it and every delta is
+    positive; rows whose count_column drops to zero are removed.
+    """
+    dialect = connection.dialect.name
+    now = datetime.utcnow()
+
+    for key, counts in deltas.items():
+        counts = {column: value for column, value in counts.items() if value}
+        if not counts:
+            continue
+        key_values = dict(zip(key_columns, key))
+        key_clause = db.and_(*(table.c[column] == value for column, value in key_values.items()))
+        increments = {column: table.c[column] + value for column, value in counts.items()}
+        increments['updated_at'] = now
+
+        if dialect in ('postgresql', 'sqlite') and all(value > 0 for value in counts.values()):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table).values(updated_at=now, **key_values, **counts)
+            statement = statement.on_conflict_do_update(index_elements=list(key_columns), set_=increments)
+            connection.execute(statement)
+            continue
+
+        result = connection.execute(table.update().where(key_clause).values(**increments))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(updated_at=now, **key_values, **counts))
+        elif any(value < 0 for value in counts.values()):
+            connection.execute(table.delete().where(key_clause).where(table.c[count_column] <= 0))
+
+def upsert_rows(connection, table, rows, conflict_columns, update_columns):
+    """Insert rows, updating update_columns where a row with the same conflict_columns exists.
+
+    One INSERT ... ON CONFLICT DO UPDATE (or ON DUPLICATE KEY UPDATE) statement
+    where the backend supports it, update-then-insert per row otherwise.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(conflict_columns),
+            set_={column: statement.excluded[column] for column in update_columns}
+        )
+        connection.execute(statement)
+        return
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(rows)
+        statement = statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_columns})
+        connection.execute(statement)
+        return
+
+    for row in rows:
+        key_clause = db.and_(*(table.c[column] == row[column] for column in conflict_columns))
+        result = connection.execute(table.update().where(key_clause).values({column: row[column] for column in update_columns}))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(row))
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+def _previous_values(obj, columns):
+    """Column values as last loaded from the database"""
+    state = inspect(obj)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        values[column] = history.deleted[0] if history.deleted else getattr(obj, column)
+    return values
+
+def track_model_changes(model, columns, apply_changes):
+    """Call apply_changes(session, changes) after every flush that writes model rows.
+
+    changes is a list of (old, new) dictionaries of the given columns: old is
+    None for inserts and new is None for deletes. New values are read once the
+    flush has run, so foreign keys assigned through relationships are set.
+    Updates that leave every column unchanged are skipped.
+    """
+    # One pending list per registration; a model can be tracked by several subsystems
+    info_key = f'tracked_changes:{model.__tablename__}:{apply_changes.__module__}.{apply_changes.__qualname__}'
+
+    # Load an expired attribute's committed value before it is overwritten
+    # (e.g. set after a commit), so the change keeps its old value in history
+    for column in columns:
+        if not event.contains(getattr(model, column), 'set', _load_old_value):
+            event.listen(getattr(model, column), 'set', _load_old_value, active_history=True)
+
+    @event.listens_for(Session, 'before_flush')
+    def collect_changes(session, flush_context, instances):
+        pending = session.info.setdefault(info_key, [])
+        for obj in session.new:
+            if isinstance(obj, model):
+                pending.append((obj, None, False))
+        for obj in session.deleted:
+            if isinstance(obj, model):
+                pending.append((obj, _previous_values(obj, columns), True))
+        for obj in session.dirty:
+            if isinstance(obj, model) and obj not in session.deleted:
+                pending.append((obj, _previous_values(obj, columns), False))
+
+    @event.listens_for(Session, 'after_flush')
+    def apply_collected_changes(session, flush_context):
+        changes = []
+        for obj, old, deleted in session.info.pop(info_key, []):
+            new = None if deleted else {column: getattr(obj, column) for column in columns}
+            if old != new:
+                changes.append((old, new))
+        if changes:
+            apply_changes(session, changes)
+
+    @event.listens_for(Session, 'after_rollback')
+    def discard_changes(session):
+        session.info.pop(info_key, None)
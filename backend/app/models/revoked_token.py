@@ -0,0 +1,14 @@
+from app import db
+
+class RevokedToken(db.Model):
+    """A logged-out token (by jti), kept until the token would have expired anyway.
+
+    Only used when no Redis cache is configured; with Redis the denylist lives
+    in the shared cache instead (see app.revocation).
+    """
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    # Not a foreign key: deleting a user must not resurrect their revoked tokens
+    user_id = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
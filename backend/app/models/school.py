@@ -1,8 +1,9 @@
 from datetime import datetime
 from app import db
+from app.models.serialization import SerializerMixin
 from sqlalchemy import Index
 
-class School(db.Model):
+class School(SerializerMixin, db.Model):
     """School model for multi-tenant support"""
     __tablename__ = 'schools'
     
@@ -35,6 +36,13 @@ class School(db.Model):
     enable_sms_notifications = db.Column(db.Boolean, default=False)
     enable_email_notifications = db.Column(db.Boolean, default=True)
     
+    # Denormalized counters (maintained by app.models.counters)
+    student_count = db.Column(db.Integer, nullable=False, default=0)
+    teacher_count = db.Column(db.Integer, nullable=False, default=0)
+    admin_count = db.Column(db.Integer, nullable=False, default=0)
+    class_count = db.Column(db.Integer, nullable=False, default=0)
+    subject_count = db.Column(db.Integer, nullable=False, default=0)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -63,8 +71,8 @@ class School(db.Model):
             code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
         return code
     
-    def to_dict(self):
-        """Convert school to dictionary"""
+    def serialize_columns(self):
+        """Convert school to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'name': self.name,
@@ -94,12 +102,12 @@ class School(db.Model):
         }
     
     def get_statistics(self):
-        """Get school statistics"""
+        """Get school statistics from the maintained counters"""
         return {
-            'total_students': self.users.filter_by(role='student').count(),
-            'total_teachers': self.users.filter_by(role='teacher').count(),
-            'total_classes': self.classes.count(),
-            'total_subjects': self.subjects.count(),
-            'total_admins': self.users.filter_by(role='admin').count()
+            'total_students': self.student_count or 0,
+            'total_teachers': self.teacher_count or 0,
+            'total_classes': self.class_count or 0,
+            'total_subjects': self.subject_count or 0,
+            'total_admins': self.admin_count or 0
         }
 
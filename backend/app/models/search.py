@@ -0,0 +1,156 @@
+import re
+from app import db
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import Session
+from app.models.helpers import track_model_changes
+from app.models.user import User
+from app.models.student import Student
+
+# Columns that make up a user's search document, in ranking-neutral order
+USER_SEARCH_FIELDS = ('first_name', 'last_name', 'email')
+STUDENT_SEARCH_FIELDS = ('student_id', 'parent_name', 'parent_email')
+
+class SearchEntry(db.Model):
+    """Denormalized search text per user: names, email, student code and parent details.
+
+    Rows are maintained from User/Student writes by the session hooks below.
+    PostgreSQL searches them through a pg_trgm GIN index, SQLite through the
+    search_entries_fts FTS5 table that triggers keep in step with this one.
+    """
+    __tablename__ = 'search_entries'
+
+    # Not a foreign key: a deleted user's entry is dropped by the after_flush refresh,
+    # which runs once the users row is already gone
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    school_id = db.Column(db.Integer)
+    role = db.Column(db.String(20))
+    document = db.Column(db.Text, nullable=False, default='')
+
+    __table_args__ = (
+        db.Index('ix_search_entries_school_role', 'school_id', 'role'),
+        db.Index(
+            'ix_search_entries_document_trgm', 'document',
+            postgresql_using='gin', postgresql_ops={'document': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self):
+        return f'<SearchEntry {self.user_id}>'
+
+# External-content FTS5 index over search_entries.document (rowid = user_id)
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE search_entries_fts USING fts5("
+    "document, content='search_entries', content_rowid='user_id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER search_entries_ai AFTER INSERT ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(rowid, document) VALUES (new.user_id, new.document); END",
+    "CREATE TRIGGER search_entries_ad AFTER DELETE ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(search_entries_fts, rowid, document) VALUES ('delete', old.user_id, old.document); END",
+    "CREATE TRIGGER search_entries_au AFTER UPDATE ON search_entries BEGIN "
+    "INSERT INTO search_entries_fts(search_entries_fts, rowid, document) VALUES ('delete', old.user_id, old.document); "
+    "INSERT INTO search_entries_fts(rowid, document) VALUES (new.user_id, new.document); END",
+)
+
+event.listen(SearchEntry.__table__, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+for _statement in SQLITE_FTS_DDL:
+    event.listen(SearchEntry.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(SearchEntry.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS search_entries_fts').execute_if(dialect='sqlite'))
+
+def _document(values):
+    return ' '.join(str(value) for value in values if value).lower()
+
+def refresh_search_entries(connection, user_ids):
+    """Rewrite the search entries of the given users from users/students; returns rows written"""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    users, students, table = User.__table__, Student.__table__, SearchEntry.__table__
+    written = 0
+    for start in range(0, len(user_ids), 500):
+        chunk = user_ids[start:start + 500]
+        rows = connection.execute(
+            db.select(
+                users.c.id, users.c.school_id, users.c.role,
+                *(users.c[field] for field in USER_SEARCH_FIELDS),
+                *(students.c[field] for field in STUDENT_SEARCH_FIELDS)
+            ).select_from(users.outerjoin(students, students.c.user_id == users.c.id)).where(users.c.id.in_(chunk))
+        ).all()
+        connection.execute(table.delete().where(table.c.user_id.in_(chunk)))
+        if rows:
+            connection.execute(table.insert(), [
+                {'user_id': row[0], 'school_id': row[1], 'role': row[2].name if row[2] else None, 'document': _document(row[3:])}
+                for row in rows
+            ])
+        written += len(rows)
+    return written
+
+def rebuild_search_entries(school_id=None, session=None):
+    """Recompute the search entries of every user (of one school); returns rows written"""
+    session = session or db.session
+    query = session.query(User.id)
+    if school_id is not None:
+        query = query.filter(User.school_id == school_id)
+    table = SearchEntry.__table__
+    statement = table.delete()
+    if school_id is not None:
+        statement = statement.where(table.c.school_id == school_id)
+    session.execute(statement)
+    return refresh_search_entries(session.connection(), [user_id for (user_id,) in query])
+
+def _search_terms(text):
+    # Same word boundaries as the unicode61 tokenizer: letters and digits
+    return re.findall(r'[^\W_]+', text.lower())
+
+def search_statement(text, school_id=None, role=None):
+    """SELECT of matching user ids, most relevant first"""
+    table = SearchEntry.__table__
+    terms = _search_terms(text or '')
+    statement = db.select(table.c.user_id)
+    if not terms:
+        return statement.where(db.false())
+    if school_id is not None:
+        statement = statement.where(table.c.school_id == school_id)
+    if role is not None:
+        statement = statement.where(table.c.role == role.name)
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Every term must match a word prefix; bm25() is lower for better matches
+        fts = db.table('search_entries_fts', db.column('rowid'))
+        fts_table = db.literal_column('search_entries_fts')
+        query = ' '.join(f'"{term}"*' for term in terms)
+        return statement.select_from(table.join(fts, fts.c.rowid == table.c.user_id)).where(
+            fts_table.op('MATCH')(query)
+        ).order_by(db.func.bm25(fts_table), table.c.user_id)
+
+    phrase = ' '.join(terms)
+    contains = db.and_(*(table.c.document.contains(term, autoescape=True) for term in terms))
+    if dialect == 'postgresql':
+        # Substring matches and typo-tolerant word similarity both use the trigram index
+        return statement.where(db.or_(contains, db.literal(phrase).op('<%')(table.c.document))).order_by(
+            db.func.word_similarity(phrase, table.c.document).desc(), table.c.user_id
+        )
+    return statement.where(contains).order_by(table.c.user_id)
+
+def search_user_ids(text, school_id=None, role=None, limit=20):
+    """Ids of the users best matching a search string"""
+    return [user_id for (user_id,) in db.session.execute(search_statement(text, school_id, role).limit(limit))]
+
+def _collect_user_ids(key_column):
+    def collect(session, changes):
+        pending = session.info.setdefault('search_refresh', set())
+        for old, new in changes:
+            pending.update(values[key_column] for values in (old, new) if values is not None)
+    return collect
+
+track_model_changes(User, ('id', 'school_id', 'role') + USER_SEARCH_FIELDS, _collect_user_ids('id'))
+track_model_changes(Student, ('user_id',) + STUDENT_SEARCH_FIELDS, _collect_user_ids('user_id'))
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_search_entries(session, flush_context):
+    """Write the search entries of users changed in this flush once, after both trackers ran"""
+    user_ids = session.info.pop('search_refresh', None)
+    if user_ids:
+        refresh_search_entries(session.connection(), user_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_search_refresh(session):
+    session.info.pop('search_refresh', None)
@@ -0,0 +1,80 @@
+from flask import request
+from sqlalchemy.orm import joinedload, selectinload
+
+class FieldSelection:
+    """Fields requested through ?fields= (exact list) and ?expand= (extra expensive fields)"""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = set(fields) if fields is not None else None
+        self.expand = set(expand or ())
+
+    @classmethod
+    def from_request(cls):
+        """Build a selection from the current request's query string"""
+        def split(name):
+            value = request.args.get(name)
+            if value is None:
+                return None
+            return {item.strip() for item in value.split(',') if item.strip()}
+        return cls(split('fields'), split('expand'))
+
+    def wants(self, name, expandable=False):
+        """Check whether a field should be produced"""
+        if name in self.expand:
+            return True
+        if self.fields is not None:
+            return name in self.fields
+        return not expandable
+
+class SerializerMixin:
+    """Sparse-fieldset serialization for models.
+
+    Models implement serialize_columns() for fields that need no extra queries
+    and list the rest by method name: COMPUTED_FIELDS are relationship-backed and
+    included by default, EXPANDABLE_FIELDS are aggregates that are only produced
+    when named in ?fields= or ?expand=. FIELD_LOADERS maps a field to the
+    relationship path it reads, so list queries can eager-load only what the
+    selection needs.
+    """
+    COMPUTED_FIELDS = {}
+    EXPANDABLE_FIELDS = {}
+    FIELD_LOADERS = {}
+
+    def serialize_columns(self):
+        raise NotImplementedError
+
+    def to_dict(self, selection=None, precomputed=None):
+        """Convert to dictionary, producing only the selected fields"""
+        selection = selection or FieldSelection()
+        precomputed = precomputed or {}
+        data = {name: value for name, value in self.serialize_columns().items() if selection.wants(name)}
+        for expandable, methods in ((False, self.COMPUTED_FIELDS), (True, self.EXPANDABLE_FIELDS)):
+            for name, method in methods.items():
+                if selection.wants(name, expandable=expandable):
+                    data[name] = precomputed[name] if name in precomputed else getattr(self, method)()
+        return data
+
+    @classmethod
+    def wanted_expansions(cls, selection):
+        """Names of the expandable fields a selection asks for"""
+        return [name for name in cls.EXPANDABLE_FIELDS if selection.wants(name, expandable=True)]
+
+    @classmethod
+    def loader_options(cls, selection=None):
+        """Eager-loading options covering the relationships the selected fields read"""
+        selection = selection or FieldSelection()
+        options = []
+        seen = set()
+        for name, path in cls.FIELD_LOADERS.items():
+            expandable = name in cls.EXPANDABLE_FIELDS
+            if path in seen or not selection.wants(name, expandable=expandable):
+                continue
+            seen.add(path)
+            option, model = None, cls
+            for attribute_name in path:
+                attribute = getattr(model, attribute_name)
+                loader = selectinload if attribute.property.uselist else joinedload
+                option = loader(attribute) if option is None else getattr(option, loader.__name__)(attribute)
+                model = attribute.property.mapper.class_
+            options.append(option)
+        return options
@@ -1,8 +1,9 @@
 from app import db
+from app.models.serialization import FieldSelection, SerializerMixin
 from sqlalchemy import Index
 from datetime import datetime
 
-class Student(db.Model):
+class Student(SerializerMixin, db.Model):
     """Student model for academic information"""
     __tablename__ = 'students'
     
@@ -33,13 +34,28 @@ class Student(db.Model):
     attendances = db.relationship('Attendance', backref='student', cascade='all, delete-orphan')
     grades = db.relationship('Grade', backref='student', cascade='all, delete-orphan')
     
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'current_class_name': 'get_current_class_name',
+        'full_name': 'get_full_name',
+    }
+    EXPANDABLE_FIELDS = {
+        'attendance_percentage': 'get_attendance_percentage',
+        'average_grade': 'get_average_grade',
+    }
+    FIELD_LOADERS = {
+        'current_class_name': ('current_class',),
+        'full_name': ('user',),
+    }
+    
     def __init__(self, **kwargs):
         if 'student_id' not in kwargs:
             # Generate student ID if not provided
             kwargs['student_id'] = self.generate_student_id()
         super(Student, self).__init__(**kwargs)
     
-    def generate_student_id(self):
+    @staticmethod
+    def generate_student_id():
         """Generate unique student ID"""
         import random
         import string
@@ -59,46 +75,65 @@ class Student(db.Model):
         """Calculate attendance percentage"""
         from .attendance import Attendance
         
-        query = Attendance.query.filter_by(student_id=self.id)
-        
-        if subject_id:
-            query = query.filter_by(subject_id=subject_id)
-        if start_date:
-            query = query.filter(Attendance.date >= start_date)
-        if end_date:
-            query = query.filter(Attendance.date <= end_date)
-        
-        total_classes = query.count()
-        present_classes = query.filter_by(status='present').count()
-        
-        if total_classes == 0:
-            return 0
-        return round((present_classes / total_classes) * 100, 2)
+        summary = Attendance.summarize(student_id=self.id, subject_id=subject_id, start_date=start_date, end_date=end_date)
+        return summary['attendance_percentage']
     
     def get_average_grade(self, subject_id=None):
         """Calculate average grade"""
         from .grade import Grade
         
-        query = Grade.query.filter_by(student_id=self.id)
-        if subject_id:
-            query = query.filter_by(subject_id=subject_id)
+        return Grade.get_student_statistics(self.id, subject_id, value='score')['average']
+    
+    @classmethod
+    def get_batch_statistics(cls, student_ids, fields=('attendance_percentage', 'average_grade')):
+        """Get attendance percentage and average grade for many students using grouped queries"""
+        from .attendance import Attendance
+        from .grade_statistics import StudentSubjectGradeStatistics
         
-        grades = query.all()
-        if not grades:
-            return 0
+        statistics = {student_id: {field: 0 for field in fields} for student_id in student_ids}
+        if not statistics or not fields:
+            return statistics
         
-        total_score = sum(grade.score for grade in grades)
-        return round(total_score / len(grades), 2)
+        if 'attendance_percentage' in fields:
+            attendance = Attendance.summarize(group_by='student', student_id=list(statistics.keys()))
+            for student_id, summary in attendance.items():
+                statistics[student_id]['attendance_percentage'] = summary['attendance_percentage']
+        
+        if 'average_grade' in fields:
+            grade_totals = StudentSubjectGradeStatistics.get_grouped_totals('student_id', statistics.keys())
+            for student_id, totals in grade_totals.items():
+                statistics[student_id]['average_grade'] = StudentSubjectGradeStatistics.describe(totals, 'score')['average']
+        
+        return statistics
+    
+    @classmethod
+    def list_query(cls, school_id, class_id=None, q=None):
+        """A school's students matching the listing filters, in no particular order"""
+        from .search import search_statement
+        from .user import UserRole
+        
+        query = cls.query.filter_by(school_id=school_id)
+        if class_id:
+            query = query.filter_by(current_class_id=class_id)
+        if q:
+            query = query.filter(cls.user_id.in_(search_statement(q, school_id, UserRole.STUDENT).order_by(None)))
+        return query
+    
+    @classmethod
+    def to_dict_many(cls, students, selection=None):
+        """Convert a page of students to dictionaries with a fixed number of queries"""
+        selection = selection or FieldSelection()
+        statistics = cls.get_batch_statistics([student.id for student in students], cls.wanted_expansions(selection))
+        return [student.to_dict(selection, precomputed=statistics[student.id]) for student in students]
     
-    def to_dict(self):
-        """Convert student to dictionary"""
+    def serialize_columns(self):
+        """Convert student to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'user_id': self.user_id,
             'student_id': self.student_id,
             'admission_date': self.admission_date.isoformat() if self.admission_date else None,
             'current_class_id': self.current_class_id,
-            'current_class_name': self.get_current_class_name(),
             'parent_name': self.parent_name,
             'parent_phone': self.parent_phone,
             'parent_email': self.parent_email,
@@ -108,9 +143,6 @@ class Student(db.Model):
             'previous_school': self.previous_school,
             'academic_year': self.academic_year,
             'status': self.status,
-            'full_name': self.get_full_name(),
-            'attendance_percentage': self.get_attendance_percentage(),
-            'average_grade': self.get_average_grade(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -1,7 +1,8 @@
 from app import db
+from app.models.serialization import SerializerMixin
 from datetime import datetime
 
-class Subject(db.Model):
+class Subject(SerializerMixin, db.Model):
     """Subject model for managing academic subjects"""
     __tablename__ = 'subjects'
     
@@ -24,10 +25,33 @@ class Subject(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_subjects_school_class', 'school_id', 'class_id'),
+    )
+    
     # Relationships
     attendances = db.relationship('Attendance', backref='subject', cascade='all, delete-orphan')
     grades = db.relationship('Grade', backref='subject', cascade='all, delete-orphan')
     
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'class_name': 'get_class_name',
+        'teacher_name': 'get_teacher_name',
+        'total_students': 'get_total_students',
+    }
+    EXPANDABLE_FIELDS = {
+        'attendance_summary': 'get_attendance_summary',
+        'average_grade': 'get_average_grade',
+        'schedule': 'get_schedule',
+    }
+    FIELD_LOADERS = {
+        'class_name': ('class_obj',),
+        'teacher_name': ('teacher', 'user'),
+        'total_students': ('class_obj',),
+        'attendance_summary': ('class_obj',),
+        'schedule': ('class_obj',),
+    }
+    
     def __init__(self, **kwargs):
         if 'code' not in kwargs:
             kwargs['code'] = self.generate_subject_code(kwargs.get('name', ''))
@@ -56,37 +80,39 @@ class Subject(db.Model):
         """Get total number of students in this subject"""
         return self.class_obj.current_strength if self.class_obj else 0
     
-    def get_attendance_summary(self, date=None):
+    def get_attendance_summary(self, date=None, counts=None):
         """Get attendance summary for this subject"""
         from .attendance import Attendance
         
-        query = Attendance.query.filter_by(subject_id=self.id)
-        if date:
-            query = query.filter_by(date=date)
+        if counts is None:
+            counts = Attendance.summarize(subject_id=self.id, date=date)
         
         total_students = self.get_total_students()
-        present_students = query.filter_by(status='present').count()
-        absent_students = query.filter_by(status='absent').count()
-        late_students = query.filter_by(status='late').count()
+        present_students = counts['present']
         
         return {
             'total_students': total_students,
             'present': present_students,
-            'absent': absent_students,
-            'late': late_students,
+            'absent': counts['absent'],
+            'late': counts['late'],
             'attendance_percentage': round((present_students / total_students * 100), 2) if total_students > 0 else 0
         }
     
+    @classmethod
+    def get_attendance_summaries(cls, subjects, date=None):
+        """Get attendance summaries for many subjects in a single query"""
+        from .attendance import Attendance
+        
+        counts = Attendance.summarize(group_by='subject', subject_id=[subject.id for subject in subjects], date=date)
+        empty = Attendance.build_summary()
+        return {subject.id: subject.get_attendance_summary(counts=counts.get(subject.id, empty)) for subject in subjects}
+    
     def get_average_grade(self):
         """Get average grade for this subject"""
-        from .grade import Grade
-        
-        grades = Grade.query.filter_by(subject_id=self.id).all()
-        if not grades:
-            return 0
+        from .grade_statistics import ClassSubjectGradeStatistics
         
-        total_score = sum(grade.score for grade in grades)
-        return round(total_score / len(grades), 2)
+        totals = ClassSubjectGradeStatistics.get_totals(subject_id=self.id)
+        return ClassSubjectGradeStatistics.describe(totals, 'score')['average']
     
     def get_schedule(self):
         """Get subject schedule (placeholder for future implementation)"""
@@ -97,26 +123,20 @@ class Subject(db.Model):
             'room': self.class_obj.room_number if self.class_obj else 'TBD'
         }
     
-    def to_dict(self):
-        """Convert subject to dictionary"""
+    def serialize_columns(self):
+        """Convert subject to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'name': self.name,
             'code': self.code,
             'description': self.description,
             'class_id': self.class_id,
-            'class_name': self.get_class_name(),
             'teacher_id': self.teacher_id,
-            'teacher_name': self.get_teacher_name(),
             'credits': self.credits,
             'hours_per_week': self.hours_per_week,
             'syllabus': self.syllabus,
             'books': self.books,
             'status': self.status,
-            'total_students': self.get_total_students(),
-            'attendance_summary': self.get_attendance_summary(),
-            'average_grade': self.get_average_grade(),
-            'schedule': self.get_schedule(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -1,7 +1,8 @@
 from app import db
+from app.models.serialization import SerializerMixin
 from datetime import datetime
 
-class Teacher(db.Model):
+class Teacher(SerializerMixin, db.Model):
     """Teacher model for professional information"""
     __tablename__ = 'teachers'
     
@@ -27,12 +28,31 @@ class Teacher(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_teachers_school_id', 'school_id'),
+    )
+    
     # Relationships
     subjects = db.relationship('Subject', backref='teacher', cascade='all, delete-orphan')
     classes = db.relationship('Class', backref='class_teacher', cascade='all, delete-orphan')
     attendances = db.relationship('Attendance', backref='teacher', cascade='all, delete-orphan')
     grades = db.relationship('Grade', backref='teacher', cascade='all, delete-orphan')
     
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'full_name': 'get_full_name',
+        'subjects': 'get_subjects',
+        'classes': 'get_classes',
+    }
+    EXPANDABLE_FIELDS = {
+        'workload': 'get_workload',
+    }
+    FIELD_LOADERS = {
+        'full_name': ('user',),
+        'subjects': ('subjects',),
+        'classes': ('classes',),
+    }
+    
     def __init__(self, **kwargs):
         if 'teacher_id' not in kwargs:
             kwargs['teacher_id'] = self.generate_teacher_id()
@@ -40,7 +60,8 @@ class Teacher(db.Model):
             kwargs['employee_id'] = self.generate_employee_id()
         super(Teacher, self).__init__(**kwargs)
     
-    def generate_teacher_id(self):
+    @staticmethod
+    def generate_teacher_id():
         """Generate unique teacher ID"""
         import random
         import string
@@ -48,7 +69,8 @@ class Teacher(db.Model):
         random_chars = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
         return f"TCH{year}{random_chars}"
     
-    def generate_employee_id(self):
+    @staticmethod
+    def generate_employee_id():
         """Generate unique employee ID"""
         import random
         import string
@@ -70,10 +92,7 @@ class Teacher(db.Model):
     
     def get_total_students(self):
         """Get total number of students taught by teacher"""
-        total = 0
-        for class_obj in self.classes:
-            total += len(class_obj.students)
-        return total
+        return sum(class_obj.current_strength or 0 for class_obj in self.classes)
     
     def get_workload(self):
         """Calculate teacher's workload (number of classes and subjects)"""
@@ -83,8 +102,8 @@ class Teacher(db.Model):
             'total_students': self.get_total_students()
         }
     
-    def to_dict(self):
-        """Convert teacher to dictionary"""
+    def serialize_columns(self):
+        """Convert teacher to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -100,10 +119,6 @@ class Teacher(db.Model):
             'office_location': self.office_location,
             'office_hours': self.office_hours,
             'status': self.status,
-            'full_name': self.get_full_name(),
-            'subjects': self.get_subjects(),
-            'classes': self.get_classes(),
-            'workload': self.get_workload(),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
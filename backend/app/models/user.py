@@ -1,4 +1,5 @@
 from app import db, bcrypt
+from app.models.serialization import SerializerMixin
 from datetime import datetime
 from enum import Enum
 
@@ -10,7 +11,58 @@ class UserRole(Enum):
     TEACHER = 'teacher'              # Teacher
     STUDENT = 'student'              # Student
 
-class User(db.Model):
+class RoleMixin:
+    """Role and permission checks shared by User and token-based principals"""
+    
+    def is_super_admin(self):
+        """Check if user is super admin"""
+        return self.role == UserRole.SUPER_ADMIN
+    
+    def is_school_admin(self):
+        """Check if user is school admin"""
+        return self.role == UserRole.SCHOOL_ADMIN
+    
+    def is_principal(self):
+        """Check if user is principal"""
+        return self.role == UserRole.PRINCIPAL
+    
+    def is_director(self):
+        """Check if user is director"""
+        return self.role == UserRole.DIRECTOR
+    
+    def is_admin_level(self):
+        """Check if user has admin-level privileges"""
+        return self.role in [UserRole.SUPER_ADMIN, UserRole.SCHOOL_ADMIN, UserRole.PRINCIPAL, UserRole.DIRECTOR]
+    
+    def is_teacher(self):
+        """Check if user is teacher"""
+        return self.role == UserRole.TEACHER
+    
+    def is_student(self):
+        """Check if user is student"""
+        return self.role == UserRole.STUDENT
+    
+    def can_manage_schools(self):
+        """Check if user can manage schools (super admin only)"""
+        return self.role == UserRole.SUPER_ADMIN
+    
+    def can_manage_school(self, school_id):
+        """Check if user can manage a specific school"""
+        if self.role == UserRole.SUPER_ADMIN:
+            return True
+        if self.role in [UserRole.SCHOOL_ADMIN, UserRole.PRINCIPAL, UserRole.DIRECTOR]:
+            return self.school_id == school_id
+        return False
+    
+    def can_manage_users(self, target_user):
+        """Check if user can manage another user"""
+        if self.role == UserRole.SUPER_ADMIN:
+            return True
+        if self.role in [UserRole.SCHOOL_ADMIN, UserRole.PRINCIPAL, UserRole.DIRECTOR]:
+            return self.school_id == target_user.school_id
+        return False
+
+class User(SerializerMixin, RoleMixin, db.Model):
     """User model for authentication and role management"""
     __tablename__ = 'users'
     
@@ -38,6 +90,7 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     email_verified = db.Column(db.Boolean, default=False)
     last_login = db.Column(db.DateTime)
+    token_version = db.Column(db.Integer, nullable=False, default=0)  # Bumped to invalidate issued tokens
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -45,6 +98,14 @@ class User(db.Model):
     student = db.relationship('Student', backref='user', uselist=False, cascade='all, delete-orphan')
     teacher = db.relationship('Teacher', backref='user', uselist=False, cascade='all, delete-orphan')
     
+    # Sparse fieldsets, see SerializerMixin
+    COMPUTED_FIELDS = {
+        'school_name': 'get_school_name',
+    }
+    FIELD_LOADERS = {
+        'school_name': ('school',),
+    }
+    
     def __init__(self, **kwargs):
         if 'password' in kwargs:
             kwargs['password_hash'] = bcrypt.generate_password_hash(kwargs.pop('password')).decode('utf-8')
@@ -62,56 +123,36 @@ class User(db.Model):
         """Get user's full name"""
         return f"{self.first_name} {self.last_name}"
     
-    def is_super_admin(self):
-        """Check if user is super admin"""
-        return self.role == UserRole.SUPER_ADMIN
-    
-    def is_school_admin(self):
-        """Check if user is school admin"""
-        return self.role == UserRole.SCHOOL_ADMIN
-    
-    def is_principal(self):
-        """Check if user is principal"""
-        return self.role == UserRole.PRINCIPAL
-    
-    def is_director(self):
-        """Check if user is director"""
-        return self.role == UserRole.DIRECTOR
-    
-    def is_admin_level(self):
-        """Check if user has admin-level privileges"""
-        return self.role in [UserRole.SUPER_ADMIN, UserRole.SCHOOL_ADMIN, UserRole.PRINCIPAL, UserRole.DIRECTOR]
-    
-    def is_teacher(self):
-        """Check if user is teacher"""
-        return self.role == UserRole.TEACHER
-    
-    def is_student(self):
-        """Check if user is student"""
-        return self.role == UserRole.STUDENT
-    
-    def can_manage_schools(self):
-        """Check if user can manage schools (super admin only)"""
-        return self.role == UserRole.SUPER_ADMIN
-    
-    def can_manage_school(self, school_id):
-        """Check if user can manage a specific school"""
-        if self.role == UserRole.SUPER_ADMIN:
-            return True
-        if self.role in [UserRole.SCHOOL_ADMIN, UserRole.PRINCIPAL, UserRole.DIRECTOR]:
-            return self.school_id == school_id
-        return False
-    
-    def can_manage_users(self, target_user):
-        """Check if user can manage another user"""
-        if self.role == UserRole.SUPER_ADMIN:
-            return True
-        if self.role in [UserRole.SCHOOL_ADMIN, UserRole.PRINCIPAL, UserRole.DIRECTOR]:
-            return self.school_id == target_user.school_id
-        return False
+    def get_school_name(self):
+        """Get the name of the user's school"""
+        return self.school.name if self.school else None
+    
+    @classmethod
+    def list_query(cls, school_id=None, role=None, is_active=None, q=None):
+        """Users matching the admin listing filters, in no particular order"""
+        from .search import search_statement
+        
+        query = cls.query
+        if school_id is not None:
+            query = query.filter(cls.school_id == school_id)
+        if q:
+            query = query.filter(cls.id.in_(search_statement(q, school_id, role).order_by(None)))
+        if role:
+            query = query.filter(cls.role == role)
+        if is_active is not None:
+            query = query.filter(cls.is_active == is_active)
+        return query
+    
+    def get_token_claims(self):
+        """Claims embedded in issued JWTs so requests can be authorized without a database lookup"""
+        return {
+            'role': self.role.value if isinstance(self.role, UserRole) else self.role,
+            'school_id': self.school_id,
+            'tv': self.token_version or 0
+        }
     
-    def to_dict(self):
-        """Convert user to dictionary"""
+    def serialize_columns(self):
+        """Convert user to dictionary (fields that need no extra queries)"""
         return {
             'id': self.id,
             'email': self.email,
@@ -125,7 +166,6 @@ class User(db.Model):
             'gender': self.gender,
             'profile_picture': self.profile_picture,
             'school_id': self.school_id,
-            'school_name': self.school.name if self.school else None,
             'is_active': self.is_active,
             'email_verified': self.email_verified,
             'last_login': self.last_login.isoformat() if self.last_login else None,
@@ -136,3 +176,8 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+# Keyset pagination of a tenant's users (admin user listing)
+db.Index('ix_users_school_id_id', User.school_id, User.id)
+# Role/active filters within a tenant
+db.Index('ix_users_school_role_active', User.school_id, User.role, User.is_active)
+
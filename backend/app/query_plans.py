@@ -0,0 +1,85 @@
+from datetime import date
+from app import db
+
+# Hot tenant-scoped queries whose plans must stay on an index. Each entry is
+# built by the same model method or route helper that serves it, with a sample tenant.
+
+def _hot_queries(school_id=1):
+    from app.models import (
+        Attendance, ClassSubjectGradeStatistics, Grade, StudentSubjectGradeStatistics, User, Student
+    )
+    from app.models.helpers import keyset_page
+    from app.models.search import search_statement
+    from app.models.user import UserRole
+    from app.routes.exports import EXPORTS, export_statement
+
+    period = {'start_date': date(2024, 1, 1), 'end_date': date(2024, 12, 31)}
+    queries = {
+        # Attendance reports read the daily rollup; only per-student figures read raw attendance
+        'attendance report by school and date range': Attendance.summary_statement(school_id=school_id, **period),
+        'attendance report per class': Attendance.summary_statement('class', school_id=school_id, **period),
+        'attendance report per month': Attendance.summary_statement('month', school_id=school_id, **period),
+        'attendance by student': Attendance.summary_statement('student', student_id=[1, 2, 3]),
+        'grades report by school and date range': Grade.summary_statement(school_id=school_id, **period),
+        'grades report per subject': Grade.summary_statement('subject', school_id=school_id, **period),
+        'grade statistics by class and subject': ClassSubjectGradeStatistics.totals_statement(class_id=1, subject_id=1),
+        'grade statistics by subject': ClassSubjectGradeStatistics.totals_statement(subject_id=1),
+        'grade statistics by student and subject': StudentSubjectGradeStatistics.totals_statement(student_id=1, subject_id=1),
+        'grade statistics per student': StudentSubjectGradeStatistics.grouped_totals_statement('student_id', [1, 2, 3]),
+        'user search by school and role': search_statement('jo smi', school_id, UserRole.STUDENT),
+        'users by school, role and status': keyset_page(
+            User.list_query(school_id, role=UserRole.TEACHER, is_active=True), User.id, limit=50
+        ).statement,
+        'users keyset page by school': keyset_page(User.list_query(school_id), User.id, 1, 50).statement,
+        'students keyset page by school and class': keyset_page(
+            Student.list_query(school_id, class_id=1), Student.id, 1, 25
+        ).statement,
+    }
+    for entity in EXPORTS:
+        queries[f'{entity} export by school and date range'] = export_statement(entity, school_id, **period)
+    return queries
+
+def _is_sqlite_full_scan(detail):
+    # "SCAN <table>" without an index is a full table scan; "SEARCH"/"SCAN ... USING INDEX" are not.
+    # Virtual tables report "VIRTUAL TABLE INDEX <num>:<idxStr>"; FTS5 puts M in idxStr for a MATCH
+    if not detail.startswith('SCAN ') or ' USING ' in detail:
+        return False
+    if ' VIRTUAL TABLE INDEX ' in detail:
+        return 'M' not in detail.split(' VIRTUAL TABLE INDEX ', 1)[1].partition(':')[2]
+    return True
+
+def _sqlite_full_scans(sql):
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return [row[-1] for row in rows if _is_sqlite_full_scan(row[-1])]
+
+def _postgresql_full_scans(sql):
+    # Small test tables make sequential scans look cheap; ask whether an index path exists at all
+    db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+    plan = db.session.execute(db.text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+    scans = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            scans.append(f"Seq Scan on {node.get('Relation Name')}")
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+def check_query_plans(school_id=1):
+    """EXPLAIN every hot query; returns {name: [full scans]} (empty lists mean the plan uses indexes).
+
+    Returns None when the current database backend is not supported.
+    """
+    bind = db.session.get_bind()
+    checkers = {'sqlite': _sqlite_full_scans, 'postgresql': _postgresql_full_scans}
+    checker = checkers.get(bind.dialect.name)
+    if checker is None:
+        return None
+    results = {}
+    try:
+        for name, statement in _hot_queries(school_id).items():
+            sql = statement.compile(dialect=bind.dialect, compile_kwargs={'literal_binds': True})
+            results[name] = checker(str(sql))
+    finally:
+        db.session.rollback()
+    return results
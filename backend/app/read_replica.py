@@ -0,0 +1,88 @@
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Read/write splitting for db.session. When DATABASE_READ_URL is set, SELECTs
+# issued while serving GET/HEAD requests go to the replica and everything
+# else (flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE, CLI and
+# background work) goes to the primary. Once a session has written it stays
+# on the primary, and a user who committed a write is pinned to the primary
+# for DATABASE_READ_YOUR_WRITES_WINDOW seconds so their next reads never see
+# replica lag. The session itself is the normal request-scoped db.session,
+# so objects stay attached until the request ends.
+
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+def _pin_key(identity):
+    return f'db:primary_pin:{identity}'
+
+def _current_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # Raised until jwt_required has verified the token, e.g. on public routes
+        return None
+
+def is_pinned_to_primary(identity=None):
+    """True while a user's recent write must be read back from the primary"""
+    identity = identity if identity is not None else _current_identity()
+    if identity is None or current_app.read_engine is None:
+        return False
+    return current_app.cache_layer.get(_pin_key(identity)) is not None
+
+def pin_to_primary(identity=None):
+    """Send a user's reads to the primary for the read-your-writes window"""
+    identity = identity if identity is not None else _current_identity()
+    window = current_app.config.get('DATABASE_READ_YOUR_WRITES_WINDOW', 5)
+    if identity is not None and window:
+        current_app.cache_layer.set(_pin_key(identity), b'1', window)
+
+def _replica_allowed():
+    """Whether the current request may read from the replica, decided once per request"""
+    if 'read_from_replica' in g:
+        return g.read_from_replica
+    if request.method not in READ_METHODS:
+        g.read_from_replica = False
+        return False
+    identity = _current_identity()
+    if identity is None:
+        # Unauthenticated reads cannot have written anything; decide again once the user is known
+        return True
+    g.read_from_replica = not is_pinned_to_primary(identity)
+    return g.read_from_replica
+
+def _is_read(clause):
+    # session.connection() without a statement is how bulk writers get a connection
+    if clause is None or clause.is_dml:
+        return False
+    return getattr(clause, '_for_update_arg', None) is None
+
+class RoutingSession(Session):
+    """db.session that routes request reads to the read replica when one is configured"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('wrote'):
+            if clause is not None and clause.is_dml:
+                self.info['wrote'] = True
+            elif (has_request_context() and current_app.read_engine is not None
+                  and _is_read(clause) and _replica_allowed()):
+                return current_app.read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_write(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_writer(session):
+    wrote = session.info.pop('wrote', False)
+    if not has_request_context() or current_app.read_engine is None:
+        return
+    if wrote or request.method not in READ_METHODS:
+        pin_to_primary()
+        g.read_from_replica = False
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_write(session):
+    session.info.pop('wrote', None)
@@ -0,0 +1,152 @@
+from flask import current_app
+from app.conditional import make_etag
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, json is always available
+    orjson = None
+    import json
+
+# Cached responses per entity, stored in the two-tier cache (app.cache_layer).
+# Keys embed a per-tenant generation counter, so invalidating a tenant's
+# responses is a single INCR instead of a keyspace scan;
+# entries written under an old generation are never read again and expire on their TTL.
+# Without Redis each worker has its own counters and never sees another
+# worker's bumps, so generations cannot back ETags and cached responses are
+# kept no longer than CACHE_L1_TTL.
+GLOBAL_SCOPE = 'all'
+
+# Which cached entities a write to each table makes stale
+_TABLE_ENTITIES = {
+    'students': ('students',),
+    'users': ('users', 'students'),
+    'classes': ('students', 'reports'),
+    'subjects': ('reports',),
+    'attendance': ('reports', 'students'),
+    'grades': ('reports', 'students'),
+    'schools': ('schools', 'reports'),
+}
+
+# Columns whose updates leave cached responses current. last_login is shown
+# in user lists but is written on every login, and invalidating lists and
+# ETags per login would keep them cold; it may lag until the next real edit.
+_UNTRACKED_COLUMNS = {
+    'users': {'last_login', 'password_hash', 'token_version'},
+}
+
+def _cache():
+    return current_app.cache_layer
+
+def _json_default(value):
+    # Match orjson for dates and times
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def dumps(value):
+    """Serialize a response payload to compact bytes"""
+    if orjson:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+def loads(data):
+    """Deserialize a payload written by dumps()"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _scope(school_id):
+    return GLOBAL_SCOPE if school_id is None else school_id
+
+def generation_key(entity, school_id):
+    return f'{entity}:gen:s:{_scope(school_id)}'
+
+def get_generation(entity, school_id):
+    """Current generation of an entity's cached responses for a tenant"""
+    return _cache().get_counter(generation_key(entity, school_id))
+
+def bump_generation(entity, school_id):
+    """Invalidate every cached list of an entity for a tenant (and the cross-tenant lists)"""
+    cache = _cache()
+    cache.incr(generation_key(entity, school_id))
+    if school_id is not None:
+        cache.incr(generation_key(entity, None))
+
+def response_cache_key(entity, school_id, view='list', **params):
+    """Build the cache key for one response under the tenant's current generation"""
+    items = '&'.join(f'{k}={v}' for k, v in sorted(params.items()) if v is not None)
+    return f'{entity}:{view}:s:{_scope(school_id)}:g:{get_generation(entity, school_id)}:{items}'
+
+def generations_shared():
+    """Whether generation counters are shared by every worker (only with Redis)"""
+    return _cache().distributed
+
+def response_etag(entity, view, school_id, **params):
+    """ETag for a cached response: changes whenever the tenant's generation or the parameters do.
+
+    None without Redis, where a write on another worker would not change it.
+    """
+    if not generations_shared():
+        return None
+    return make_etag(response_cache_key(entity, school_id, view, **params))
+
+def get_cached_response(key):
+    data = _cache().get(key)
+    return loads(data) if data is not None else None
+
+def set_cached_response(key, payload, ttl):
+    _cache().set(key, dumps(payload), ttl)
+
+def cached_response(entity, view, school_id, compute, ttl=30, **params):
+    """Return a cached payload; on a miss only one concurrent caller computes it"""
+    cache = _cache()
+    if not cache.distributed:
+        ttl = min(ttl, cache.l1_ttl)
+    key = response_cache_key(entity, school_id, view, **params)
+    return loads(cache.get_or_set(key, lambda: dumps(compute()), ttl))
+
+def cached_list_response(entity, school_id, compute, ttl=30, **params):
+    """Return a cached list payload, computing and storing it on a miss"""
+    return cached_response(entity, 'list', school_id, compute, ttl, **params)
+
+def mark_entity_changed(session, entity, school_id):
+    """Bump an entity's generation for a tenant when the session commits"""
+    session.info.setdefault('stale_list_caches', set()).add((entity, school_id))
+
+def mark_table_changed(session, table, school_id):
+    """Record a bulk write that bypassed the ORM so the affected caches are invalidated on commit"""
+    for entity in _TABLE_ENTITIES.get(table, ()):
+        mark_entity_changed(session, entity, school_id)
+
+def _has_tracked_changes(obj):
+    untracked = _UNTRACKED_COLUMNS.get(obj.__tablename__, ())
+    return any(attr.key not in untracked and attr.history.has_changes() for attr in inspect(obj).attrs)
+
+@event.listens_for(Session, 'after_flush')
+def _note_list_changes(session, flush_context):
+    stale = session.info.setdefault('stale_list_caches', set())
+    dirty = [obj for obj in session.dirty if getattr(obj, '__tablename__', None) in _TABLE_ENTITIES and _has_tracked_changes(obj)]
+    for obj in list(session.new) + list(session.deleted) + dirty:
+        table = getattr(obj, '__tablename__', None)
+        for entity in _TABLE_ENTITIES.get(table, ()):
+            school_id = obj.id if table == 'schools' else getattr(obj, 'school_id', None)
+            stale.add((entity, school_id))
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_list_caches(session):
+    stale = session.info.pop('stale_list_caches', None)
+    if not stale:
+        return
+    for entity, school_id in stale:
+        try:
+            bump_generation(entity, school_id)
+        except Exception:
+            # The committed write stays invisible to cached readers until their TTL runs out
+            _cache().metrics.incr('l2_errors')
+            current_app.logger.exception('Could not invalidate cached %s responses for school %s', entity, school_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_list_changes(session):
+    session.info.pop('stale_list_caches', None)
@@ -0,0 +1,92 @@
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import delete, event, exists, select
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+
+# With Redis, the denylist and each user's minimum token version live in the
+# shared cache (app.cache_layer), so checking a token never touches the
+# database. Without Redis no store is shared by every worker, so the database
+# is the denylist: logged-out jtis go to revoked_tokens and the minimum token
+# version is users.token_version itself.
+
+def _cache():
+    return current_app.cache_layer
+
+def _revoked_key(jti):
+    return f'auth:revoked:{jti}'
+
+def _token_version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+def revoke_token(jwt_payload):
+    """Deny a single token (by jti) until it would have expired anyway.
+
+    Without Redis the denial is added to db.session and the caller commits.
+    """
+    expires = jwt_payload.get('exp', time.time() + 3600)
+    cache = _cache()
+    if cache.distributed:
+        cache.set(_revoked_key(jwt_payload['jti']), b'1', max(1, int(expires - time.time())))
+        return
+    # Rows past their token's exp can never match again
+    db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+    db.session.merge(RevokedToken(jti=jwt_payload['jti'], user_id=int(jwt_payload['sub']),
+                                  expires_at=datetime.utcfromtimestamp(expires)))
+
+def revoke_user_tokens(user):
+    """Invalidate every token issued to a user so far (role change, password change, deactivation, deletion).
+
+    The new minimum version is published once the session commits, so a
+    failed commit does not lock the user out.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    session = object_session(user) or db.session
+    session.info.setdefault('revoked_token_versions', {})[user.id] = user.token_version
+
+@event.listens_for(Session, 'after_commit')
+def _publish_revocations(session):
+    versions = session.info.pop('revoked_token_versions', {})
+    if not versions or not _cache().distributed:
+        # Without Redis the committed users.token_version is what tokens are checked against
+        return
+    ttl = int(current_app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+    for user_id, version in versions.items():
+        _cache().set(_token_version_key(user_id), str(version).encode(), ttl, broadcast=True)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_revocations(session):
+    session.info.pop('revoked_token_versions', None)
+
+def _minimum_token_version(user_id):
+    value = _cache().get(_token_version_key(user_id))
+    return int(value) if value is not None else None
+
+def _is_revoked_in_database(jwt_payload):
+    statement = (
+        select(User.token_version, exists().where(RevokedToken.jti == jwt_payload['jti']))
+        .where(User.id == int(jwt_payload['sub']))
+    )
+    # A connection of its own: the request's session must not begin its
+    # transaction before the token (and so the tenant) is known
+    with db.engine.connect() as connection:
+        row = connection.execute(statement).first()
+    if row is None:
+        # The user has been deleted
+        return True
+    token_version, jti_revoked = row
+    return bool(jti_revoked) or jwt_payload.get('tv', 0) < (token_version or 0)
+
+def is_token_revoked(jwt_payload):
+    """Check a decoded token against the denylist and the user's minimum token version"""
+    if not _cache().distributed:
+        return _is_revoked_in_database(jwt_payload)
+    if _cache().get(_revoked_key(jwt_payload['jti'])) is not None:
+        return True
+    minimum_version = _minimum_token_version(jwt_payload.get('sub'))
+    if minimum_version is None:
+        return False
+    return jwt_payload.get('tv', 0) < minimum_version
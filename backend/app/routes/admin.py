@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models import User, School, Student, Teacher, Class, Subject, Attendance, Grade
-from app.decorators import super_admin_required, admin_required, can_manage_school_required
+from app.models.helpers import estimate_count, keyset_page
+from app.models.user import UserRole
+from app.models.serialization import FieldSelection
+from app.response_cache import cached_list_response, cached_response, response_etag
+from app.conditional import conditional_response
+from app.dashboard import get_dashboard_snapshot
+from app.decorators import super_admin_required, admin_required, can_manage_school_required, can_manage_users_required, get_current_principal
+from app.revocation import revoke_user_tokens
+from app.user_import import parse_import_payload, import_users
 from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
@@ -12,28 +20,11 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 @admin_required
 def admin_dashboard():
     """Get admin dashboard statistics"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_principal()
     
     if current_user.is_super_admin():
-        # Super admin sees all schools data
-        schools = School.query.all()
-        total_schools = len(schools)
-        total_users = User.query.count()
-        total_students = Student.query.count()
-        total_teachers = Teacher.query.count()
-        total_classes = Class.query.count()
-        total_subjects = Subject.query.count()
-        
-        dashboard_data = {
-            'total_schools': total_schools,
-            'total_users': total_users,
-            'total_students': total_students,
-            'total_teachers': total_teachers,
-            'total_classes': total_classes,
-            'total_subjects': total_subjects,
-            'schools': [school.to_dict() for school in schools]
-        }
+        # Super admin sees all schools data from the precomputed snapshot
+        dashboard_data = get_dashboard_snapshot()
     else:
         # School admin/principal/director sees only their school data
         if not current_user.school_id:
@@ -57,24 +48,52 @@ def admin_dashboard():
 @jwt_required()
 @admin_required
 def get_all_users():
-    """Get all users (filtered by school for non-super admins)"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    """List users with keyset pagination (filtered by school for non-super admins)"""
+    current_user = get_current_principal()
+    selection = FieldSelection.from_request()
     
     if current_user.is_super_admin():
-        # Super admin sees all users
-        users = User.query.all()
+        # Super admin sees all users, optionally narrowed to one school
+        school_id = request.args.get('school_id', type=int)
     else:
         # School admin/principal/director sees only their school users
         if not current_user.school_id:
             return jsonify({'success': False, 'message': 'User not assigned to any school'}), 404
+        school_id = current_user.school_id
+    
+    role = request.args.get('role')
+    if role:
+        try:
+            role = UserRole(role.lower())
+        except ValueError:
+            return jsonify({'success': False, 'message': f"Invalid role '{role}'"}), 400
+    is_active = request.args.get('is_active')
+    if is_active is not None:
+        is_active = is_active.lower() in ['true', '1', 'yes']
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    after_id = request.args.get('after_id', type=int)
+    include_total = request.args.get('include_total', 'false').lower() in ['true', '1', 'yes']
+    q = request.args.get('q', '').strip() or None
+    
+    def compute():
+        query = User.list_query(school_id, role=role, is_active=is_active, q=q)
+        payload = {'success': True}
+        if include_total:
+            payload['total'], payload['total_is_exact'] = estimate_count(query)
         
-        users = User.query.filter_by(school_id=current_user.school_id).all()
+        rows = keyset_page(query.options(*User.loader_options(selection)), User.id, after_id, limit).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        payload['users'] = [user.to_dict(selection) for user in rows]
+        payload['next_after_id'] = rows[-1].id if has_more else None
+        return payload
     
-    return jsonify({
-        'success': True,
-        'users': [user.to_dict() for user in users]
-    }), 200
+    params = dict(role=role.value if role else None, is_active=is_active, q=q, limit=limit, after_id=after_id,
+                  include_total=include_total, fields=request.args.get('fields'), expand=request.args.get('expand'))
+    return conditional_response(
+        lambda: cached_list_response('users', school_id, compute, **params),
+        etag=response_etag('users', 'list', school_id, **params)
+    )
 
 @admin_bp.route('/users/<int:user_id>', methods=['PUT'])
 @jwt_required()
@@ -97,12 +116,15 @@ def update_user(user_id):
         if 'address' in data:
             user.address = data['address']
         if 'is_active' in data:
+            if user.is_active and not data['is_active']:
+                revoke_user_tokens(user)
             user.is_active = data['is_active']
         if 'role' in data:
             # Only super admin can change roles
-            current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = get_current_principal()
             if current_user.is_super_admin():
+                if user.get_token_claims()['role'] != data['role']:
+                    revoke_user_tokens(user)
                 user.role = data['role']
             else:
                 return jsonify({'success': False, 'message': 'Only Super Admin can change user roles'}), 403
@@ -127,6 +149,8 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     
     try:
+        # Tokens already issued to the user must stop working with the account
+        revoke_user_tokens(user)
         db.session.delete(user)
         db.session.commit()
         
@@ -144,8 +168,7 @@ def delete_user(user_id):
 @can_manage_school_required
 def create_school_user(school_id):
     """Create a new user in a school"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_principal()
     data = request.get_json()
     
     required_fields = ['email', 'username', 'password', 'first_name', 'last_name', 'role']
@@ -198,6 +221,31 @@ def create_school_user(school_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@admin_bp.route('/schools/<int:school_id>/users/import', methods=['POST'])
+@jwt_required()
+@can_manage_school_required
+def import_school_users(school_id):
+    """Bulk-create users with their student/teacher profiles from a CSV or JSON batch"""
+    School.query.get_or_404(school_id)
+    try:
+        rows = parse_import_payload(request)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'CSV file must be UTF-8 encoded'}), 400
+    
+    max_rows = current_app.config.get('IMPORT_MAX_ROWS', 10000)
+    if not rows:
+        return jsonify({'success': False, 'message': 'No rows to import'}), 400
+    if len(rows) > max_rows:
+        return jsonify({'success': False, 'message': f'At most {max_rows} rows can be imported at once'}), 400
+    
+    report = import_users(rows, school_id)
+    return jsonify({
+        'success': report['error_count'] == 0,
+        'report': report
+    }), 201 if report['created_count'] else 400
+
 @admin_bp.route('/system/health', methods=['GET'])
 @jwt_required()
 @super_admin_required
@@ -205,7 +253,7 @@ def system_health():
     """Get system health information (super admin only)"""
     try:
         # Database connection test
-        db.session.execute('SELECT 1')
+        db.session.execute(db.text('SELECT 1'))
         
         # Get system statistics
         total_schools = School.query.count()
@@ -222,6 +270,8 @@ def system_health():
                 'total_students': total_students,
                 'total_teachers': total_teachers
             },
+            'cache': current_app.cache_layer.stats(),
+            'database_pools': {name: metrics.snapshot() for name, metrics in current_app.pool_metrics.items()},
             'timestamp': datetime.utcnow().isoformat()
         }
         
@@ -240,69 +290,138 @@ def system_health():
             }
         }), 500
 
+REPORT_BREAKDOWNS = ('class', 'subject', 'month')
+
+def parse_report_period():
+    """Parse start_date/end_date query parameters (YYYY-MM-DD)"""
+    period = {}
+    for field in ('start_date', 'end_date'):
+        value = request.args.get(field)
+        if value:
+            try:
+                period[field] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'{field} must be in YYYY-MM-DD format')
+        else:
+            period[field] = None
+    if period['start_date'] and period['end_date'] and period['start_date'] > period['end_date']:
+        raise ValueError('start_date must be on or before end_date')
+    return period
+
+def parse_report_breakdowns():
+    """Parse the breakdown query parameter (comma separated, defaults to all)"""
+    value = request.args.get('breakdown')
+    if value is None:
+        return list(REPORT_BREAKDOWNS)
+    breakdowns = [item.strip() for item in value.split(',') if item.strip()]
+    for item in breakdowns:
+        if item not in REPORT_BREAKDOWNS:
+            raise ValueError(f"Invalid breakdown '{item}'")
+    return breakdowns
+
+def describe_period(period):
+    """Human readable description of a report period"""
+    if not period['start_date'] and not period['end_date']:
+        return 'All Time'
+    start = period['start_date'].isoformat() if period['start_date'] else 'Beginning'
+    end = period['end_date'].isoformat() if period['end_date'] else 'Today'
+    return f'{start} to {end}'
+
+def build_breakdowns(model, school_id, period, breakdowns):
+    """Build per-class/per-subject/per-month report breakdowns with one grouped query each"""
+    result = {}
+    if 'class' in breakdowns:
+        summaries = model.summarize(group_by='class', school_id=school_id, **period)
+        names = {c.id: c.get_full_name() for c in Class.query.filter(Class.id.in_(summaries.keys()))} if summaries else {}
+        result['by_class'] = [
+            dict(class_id=class_id, class_name=names.get(class_id, 'Unknown'), **summary)
+            for class_id, summary in summaries.items()
+        ]
+    if 'subject' in breakdowns:
+        summaries = model.summarize(group_by='subject', school_id=school_id, **period)
+        names = dict(db.session.query(Subject.id, Subject.name).filter(Subject.id.in_(summaries.keys()))) if summaries else {}
+        result['by_subject'] = [
+            dict(subject_id=subject_id, subject_name=names.get(subject_id, 'Unknown'), **summary)
+            for subject_id, summary in summaries.items()
+        ]
+    if 'month' in breakdowns:
+        summaries = model.summarize(group_by='month', school_id=school_id, **period)
+        result['by_month'] = [dict(month=month, **summary) for month, summary in sorted(summaries.items())]
+    return result
+
 @admin_bp.route('/schools/<int:school_id>/reports/attendance', methods=['GET'])
 @jwt_required()
 @can_manage_school_required
 def attendance_report(school_id):
     """Get attendance report for a school"""
-    school = School.query.get_or_404(school_id)
-    
-    # Get attendance data for the school
-    attendances = Attendance.query.filter_by(school_id=school_id).all()
-    
-    # Calculate statistics
-    total_records = len(attendances)
-    present_count = sum(1 for a in attendances if a.status == 'present')
-    absent_count = sum(1 for a in attendances if a.status == 'absent')
-    late_count = sum(1 for a in attendances if a.status == 'late')
-    
-    attendance_rate = (present_count / total_records * 100) if total_records > 0 else 0
+    try:
+        period = parse_report_period()
+        breakdowns = parse_report_breakdowns()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    report_data = {
-        'school_name': school.name,
-        'total_records': total_records,
-        'present_count': present_count,
-        'absent_count': absent_count,
-        'late_count': late_count,
-        'attendance_rate': round(attendance_rate, 2),
-        'period': 'All Time'
-    }
+    def compute():
+        school = School.query.get_or_404(school_id)
+        
+        # Aggregate in the database rather than loading every attendance row
+        summary = Attendance.summarize(school_id=school_id, **period)
+        
+        report_data = {
+            'school_name': school.name,
+            'total_records': summary['total_records'],
+            'present_count': summary['present'],
+            'absent_count': summary['absent'],
+            'late_count': summary['late'],
+            'excused_count': summary['excused'],
+            'attendance_rate': summary['attendance_percentage'],
+            'period': describe_period(period),
+            'start_date': period['start_date'].isoformat() if period['start_date'] else None,
+            'end_date': period['end_date'].isoformat() if period['end_date'] else None
+        }
+        report_data.update(build_breakdowns(Attendance, school_id, period, breakdowns))
+        return report_data
     
-    return jsonify({
-        'success': True,
-        'report': report_data
-    }), 200
+    # Heavy aggregate: cached briefly, and computed once when many admins open it at the same time
+    params = dict(start_date=request.args.get('start_date'), end_date=request.args.get('end_date'),
+                  breakdown=','.join(breakdowns))
+    return conditional_response(
+        lambda: {'success': True, 'report': cached_response('reports', 'attendance', school_id, compute, ttl=60, **params)},
+        etag=response_etag('reports', 'attendance', school_id, **params)
+    )
 
 @admin_bp.route('/schools/<int:school_id>/reports/grades', methods=['GET'])
 @jwt_required()
 @can_manage_school_required
 def grades_report(school_id):
     """Get grades report for a school"""
-    school = School.query.get_or_404(school_id)
-    
-    # Get grades data for the school
-    grades = Grade.query.filter_by(school_id=school_id).all()
-    
-    # Calculate statistics
-    total_grades = len(grades)
-    if total_grades > 0:
-        avg_score = sum(float(g.score) for g in grades) / total_grades
-        passing_grades = sum(1 for g in grades if g.is_passing())
-        passing_rate = (passing_grades / total_grades) * 100
-    else:
-        avg_score = 0
-        passing_rate = 0
+    try:
+        period = parse_report_period()
+        breakdowns = parse_report_breakdowns()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    report_data = {
-        'school_name': school.name,
-        'total_grades': total_grades,
-        'average_score': round(avg_score, 2),
-        'passing_rate': round(passing_rate, 2),
-        'period': 'All Time'
-    }
+    def compute():
+        school = School.query.get_or_404(school_id)
+        
+        # Aggregate in the database rather than loading every grade row
+        summary = Grade.summarize(school_id=school_id, **period)
+        
+        report_data = {
+            'school_name': school.name,
+            'total_grades': summary['total_grades'],
+            'average_score': summary['average_score'],
+            'passing_rate': summary['passing_rate'],
+            'period': describe_period(period),
+            'start_date': period['start_date'].isoformat() if period['start_date'] else None,
+            'end_date': period['end_date'].isoformat() if period['end_date'] else None
+        }
+        report_data.update(build_breakdowns(Grade, school_id, period, breakdowns))
+        return report_data
     
-    return jsonify({
-        'success': True,
-        'report': report_data
-    }), 200
-
+    # Cached and single-flighted like the attendance report
+    params = dict(start_date=request.args.get('start_date'), end_date=request.args.get('end_date'),
+                  breakdown=','.join(breakdowns))
+    return conditional_response(
+        lambda: {'success': True, 'report': cached_response('reports', 'grades', school_id, compute, ttl=60, **params)},
+        etag=response_etag('reports', 'grades', school_id, **params)
+    )
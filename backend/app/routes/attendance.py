@@ -0,0 +1,89 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from datetime import datetime
+from app import db
+from app.models import Attendance
+from app.models.attendance import ATTENDANCE_STATUSES
+from app.decorators import teacher_required, get_current_principal
+from app.validation import is_id, resolve_class_entry, unenrolled_student_errors
+from app.response_cache import mark_table_changed
+
+attendance_bp = Blueprint('attendance', __name__)
+
+def parse_time(value, field):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%H:%M').time()
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be in HH:MM format')
+
+@attendance_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@teacher_required
+def mark_class_attendance():
+    """Mark attendance for a whole class register (class, subject, date) in one request"""
+    current_user = get_current_principal()
+    data = request.get_json() or {}
+
+    for field in ('class_id', 'subject_id', 'date', 'records'):
+        if not data.get(field):
+            return jsonify({'success': False, 'message': f'{field} is required'}), 400
+    try:
+        date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'date must be in YYYY-MM-DD format'}), 400
+
+    class_obj, subject, teacher_id, error = resolve_class_entry(current_user, data)
+    if error:
+        return error
+
+    if not isinstance(data['records'], list):
+        return jsonify({'success': False, 'message': 'records must be a list'}), 400
+
+    # Validate the whole register before writing anything
+    records = []
+    errors = []
+    seen = set()
+    for index, record in enumerate(data['records']):
+        student_id = record.get('student_id') if isinstance(record, dict) else None
+        status = record.get('status') if isinstance(record, dict) else None
+        status = status.lower() if isinstance(status, str) else ''
+        if not student_id:
+            errors.append({'index': index, 'message': 'student_id is required'})
+            continue
+        if not is_id(student_id):
+            errors.append({'index': index, 'message': 'student_id must be an integer'})
+            continue
+        if status not in ATTENDANCE_STATUSES:
+            errors.append({'index': index, 'student_id': student_id, 'message': f"Invalid status '{status}'"})
+            continue
+        if student_id in seen:
+            errors.append({'index': index, 'student_id': student_id, 'message': 'Duplicate student in register'})
+            continue
+        try:
+            times = {field: parse_time(record.get(field), field) for field in ('time_in', 'time_out')}
+        except ValueError as e:
+            errors.append({'index': index, 'student_id': student_id, 'message': str(e)})
+            continue
+        seen.add(student_id)
+        records.append(dict(student_id=student_id, status=status, remarks=record.get('remarks'), **times))
+
+    errors.extend(unenrolled_student_errors(class_obj, seen))
+    if errors:
+        return jsonify({'success': False, 'message': 'Register contains invalid records', 'errors': errors}), 400
+
+    try:
+        summary = Attendance.bulk_upsert(class_obj.school_id, class_obj.id, subject.id, date, teacher_id, records)
+        mark_table_changed(db.session, 'attendance', class_obj.school_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+    return jsonify({
+        'success': True,
+        'message': f'Attendance recorded for {len(records)} students',
+        'recorded': len(records),
+        'summary': Attendance.build_summary(summary['total_records'], summary)
+    }), 200
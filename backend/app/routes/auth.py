@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt, get_jwt_identity
+from flask_jwt_extended.exceptions import RevokedTokenError
 from app import db, bcrypt
 from app.models import User, Student, Teacher
 from app.models.user import UserRole
+from app.decorators import get_current_user
+from app.revocation import revoke_token, revoke_user_tokens
+from app.conditional import conditional_response, make_etag
 from datetime import datetime
 import re
 
@@ -25,6 +29,14 @@ def validate_password(password):
         return False, "Password must contain at least one number"
     return True, "Password is valid"
 
+def issue_tokens(user):
+    """Create access and refresh tokens carrying the user's role, school and token version"""
+    claims = user.get_token_claims()
+    return (
+        create_access_token(identity=user.id, additional_claims=claims),
+        create_refresh_token(identity=user.id, additional_claims=claims)
+    )
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """User registration endpoint"""
@@ -127,8 +139,7 @@ def register():
         db.session.commit()
         
         # Generate tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = issue_tokens(user)
         
         return jsonify({
             'message': 'User registered successfully',
@@ -164,8 +175,7 @@ def login():
         db.session.commit()
         
         # Generate tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = issue_tokens(user)
         
         return jsonify({
             'message': 'Login successful',
@@ -182,8 +192,11 @@ def login():
 def refresh():
     """Refresh access token endpoint"""
     try:
-        current_user_id = get_jwt_identity()
-        new_access_token = create_access_token(identity=current_user_id)
+        # Reload the user so a refreshed token carries the current role and school
+        user = get_current_user()
+        if not user or not user.is_active:
+            return jsonify({'error': 'User not found or deactivated'}), 401
+        new_access_token = create_access_token(identity=user.id, additional_claims=user.get_token_claims())
         
         return jsonify({
             'access_token': new_access_token
@@ -197,15 +210,14 @@ def refresh():
 def get_profile():
     """Get current user profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({
+        return conditional_response(lambda: {
             'user': user.to_dict()
-        }), 200
+        }, etag=make_etag('profile', user.id, user.updated_at, user.school.updated_at if user.school else None), last_modified=user.updated_at)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -215,8 +227,7 @@ def get_profile():
 def update_profile():
     """Update current user profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -235,14 +246,19 @@ def update_profile():
             if not is_valid_password:
                 return jsonify({'error': password_message}), 400
             user.set_password(data['password'])
+            revoke_user_tokens(user)
         
         user.updated_at = datetime.utcnow()
         db.session.commit()
         
-        return jsonify({
+        response = {
             'message': 'Profile updated successfully',
             'user': user.to_dict()
-        }), 200
+        }
+        if data.get('password'):
+            # Tokens issued before the password change are no longer accepted
+            response['access_token'], response['refresh_token'] = issue_tokens(user)
+        return jsonify(response), 200
         
     except Exception as e:
         db.session.rollback()
@@ -251,16 +267,46 @@ def update_profile():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """User logout endpoint (client should discard tokens)"""
-    return jsonify({'message': 'Logout successful'}), 200
+    """User logout endpoint.
+
+    With the session's refresh_token in the body, revokes that token and the
+    presented access token. Without it, revokes every token issued to the
+    user so far (all sessions), since the refresh token cannot be identified.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get('refresh_token')
+        if refresh_token:
+            try:
+                refresh_payload = decode_token(refresh_token, allow_expired=True)
+            except RevokedTokenError:
+                refresh_payload = None
+            except Exception:
+                return jsonify({'error': 'Invalid refresh token'}), 400
+            if refresh_payload is not None:
+                if refresh_payload.get('type') != 'refresh' or str(refresh_payload.get('sub')) != str(get_jwt_identity()):
+                    return jsonify({'error': 'Invalid refresh token'}), 400
+                revoke_token(refresh_payload)
+            revoke_token(get_jwt())
+        else:
+            user = get_current_user()
+            if user:
+                revoke_user_tokens(user)
+            else:
+                revoke_token(get_jwt())
+        db.session.commit()
+        return jsonify({'message': 'Logout successful'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/change-password', methods=['POST'])
 @jwt_required()
 def change_password():
     """Change user password"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -281,10 +327,18 @@ def change_password():
         
         # Set new password
         user.set_password(data['new_password'])
+        revoke_user_tokens(user)
         user.updated_at = datetime.utcnow()
         db.session.commit()
         
-        return jsonify({'message': 'Password changed successfully'}), 200
+        # Tokens issued before the password change are no longer accepted
+        access_token, refresh_token = issue_tokens(user)
+        
+        return jsonify({
+            'message': 'Password changed successfully',
+            'access_token': access_token,
+            'refresh_token': refresh_token
+        }), 200
         
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,25 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from app.decorators import get_current_principal
+
+autocomplete_bp = Blueprint('autocomplete', __name__)
+
+AUTOCOMPLETE_TYPES = ('student', 'teacher')
+
+@autocomplete_bp.route('/', methods=['GET'])
+@jwt_required()
+def autocomplete():
+    """Prefix matches on student names, student codes and teacher codes from the in-memory index"""
+    user = get_current_principal()
+    school_id = request.args.get('school_id', type=int) if user.is_super_admin() else user.school_id
+    if not school_id:
+        return jsonify({'success': False, 'message': 'school_id required'}), 400
+
+    types = request.args.get('type')
+    kinds = set(types.split(',')) if types else None
+    if kinds and not kinds <= set(AUTOCOMPLETE_TYPES):
+        return jsonify({'success': False, 'message': 'type must be student or teacher'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+    matches = current_app.autocomplete.search(school_id, request.args.get('q', ''), limit, kinds)
+    return jsonify({'success': True, 'items': matches}), 200
@@ -0,0 +1,104 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required
+from app import db
+from app.models import User, Student, Attendance, Grade
+from app.decorators import can_manage_school_required
+from app.response_cache import dumps
+
+exports_bp = Blueprint('exports', __name__)
+
+# Rows fetched per round trip; the server-side cursor keeps memory flat regardless of table size
+EXPORT_BATCH_SIZE = 1000
+
+# Exportable entities: model, date column for start_date/end_date filters, columns never exported
+EXPORTS = {
+    'students': (Student, 'admission_date', ()),
+    'users': (User, 'created_at', ('password_hash', 'token_version')),
+    'attendance': (Attendance, 'date', ()),
+    'grades': (Grade, 'date_assigned', ()),
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _ndjson_chunks(result, columns):
+    for rows in result.partitions():
+        yield b''.join(dumps(dict(zip(columns, map(_plain, row)))) + b'\n' for row in rows)
+
+def _csv_chunks(result, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in result.partitions():
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def export_statement(entity, school_id, start_date=None, end_date=None):
+    """SELECT streaming an entity's exported columns for a school, oldest id first.
+
+    Both dates are inclusive; end_date covers its whole day on DateTime columns.
+    """
+    model, date_column, excluded = EXPORTS[entity]
+    table = model.__table__
+    columns = [column for column in table.columns if column.name not in excluded]
+    column = table.c[date_column]
+
+    def start_of(day):
+        return datetime.combine(day, datetime.min.time()) if isinstance(column.type, db.DateTime) else day
+
+    statement = db.select(*columns).where(table.c.school_id == school_id).order_by(table.c.id)
+    if start_date is not None:
+        statement = statement.where(column >= start_of(start_date))
+    if end_date is not None:
+        statement = statement.where(column < start_of(end_date + timedelta(days=1)))
+    return statement
+
+@exports_bp.route('/schools/<int:school_id>/<entity>', methods=['GET'])
+@jwt_required()
+@can_manage_school_required
+def export_rows(school_id, entity):
+    """Stream every row of an entity for a school as NDJSON or CSV"""
+    if entity not in EXPORTS:
+        return jsonify({'success': False, 'message': f"Unknown export '{entity}'"}), 404
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'format must be ndjson or csv'}), 400
+
+    dates = {}
+    for field in ('start_date', 'end_date'):
+        value = request.args.get(field)
+        if value:
+            try:
+                dates[field] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'success': False, 'message': f'{field} must be in YYYY-MM-DD format'}), 400
+    statement = export_statement(entity, school_id, **dates)
+
+    result = db.session.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+    names = [column.name for column in statement.selected_columns]
+    chunks = _csv_chunks(result, names) if export_format == 'csv' else _ndjson_chunks(result, names)
+
+    filename = f'{entity}-school-{school_id}.{export_format}'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -0,0 +1,109 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from datetime import datetime
+from app import db
+from app.models import Grade
+from app.decorators import teacher_required, get_current_principal
+from app.validation import is_id, resolve_class_entry, unenrolled_student_errors
+from app.response_cache import mark_table_changed
+
+grades_bp = Blueprint('grades', __name__)
+
+def parse_date(value, field):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be in YYYY-MM-DD format')
+
+@grades_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@teacher_required
+def enter_assessment_grades():
+    """Enter grades for a whole assessment (class, subject, assignment) in one request"""
+    current_user = get_current_principal()
+    data = request.get_json() or {}
+
+    for field in ('class_id', 'subject_id', 'assignment_name', 'assignment_type', 'scores'):
+        if not data.get(field):
+            return jsonify({'success': False, 'message': f'{field} is required'}), 400
+    try:
+        max_score = float(data.get('max_score') or 100)
+        if max_score <= 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'max_score must be a positive number'}), 400
+    try:
+        assignment = {
+            'assignment_name': data['assignment_name'],
+            'assignment_type': data['assignment_type'],
+            'max_score': max_score,
+            'date_assigned': parse_date(data.get('date_assigned'), 'date_assigned'),
+            'due_date': parse_date(data.get('due_date'), 'due_date')
+        }
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    class_obj, subject, teacher_id, error = resolve_class_entry(current_user, data)
+    if error:
+        return error
+
+    if not isinstance(data['scores'], list):
+        return jsonify({'success': False, 'message': 'scores must be a list'}), 400
+
+    # Validate every score before writing anything
+    entries = []
+    errors = []
+    seen = set()
+    for index, entry in enumerate(data['scores']):
+        student_id = entry.get('student_id') if isinstance(entry, dict) else None
+        if not student_id:
+            errors.append({'index': index, 'message': 'student_id is required'})
+            continue
+        if not is_id(student_id):
+            errors.append({'index': index, 'message': 'student_id must be an integer'})
+            continue
+        if student_id in seen:
+            errors.append({'index': index, 'student_id': student_id, 'message': 'Duplicate student in assessment'})
+            continue
+        try:
+            score = float(entry.get('score'))
+        except (TypeError, ValueError):
+            errors.append({'index': index, 'student_id': student_id, 'message': 'score must be a number'})
+            continue
+        if not 0 <= score <= max_score:
+            errors.append({'index': index, 'student_id': student_id, 'message': f'score must be between 0 and {max_score:g}'})
+            continue
+        try:
+            submitted_date = parse_date(entry.get('submitted_date'), 'submitted_date')
+        except ValueError as e:
+            errors.append({'index': index, 'student_id': student_id, 'message': str(e)})
+            continue
+        seen.add(student_id)
+        entries.append({
+            'student_id': student_id,
+            'score': score,
+            'remarks': entry.get('remarks'),
+            'submitted_date': submitted_date,
+            'status': entry.get('status')
+        })
+
+    errors.extend(unenrolled_student_errors(class_obj, seen))
+    if errors:
+        return jsonify({'success': False, 'message': 'Assessment contains invalid scores', 'errors': errors}), 400
+
+    try:
+        statistics = Grade.bulk_create(class_obj.school_id, class_obj.id, subject.id, teacher_id, assignment, entries)
+        mark_table_changed(db.session, 'grades', class_obj.school_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+    return jsonify({
+        'success': True,
+        'message': f'Grades recorded for {len(entries)} students',
+        'recorded': len(entries),
+        'statistics': statistics
+    }), 201
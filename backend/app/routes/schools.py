@@ -1,8 +1,11 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models import School, User
-from app.decorators import super_admin_required, can_manage_school_required, school_access_required
+from app.models.serialization import FieldSelection
+from app.response_cache import cached_list_response, cached_response, response_etag
+from app.conditional import conditional_response, make_etag
+from app.decorators import super_admin_required, can_manage_school_required, school_access_required, get_current_principal
 
 schools_bp = Blueprint('schools', __name__, url_prefix='/api/schools')
 
@@ -10,22 +13,24 @@ schools_bp = Blueprint('schools', __name__, url_prefix='/api/schools')
 @jwt_required()
 def get_schools():
     """Get all schools (super admin) or current user's school"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = get_current_principal()
     
     if current_user.is_super_admin():
-        # Super admin can see all schools; use read replica when available
-        read_session = None
-        if current_app.read_session_factory:
-            read_session = current_app.read_session_factory()
-            schools = read_session.query(School).all()
-            read_session.close()
-        else:
+        selection = FieldSelection.from_request()
+        
+        def compute():
+            # Super admin can see all schools
             schools = School.query.all()
-        return jsonify({
-            'success': True,
-            'schools': [school.to_dict() for school in schools]
-        }), 200
+            return {
+                'success': True,
+                'schools': [school.to_dict(selection) for school in schools]
+            }
+        
+        params = dict(fields=request.args.get('fields'), expand=request.args.get('expand'))
+        return conditional_response(
+            lambda: cached_list_response('schools', None, compute, **params),
+            etag=response_etag('schools', 'list', None, **params)
+        )
     else:
         # Regular users can only see their school
         if not current_user.school_id:
@@ -45,26 +50,19 @@ def get_schools():
 @school_access_required
 def get_school(school_id):
     """Get specific school details"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    # Prefer read replica
-    if current_app.read_session_factory:
-        rs = current_app.read_session_factory()
-        school = rs.query(School).get(school_id)
-        rs.close()
-        if not school:
-            return jsonify({'success': False, 'message': 'School not found'}), 404
-    else:
-        school = School.query.get_or_404(school_id)
+    school = School.query.get_or_404(school_id)
     
-    return jsonify({
+    # Statistics are counter columns that change without touching updated_at
+    statistics = school.get_statistics()
+    etag = make_etag('school', school.id, school.updated_at, *sorted(statistics.items()))
+    return conditional_response(lambda: {
         'success': True,
         'school': school.to_dict(),
-        'statistics': school.get_statistics()
-    }), 200
+        'statistics': statistics
+    }, etag=etag, last_modified=school.updated_at)
 
 @schools_bp.route('/', methods=['POST'])
+@jwt_required()
 @super_admin_required
 def create_school():
     """Create a new school (super admin only)"""
@@ -180,6 +178,7 @@ def update_school(school_id):
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @schools_bp.route('/<int:school_id>', methods=['DELETE'])
+@jwt_required()
 @super_admin_required
 def delete_school(school_id):
     """Delete a school (super admin only)"""
@@ -221,32 +220,32 @@ def get_school_statistics(school_id):
 @jwt_required()
 @school_access_required
 def get_school_config(school_id):
-    """Get school configuration for frontend"""
-    school = School.query.get_or_404(school_id)
-    
-    config = {
-        'school_name': school.name,
-        'school_code': school.code,
-        'academic_year': school.academic_year,
-        'semester_system': school.semester_system,
-        'grading_system': school.grading_system,
-        'attendance_system': school.attendance_system,
-        'branding': {
-            'logo_url': school.logo_url,
-            'primary_color': school.primary_color,
-            'secondary_color': school.secondary_color
-        },
-        'limits': {
-            'max_students_per_class': school.max_students_per_class,
-            'max_teachers_per_subject': school.max_teachers_per_subject
-        },
-        'notifications': {
-            'sms_enabled': school.enable_sms_notifications,
-            'email_enabled': school.enable_email_notifications
+    """Get school configuration for frontend (served from the in-process cache when warm)"""
+    def compute():
+        school = School.query.get_or_404(school_id)
+        return {
+            'school_name': school.name,
+            'school_code': school.code,
+            'academic_year': school.academic_year,
+            'semester_system': school.semester_system,
+            'grading_system': school.grading_system,
+            'attendance_system': school.attendance_system,
+            'branding': {
+                'logo_url': school.logo_url,
+                'primary_color': school.primary_color,
+                'secondary_color': school.secondary_color
+            },
+            'limits': {
+                'max_students_per_class': school.max_students_per_class,
+                'max_teachers_per_subject': school.max_teachers_per_subject
+            },
+            'notifications': {
+                'sms_enabled': school.enable_sms_notifications,
+                'email_enabled': school.enable_email_notifications
+            }
         }
-    }
     
-    return jsonify({
-        'success': True,
-        'config': config
-    }), 200
+    return conditional_response(
+        lambda: {'success': True, 'config': cached_response('schools', 'config', school_id, compute, ttl=300)},
+        etag=response_etag('schools', 'config', school_id)
+    )
@@ -1,26 +1,23 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
 from sqlalchemy import asc, desc
 from app import db
-from app.models import Student, User
+from app.models import Student, search_user_ids
+from app.models.helpers import keyset_page
+from app.models.user import UserRole
+from app.models.serialization import FieldSelection
+from app.response_cache import cached_list_response, generations_shared, get_generation, response_etag
+from app.conditional import conditional_response, make_etag
+from app.decorators import get_current_principal
 
 students_bp = Blueprint('students', __name__)
 
-def cache_key(prefix, school_id, **params):
-    items = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
-    return f"{prefix}:s:{school_id}:{items}"
-
-def set_tenant_in_db(school_id):
-    try:
-        db.session.execute(db.text("SELECT set_config('app.school_id', :sid, true)"), {"sid": str(school_id)})
-    except Exception:
-        pass
-
 @students_bp.route('/', methods=['GET'])
 @jwt_required()
 def list_students():
-    user_id = get_jwt_identity()
-    user = User.query.get_or_404(user_id)
+    user = get_current_principal()
+    if not user:
+        return jsonify({"success": False, "message": "User not found"}), 404
     if not user.school_id and not user.is_super_admin():
         return jsonify({"success": False, "message": "No school assigned"}), 400
 
@@ -29,54 +26,54 @@ def list_students():
     class_id = request.args.get('class_id', type=int)
     limit = min(request.args.get('limit', 25, type=int), 100)
     after_id = request.args.get('after_id', type=int)
+    selection = FieldSelection.from_request()
+
+    def compute():
+        # db.session routes these reads to the read replica when one is configured
+        query = Student.list_query(school_id, class_id=class_id, q=q).options(*Student.loader_options(selection))
+        rows = keyset_page(query, Student.id, after_id, limit).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "success": True,
+            "items": Student.to_dict_many(rows, selection),
+            "next_after_id": rows[-1].id if has_more else None
+        }
+
+    params = dict(q=q, class_id=class_id, limit=limit, after_id=after_id,
+                  fields=request.args.get('fields'), expand=request.args.get('expand'))
+    return conditional_response(
+        lambda: cached_list_response('students', school_id, compute, ttl=30, **params),
+        etag=response_etag('students', 'list', school_id, **params)
+    )
+
+@students_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_students():
+    """Type-ahead search over names, student codes, emails and parent details, best matches first"""
+    user = get_current_principal()
+    if not user.school_id and not user.is_super_admin():
+        return jsonify({"success": False, "message": "No school assigned"}), 400
 
-    r = getattr(current_app, 'cache', None)
-    ck = cache_key('students:list', school_id, q=q, class_id=class_id, limit=limit, after_id=after_id)
-    if r:
-        cached = r.get(ck)
-        if cached:
-            return jsonify(eval(cached))
-
-    # Use read replica for read-only path when available
-    read_session = None
-    if current_app.read_session_factory:
-        read_session = current_app.read_session_factory()
-        # Manual query via Core/ORM session
-        set_tenant_in_db(school_id)
-        query = read_session.query(Student).filter_by(school_id=school_id)
-    else:
-        set_tenant_in_db(school_id)
-        query = Student.query.filter_by(school_id=school_id)
-    if class_id:
-        query = query.filter_by(current_class_id=class_id)
-    if q:
-        like = f"%{q}%"
-        query = query.join(User, Student.user_id == User.id).filter(
-            db.or_(User.first_name.ilike(like), User.last_name.ilike(like))
-        )
-    if after_id:
-        query = query.filter(Student.id > after_id)
-
-    query = query.order_by(asc(Student.id)).limit(limit + 1)
-    rows = query.all()
-    if read_session:
-        read_session.close()
-    has_more = len(rows) > limit
-    rows = rows[:limit]
-    payload = {
-        "success": True,
-        "items": [s.to_dict() for s in rows],
-        "next_after_id": rows[-1].id if has_more else None
-    }
-    if r:
-        r.setex(ck, 30, str(payload))
-    return jsonify(payload)
+    school_id = request.args.get('school_id', type=int) if user.is_super_admin() else user.school_id
+    q = request.args.get('q', '', type=str).strip()
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    selection = FieldSelection.from_request()
+    if not q:
+        return jsonify({"success": True, "items": []}), 200
+
+    user_ids = search_user_ids(q, school_id, UserRole.STUDENT, limit)
+    students = Student.query.options(*Student.loader_options(selection)).filter(Student.user_id.in_(user_ids)).all() if user_ids else []
+    rank = {user_id: position for position, user_id in enumerate(user_ids)}
+    students.sort(key=lambda student: rank[student.user_id])
+    return jsonify({"success": True, "items": Student.to_dict_many(students, selection)}), 200
 
 @students_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_student():
-    user_id = get_jwt_identity()
-    user = User.query.get_or_404(user_id)
+    user = get_current_principal()
+    if not user:
+        return jsonify({"success": False, "message": "User not found"}), 404
     school_id = user.school_id
     if user.is_super_admin():
         school_id = request.json.get('school_id', school_id)
@@ -106,14 +103,9 @@ def create_student():
             school_id=school_id,
         )
         db.session.add(student)
+        # Committing bumps the school's students list generation (see app.response_cache)
         db.session.commit()
 
-        # Invalidate cached lists for this school
-        r = getattr(current_app, 'cache', None)
-        if r:
-            for key in r.scan_iter(match=f"students:list:s:{school_id}:*"):
-                r.delete(key)
-
         return jsonify({"success": True, "student": student.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
@@ -122,11 +114,21 @@ def create_student():
 @students_bp.route('/<int:student_id>', methods=['GET'])
 @jwt_required()
 def get_student(student_id):
-    user_id = get_jwt_identity()
-    user = User.query.get_or_404(user_id)
-    s = Student.query.get_or_404(student_id)
+    user = get_current_principal()
+    if not user:
+        return jsonify({"success": False, "message": "User not found"}), 404
+    selection = FieldSelection.from_request()
+    s = Student.query.options(*Student.loader_options(selection)).filter_by(id=student_id).first_or_404()
     if not user.is_super_admin() and s.school_id != user.school_id:
         return jsonify({"success": False, "message": "Forbidden"}), 403
-    return jsonify({"success": True, "student": s.to_dict()})
+    # Derived fields (names, statistics) change with the school's students generation,
+    # so without shared generations the row's own validators would go stale
+    etag = last_modified = None
+    if generations_shared():
+        etag = make_etag('student', s.id, s.updated_at, get_generation('students', s.school_id),
+                         request.args.get('fields'), request.args.get('expand'))
+        last_modified = s.updated_at
+    return conditional_response(lambda: {"success": True, "student": s.to_dict(selection)},
+                                etag=etag, last_modified=last_modified)
 
 
@@ -0,0 +1,56 @@
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event, select
+from app.models.user import User, UserRole
+
+# Tenant context for PostgreSQL row-level security. Every transaction starts
+# by setting app.school_id (transaction-local) from the authenticated
+# principal, so the tenant_isolation policies on the tenant tables confine
+# the whole request to one school without per-query round trips. Super
+# admins, unauthenticated requests (login, registration) and work outside a
+# request (CLI, background refreshes) set app.bypass_tenant instead.
+
+TENANT_SETTING = 'app.school_id'
+BYPASS_SETTING = 'app.bypass_tenant'
+
+def _principal_from_database(connection, user_id):
+    """(role, school_id) of a user, looked up once per request on the connection being set up"""
+    if 'tenant_principal' not in g:
+        if connection.dialect.name == 'postgresql':
+            # The users policy would hide the row while the tenant is still unknown
+            connection.exec_driver_sql(f"SELECT set_config('{BYPASS_SETTING}', 'on', true)")
+        row = connection.execute(select(User.role, User.school_id).where(User.id == int(user_id))).first()
+        g.tenant_principal = (row.role.value, row.school_id) if row is not None else (None, None)
+    return g.tenant_principal
+
+def current_tenant(connection):
+    """School the current request is confined to, or None when it may see every school"""
+    if not has_request_context():
+        return None
+    try:
+        claims = get_jwt()
+    except RuntimeError:
+        # verify_jwt_in_request() has not run: login, registration and other public endpoints
+        return None
+    if not claims:
+        # An optional-auth endpoint called without a token
+        return None
+    role, school_id = claims.get('role'), claims.get('school_id')
+    if role is None:
+        # Tokens issued before role claims were embedded; a user that no longer exists sees nothing
+        role, school_id = _principal_from_database(connection, claims['sub'])
+        if role is None:
+            return 0
+    if role == UserRole.SUPER_ADMIN.value:
+        return None
+    return school_id or 0
+
+def install_tenant_context(engine):
+    """Set the tenant settings at the start of every transaction on a PostgreSQL engine"""
+    @event.listens_for(engine, 'begin')
+    def set_tenant(connection):
+        school_id = current_tenant(connection)
+        connection.exec_driver_sql(
+            f"SELECT set_config('{TENANT_SETTING}', %s, true), set_config('{BYPASS_SETTING}', %s, true)",
+            ('' if school_id is None else str(school_id), 'on' if school_id is None else 'off')
+        )
@@ -0,0 +1,281 @@
+import atexit
+import csv
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import bcrypt as bcrypt_lib
+from flask import current_app
+from app import db
+from app.models import User, Student, Teacher, Class
+from app.models.user import UserRole
+
+# Bulk onboarding of users with their student/teacher profiles. Rows are
+# validated up front, passwords are hashed in a process pool shared by all
+# imports of the app (bcrypt is CPU-bound and holds the GIL), and rows are
+# inserted in chunks whose flush is batched into multi-row INSERTs. Going
+# through the ORM keeps the counter-cache, rollup and cache-invalidation
+# session hooks in effect.
+
+REQUIRED_FIELDS = ('email', 'username', 'password', 'first_name', 'last_name', 'role')
+USER_FIELDS = ('phone', 'address', 'gender')
+STUDENT_FIELDS = (
+    'parent_name', 'parent_phone', 'parent_email', 'emergency_contact', 'blood_group',
+    'medical_conditions', 'previous_school', 'academic_year', 'current_class_id'
+)
+TEACHER_FIELDS = (
+    'department', 'designation', 'qualification', 'experience_years', 'specialization',
+    'office_location', 'office_hours'
+)
+DATE_FIELDS = ('date_of_birth', 'admission_date', 'hire_date')
+NUMBER_FIELDS = ('experience_years', 'current_class_id')
+IMPORT_FIELDS = frozenset(REQUIRED_FIELDS + USER_FIELDS + STUDENT_FIELDS + TEACHER_FIELDS + DATE_FIELDS + ('student_id',))
+
+# Values that must be unique across users, with how they are compared
+UNIQUE_FIELDS = (
+    ('email', User.email, str.lower),
+    ('username', User.username, str.lower),
+    ('student_id', Student.student_id, str),
+)
+
+# Below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 16
+
+_pool_lock = threading.Lock()
+
+def _read_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    unknown = [name for name in reader.fieldnames or () if name and name.strip() not in IMPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return list(reader)
+
+def parse_import_payload(request):
+    """Read import rows from an uploaded CSV file, a text/csv body or a JSON body ({"users": [...]})"""
+    upload = request.files.get('file')
+    if upload is not None:
+        return _read_csv(upload.read().decode('utf-8-sig'))
+    if request.mimetype == 'text/csv':
+        return _read_csv(request.get_data(as_text=True))
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('users')
+    if not isinstance(data, list):
+        raise ValueError('Expected a CSV file or a JSON list of users')
+    return data
+
+def _clean(row):
+    return {key.strip(): (value.strip() if isinstance(value, str) else value)
+            for key, value in row.items() if key and value not in (None, '')}
+
+def validate_import_rows(rows, school_id):
+    """Validate every row before anything is written.
+
+    Returns (valid, errors): valid is a list of (row number, cleaned row),
+    errors a list of {'row', 'field', 'message'} dictionaries. Row numbers
+    are 1-based positions in the submitted batch.
+    """
+    from app.routes.auth import validate_email, validate_password
+
+    valid, errors = [], []
+    seen = {field: {} for field, _, _ in UNIQUE_FIELDS}
+    for number, raw in enumerate(rows, start=1):
+        row = _clean(raw) if isinstance(raw, dict) else {}
+        row_errors = [(field, f'Unknown field {field}') for field in sorted(set(row) - IMPORT_FIELDS)]
+        # JSON rows may carry numbers (phone, codes) or worse where text is expected
+        for field in sorted(set(row) & IMPORT_FIELDS - set(NUMBER_FIELDS)):
+            value = row[field]
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                row[field] = str(value)
+            elif not isinstance(value, str):
+                row_errors.append((field, f'{field} must be a string'))
+                del row[field]
+        for field in REQUIRED_FIELDS:
+            if not row.get(field) and field not in dict(row_errors):
+                row_errors.append((field, f'{field} is required'))
+        if row.get('email') and not validate_email(row['email']):
+            row_errors.append(('email', 'Invalid email format'))
+        if row.get('password'):
+            ok, message = validate_password(row['password'])
+            if not ok:
+                row_errors.append(('password', message))
+        if row.get('role'):
+            try:
+                row['role'] = UserRole[str(row['role']).upper()]
+            except KeyError:
+                row_errors.append(('role', f"Invalid role '{row['role']}'"))
+            else:
+                if row['role'] == UserRole.SUPER_ADMIN:
+                    row_errors.append(('role', 'Super admin users cannot be imported'))
+        for field in DATE_FIELDS:
+            if row.get(field):
+                try:
+                    row[field] = datetime.strptime(str(row[field]), '%Y-%m-%d').date()
+                except ValueError:
+                    row_errors.append((field, f'{field} must be in YYYY-MM-DD format'))
+        for field in NUMBER_FIELDS:
+            if row.get(field) is not None:
+                try:
+                    if isinstance(row[field], bool):
+                        raise TypeError(field)
+                    row[field] = int(row[field])
+                except (TypeError, ValueError):
+                    row_errors.append((field, f'{field} must be a number'))
+        if row.get('role') != UserRole.STUDENT:
+            # Only student profiles have a student_id
+            row.pop('student_id', None)
+        for field, _, normalize in UNIQUE_FIELDS:
+            value = row.get(field)
+            if value:
+                key = normalize(value)
+                if key in seen[field]:
+                    row_errors.append((field, f'Duplicate {field} (also on row {seen[field][key]})'))
+                else:
+                    seen[field][key] = number
+
+        if row_errors:
+            errors.extend({'row': number, 'field': field, 'message': message} for field, message in row_errors)
+        else:
+            valid.append((number, row))
+
+    # Students may only be placed in this school's classes
+    class_ids = {row['current_class_id'] for _, row in valid if row.get('current_class_id') is not None}
+    if class_ids:
+        known = {class_id for (class_id,) in db.session.query(Class.id).filter(Class.id.in_(class_ids), Class.school_id == school_id)}
+        unknown = {number for number, row in valid if row.get('current_class_id') is not None and row['current_class_id'] not in known}
+        errors.extend({'row': number, 'field': 'current_class_id', 'message': 'Class not found in this school'} for number in sorted(unknown))
+        valid = [(number, row) for number, row in valid if number not in unknown]
+
+    # One query per field for conflicts with existing users
+    for field, column, normalize in UNIQUE_FIELDS:
+        values = [row[field] for _, row in valid if row.get(field)]
+        existing = set()
+        for start in range(0, len(values), 500):
+            existing.update(normalize(value) for (value,) in db.session.query(column).filter(column.in_(values[start:start + 500])))
+        if existing:
+            conflicting = {number for number, row in valid if row.get(field) and normalize(row[field]) in existing}
+            errors.extend({'row': number, 'field': field, 'message': f'{field} already exists'} for number in sorted(conflicting))
+            valid = [(number, row) for number, row in valid if number not in conflicting]
+
+    errors.sort(key=lambda error: error['row'])
+    return valid, errors
+
+def _hash_password(args):
+    password, rounds = args
+    return bcrypt_lib.hashpw(password.encode('utf-8'), bcrypt_lib.gensalt(rounds)).decode('utf-8')
+
+def hash_passwords(passwords):
+    """bcrypt-hash many passwords, in parallel worker processes for large batches"""
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+    jobs = [(password, rounds) for password in passwords]
+    workers = current_app.config.get('IMPORT_HASH_WORKERS') or os.cpu_count() or 1
+    if len(jobs) < POOL_THRESHOLD or workers <= 1:
+        return [_hash_password(job) for job in jobs]
+    pool = _hash_pool(workers)
+    try:
+        return list(pool.map(_hash_password, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time and finish this batch here
+        with _pool_lock:
+            if current_app.extensions.get('import_hash_pool') is pool:
+                del current_app.extensions['import_hash_pool']
+        return [_hash_password(job) for job in jobs]
+
+def _hash_pool(workers):
+    """The app's hashing pool, started on first use and kept for later imports"""
+    with _pool_lock:
+        pool = current_app.extensions.get('import_hash_pool')
+        if pool is None:
+            pool = current_app.extensions['import_hash_pool'] = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(pool.shutdown, cancel_futures=True)
+        return pool
+
+def _unique_codes(generate, column, count):
+    """Generate count codes that are unique within the batch and against existing rows"""
+    codes = set()
+    while len(codes) < count:
+        while len(codes) < count:
+            codes.add(generate())
+        taken = {value for (value,) in db.session.query(column).filter(column.in_(codes))}
+        codes -= taken
+    return list(codes)
+
+def _build_chunk(chunk, hashes, school_id):
+    students = [row for row in chunk if row['role'] == UserRole.STUDENT]
+    teachers = [row for row in chunk if row['role'] == UserRole.TEACHER]
+    student_codes = iter(_unique_codes(Student.generate_student_id, Student.student_id,
+                                       sum(1 for row in students if not row.get('student_id'))))
+    teacher_codes = iter(_unique_codes(Teacher.generate_teacher_id, Teacher.teacher_id, len(teachers)))
+    employee_codes = iter(_unique_codes(Teacher.generate_employee_id, Teacher.employee_id, len(teachers)))
+    today = datetime.now().date()
+
+    users = []
+    for row, password_hash in zip(chunk, hashes):
+        user = User(
+            email=row['email'],
+            username=row['username'],
+            password_hash=password_hash,
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            role=row['role'],
+            date_of_birth=row.get('date_of_birth'),
+            school_id=school_id,
+            **{field: row.get(field) for field in USER_FIELDS}
+        )
+        if row['role'] == UserRole.STUDENT:
+            user.student = Student(
+                student_id=row.get('student_id') or next(student_codes),
+                admission_date=row.get('admission_date') or today,
+                school_id=school_id,
+                **{field: row.get(field) for field in STUDENT_FIELDS}
+            )
+            if not user.student.academic_year:
+                user.student.academic_year = str(today.year)
+        elif row['role'] == UserRole.TEACHER:
+            user.teacher = Teacher(
+                teacher_id=next(teacher_codes),
+                employee_id=next(employee_codes),
+                hire_date=row.get('hire_date') or today,
+                school_id=school_id,
+                **{field: row.get(field) for field in TEACHER_FIELDS}
+            )
+        users.append(user)
+    return users
+
+def import_users(rows, school_id, chunk_size=None):
+    """Validate, hash and insert a batch of users for a school.
+
+    Valid rows are committed chunk by chunk; a chunk that fails at the
+    database is rolled back and its rows are reported as errors.
+    """
+    chunk_size = chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE', 500)
+    valid, errors = validate_import_rows(rows, school_id)
+    hashes = hash_passwords([row['password'] for _, row in valid]) if valid else []
+
+    created = []
+    for start in range(0, len(valid), chunk_size):
+        numbered = valid[start:start + chunk_size]
+        try:
+            users = _build_chunk([row for _, row in numbered], hashes[start:start + chunk_size], school_id)
+            db.session.add_all(users)
+            db.session.flush()
+            # Read ids before commit expires the objects
+            chunk_created = [{'row': number, 'id': user.id, 'email': user.email, 'role': user.role.value}
+                             for (number, _), user in zip(numbered, users)]
+            db.session.commit()
+            created.extend(chunk_created)
+        except Exception as e:
+            db.session.rollback()
+            errors.extend({'row': number, 'field': None, 'message': f'Insert failed: {e.__class__.__name__}'}
+                          for number, _ in numbered)
+
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'total_rows': len(rows),
+        'created_count': len(created),
+        'error_count': len({error['row'] for error in errors}),
+        'created': created,
+        'errors': errors
+    }
@@ -0,0 +1,50 @@
+from flask import jsonify
+from app import db
+from app.models import Class, Subject, Student, Teacher
+
+# Checks shared by the whole-class bulk endpoints (attendance registers,
+# assessment grades): every request names a class, one of its subjects and
+# the teacher the rows are recorded under, and lists rows per student.
+
+def is_id(value):
+    """Whether a JSON value is usable as a row id (bools are ints in Python)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _error(message, status):
+    return jsonify({'success': False, 'message': message}), status
+
+def resolve_class_entry(current_user, data):
+    """Load and authorize the class, subject and recording teacher of a bulk class entry.
+
+    Returns (class_obj, subject, teacher_id, None), or (None, None, None, error
+    response) when the caller may not record for them. Teachers record as
+    themselves and only for classes/subjects they teach; admins may name any
+    teacher of the school, defaulting to the subject's.
+    """
+    class_obj = Class.query.get_or_404(data['class_id'])
+    subject = Subject.query.get_or_404(data['subject_id'])
+    if subject.class_id != class_obj.id or subject.school_id != class_obj.school_id:
+        return None, None, None, _error('Subject does not belong to this class', 400)
+    if not current_user.is_super_admin() and class_obj.school_id != current_user.school_id:
+        return None, None, None, _error('Access denied to this class', 403)
+
+    if current_user.is_teacher():
+        teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+        if not teacher or teacher.id not in (subject.teacher_id, class_obj.class_teacher_id):
+            return None, None, None, _error('You do not teach this class', 403)
+        return class_obj, subject, teacher.id, None
+
+    teacher_id = data.get('teacher_id') or subject.teacher_id
+    if not teacher_id:
+        return None, None, None, _error('teacher_id is required', 400)
+    if not is_id(teacher_id) or not Teacher.query.filter_by(id=teacher_id, school_id=class_obj.school_id).first():
+        return None, None, None, _error('Teacher does not belong to this school', 400)
+    return class_obj, subject, teacher_id, None
+
+def unenrolled_student_errors(class_obj, student_ids):
+    """Errors for the given student ids that are not enrolled in the class (one query)"""
+    enrolled = {student_id for (student_id,) in db.session.query(Student.id).filter(
+        Student.id.in_(student_ids), Student.current_class_id == class_obj.id, Student.school_id == class_obj.school_id
+    )} if student_ids else set()
+    return [{'student_id': student_id, 'message': 'Student is not enrolled in this class'}
+            for student_id in sorted(set(student_ids) - enrolled, key=str)]
@@ -9,7 +9,19 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///school_management.db'
     # Optional read-replica URL for read operations
     DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL', '')
+    # Seconds a user's reads stay on the primary after they commit a write (read-your-writes)
+    DATABASE_READ_YOUR_WRITES_WINDOW = int(os.environ.get('DATABASE_READ_YOUR_WRITES_WINDOW', 5))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool for server databases (PostgreSQL, MySQL): per-worker size, burst overflow,
+    # seconds to wait for a connection, and seconds before a connection is replaced
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 10))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW', 20))
+    DATABASE_POOL_TIMEOUT = int(os.environ.get('DATABASE_POOL_TIMEOUT', 30))
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE', 1800))
+    # SQLite connection pragmas; busy timeout is in milliseconds
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
     
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
@@ -17,6 +29,28 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     # Cache configuration
     REDIS_URL = os.environ.get('REDIS_URL', '')
+    # In-process (L1) cache in front of Redis: max entries and max seconds an entry is served locally
+    CACHE_L1_MAX_ENTRIES = int(os.environ.get('CACHE_L1_MAX_ENTRIES', 1024))
+    CACHE_L1_TTL = int(os.environ.get('CACHE_L1_TTL', 5))
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate')
+    # Single-flight on cache misses: seconds a computing worker holds its lease / others wait for its result
+    CACHE_LEASE_TTL = int(os.environ.get('CACHE_LEASE_TTL', 30))
+    CACHE_LEASE_WAIT = int(os.environ.get('CACHE_LEASE_WAIT', 10))
+    # Super admin dashboard snapshot: seconds before a refresh is triggered / before it is discarded
+    DASHBOARD_SNAPSHOT_TTL = int(os.environ.get('DASHBOARD_SNAPSHOT_TTL', 60))
+    DASHBOARD_SNAPSHOT_MAX_AGE = int(os.environ.get('DASHBOARD_SNAPSHOT_MAX_AGE', 3600))
+    
+    # In-process autocomplete indexes: schools kept in memory per worker / seconds before an idle school is evicted
+    AUTOCOMPLETE_MAX_SCHOOLS = int(os.environ.get('AUTOCOMPLETE_MAX_SCHOOLS', 64))
+    AUTOCOMPLETE_IDLE_TTL = int(os.environ.get('AUTOCOMPLETE_IDLE_TTL', 900))
+    
+    # Add X-Identity-Lookups and similar per-request diagnostics headers to responses
+    EXPOSE_REQUEST_METRICS = os.environ.get('EXPOSE_REQUEST_METRICS', 'false').lower() in ['true', 'on', '1']
+    
+    # Bulk user import: rows per request, rows per committed chunk, password hashing processes (default: CPU count)
+    IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS', 10000))
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    IMPORT_HASH_WORKERS = int(os.environ.get('IMPORT_HASH_WORKERS', 0)) or None
     
     # File upload configuration
     UPLOAD_FOLDER = 'uploads'
@@ -43,6 +77,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///school_management_test.db'
+    EXPOSE_REQUEST_METRICS = True
 
 # Configuration dictionary
 config = {
@@ -0,0 +1,52 @@
+"""tenant composite indexes
+
+Revision ID: 3f2a9c1d7b10
+Revises: e6082a3c4f57
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = 'e6082a3c4f57'
+branch_labels = None
+depends_on = None
+
+# Tables are created by db.create_all(), so only add indexes that are missing
+# on tables that already exist.
+INDEXES = (
+    ('ix_attendance_school_date_status', 'attendance', ['school_id', 'date', 'status']),
+    ('ix_grades_school_student_subject', 'grades', ['school_id', 'student_id', 'subject_id']),
+    ('ix_grades_school_date_assigned', 'grades', ['school_id', 'date_assigned']),
+    ('ix_users_school_id_id', 'users', ['school_id', 'id']),
+    ('ix_users_school_role_active', 'users', ['school_id', 'role', 'is_active']),
+    ('ix_teachers_school_id', 'teachers', ['school_id']),
+    ('ix_subjects_school_class', 'subjects', ['school_id', 'class_id']),
+    ('ix_classes_school_id', 'classes', ['school_id']),
+)
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return tables, {
+        table: {index['name'] for index in inspector.get_indexes(table)}
+        for table in tables
+    }
+
+
+def upgrade():
+    tables, indexes = _existing_indexes()
+    for name, table, columns in INDEXES:
+        if table in tables and name not in indexes[table]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    tables, indexes = _existing_indexes()
+    for name, table, columns in reversed(INDEXES):
+        if table in tables and name in indexes[table]:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,57 @@
+"""tenant row level security
+
+Revision ID: 8b5e0d4c2a67
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5e0d4c2a67'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+# Tables scoped by school_id. The settings are set per transaction by
+# app.tenant; when neither is set (e.g. an ad-hoc psql session) no rows are
+# visible, so isolation fails closed.
+TENANT_TABLES = (
+    'users', 'students', 'teachers', 'classes', 'subjects',
+    'attendance', 'grades', 'attendance_daily_summary',
+)
+
+POLICY = 'tenant_isolation'
+
+CONDITION = (
+    "current_setting('app.bypass_tenant', true) = 'on' "
+    "OR school_id = NULLIF(current_setting('app.school_id', true), '')::integer"
+)
+
+
+def _tenant_tables():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    return [table for table in TENANT_TABLES if table in tables]
+
+
+def upgrade():
+    # Row-level security is PostgreSQL only; SQLite deployments rely on the application filters
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in _tenant_tables():
+        op.execute(f'ALTER TABLE {table} ENABLE ROW LEVEL SECURITY')
+        # Apply the policy to the table owner too, which is usually the application role
+        op.execute(f'ALTER TABLE {table} FORCE ROW LEVEL SECURITY')
+        op.execute(f'DROP POLICY IF EXISTS {POLICY} ON {table}')
+        op.execute(f'CREATE POLICY {POLICY} ON {table} USING ({CONDITION}) WITH CHECK ({CONDITION})')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in reversed(_tenant_tables()):
+        op.execute(f'DROP POLICY IF EXISTS {POLICY} ON {table}')
+        op.execute(f'ALTER TABLE {table} NO FORCE ROW LEVEL SECURITY')
+        op.execute(f'ALTER TABLE {table} DISABLE ROW LEVEL SECURITY')
@@ -0,0 +1,48 @@
+"""attendance daily summary
+
+Revision ID: a1d3e5f70b24
+Revises: 
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d3e5f70b24'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created the (empty) table
+    if 'attendance_daily_summary' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'attendance_daily_summary',
+            sa.Column('school_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('class_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('total_records', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('present', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('absent', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('late', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('excused', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('school_id', 'class_id', 'subject_id', 'date'),
+        )
+        op.create_index('ix_attendance_daily_summary_school_date', 'attendance_daily_summary', ['school_id', 'date'])
+
+    # Backfill from existing attendance
+    from app.models.attendance_summary import AttendanceDailySummary
+    session = Session(bind=op.get_bind())
+    AttendanceDailySummary.rebuild(session=session)
+    session.close()
+
+
+def downgrade():
+    if 'attendance_daily_summary' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('attendance_daily_summary')
@@ -0,0 +1,40 @@
+"""revoked tokens
+
+Revision ID: a9d2c6e4f183
+Revises: c4f1a8e93d20
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d2c6e4f183'
+down_revision = 'c4f1a8e93d20'
+branch_labels = None
+depends_on = None
+
+
+def _has_table():
+    return 'revoked_tokens' in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade():
+    # db.create_all() may already have created the table
+    if _has_table():
+        return
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('jti', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'])
+
+
+def downgrade():
+    if _has_table():
+        op.drop_index('ix_revoked_tokens_expires_at', table_name='revoked_tokens')
+        op.drop_table('revoked_tokens')
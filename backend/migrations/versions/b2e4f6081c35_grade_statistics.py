@@ -0,0 +1,64 @@
+"""grade statistics
+
+Revision ID: b2e4f6081c35
+Revises: a1d3e5f70b24
+Create Date: 2026-10-18 08:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e4f6081c35'
+down_revision = 'a1d3e5f70b24'
+branch_labels = None
+depends_on = None
+
+
+def _statistic_columns():
+    return [
+        sa.Column('grade_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('percentage_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('percentage_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade():
+    # db.create_all() may already have created the (empty) tables
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'grade_statistics_student_subject' not in tables:
+        op.create_table(
+            'grade_statistics_student_subject',
+            sa.Column('student_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False, autoincrement=False),
+            *_statistic_columns(),
+            sa.PrimaryKeyConstraint('student_id', 'subject_id'),
+        )
+    if 'grade_statistics_class_subject' not in tables:
+        op.create_table(
+            'grade_statistics_class_subject',
+            sa.Column('class_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False, autoincrement=False),
+            *_statistic_columns(),
+            sa.PrimaryKeyConstraint('class_id', 'subject_id'),
+        )
+        op.create_index('ix_grade_statistics_class_subject_subject', 'grade_statistics_class_subject', ['subject_id'])
+
+    # Backfill from existing grades
+    from app.models.grade_statistics import GRADE_STATISTICS_MODELS
+    session = Session(bind=op.get_bind())
+    for model in GRADE_STATISTICS_MODELS:
+        model.rebuild(session=session)
+    session.close()
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ('grade_statistics_class_subject', 'grade_statistics_student_subject'):
+        if table in tables:
+            op.drop_table(table)
@@ -0,0 +1,46 @@
+"""search entries tenant isolation
+
+Revision ID: c4f1a8e93d20
+Revises: f7193b4d5068
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a8e93d20'
+down_revision = 'f7193b4d5068'
+branch_labels = None
+depends_on = None
+
+# search_entries is created by f7193b4d5068 or db.create_all(); it
+# holds names and emails, so it gets the same policy as the tenant tables.
+POLICY = 'tenant_isolation'
+
+CONDITION = (
+    "current_setting('app.bypass_tenant', true) = 'on' "
+    "OR school_id = NULLIF(current_setting('app.school_id', true), '')::integer"
+)
+
+
+def _has_table():
+    return 'search_entries' in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql' or not _has_table():
+        return
+    op.execute('ALTER TABLE search_entries ENABLE ROW LEVEL SECURITY')
+    op.execute('ALTER TABLE search_entries FORCE ROW LEVEL SECURITY')
+    op.execute(f'DROP POLICY IF EXISTS {POLICY} ON search_entries')
+    op.execute(f'CREATE POLICY {POLICY} ON search_entries USING ({CONDITION}) WITH CHECK ({CONDITION})')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql' or not _has_table():
+        return
+    op.execute(f'DROP POLICY IF EXISTS {POLICY} ON search_entries')
+    op.execute('ALTER TABLE search_entries NO FORCE ROW LEVEL SECURITY')
+    op.execute('ALTER TABLE search_entries DISABLE ROW LEVEL SECURITY')
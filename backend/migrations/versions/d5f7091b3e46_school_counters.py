@@ -0,0 +1,45 @@
+"""school counters
+
+Revision ID: d5f7091b3e46
+Revises: b2e4f6081c35
+Create Date: 2026-10-18 08:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f7091b3e46'
+down_revision = 'b2e4f6081c35'
+branch_labels = None
+depends_on = None
+
+COUNTERS = ('student_count', 'teacher_count', 'admin_count', 'class_count', 'subject_count')
+
+
+def _school_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('schools')}
+
+
+def upgrade():
+    existing = _school_columns()
+    for name in COUNTERS:
+        if name not in existing:
+            op.add_column('schools', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    # Fill the new counters and repair Class.current_strength
+    from app.models.counters import reconcile_counters
+    session = Session(bind=op.get_bind())
+    reconcile_counters(session=session)
+    session.flush()
+    session.close()
+
+
+def downgrade():
+    existing = _school_columns()
+    with op.batch_alter_table('schools') as batch_op:
+        for name in reversed(COUNTERS):
+            if name in existing:
+                batch_op.drop_column(name)
@@ -0,0 +1,31 @@
+"""user token version
+
+Revision ID: e6082a3c4f57
+Revises: d5f7091b3e46
+Create Date: 2026-10-18 08:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6082a3c4f57'
+down_revision = 'd5f7091b3e46'
+branch_labels = None
+depends_on = None
+
+
+def _user_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+
+
+def upgrade():
+    if 'token_version' not in _user_columns():
+        op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    if 'token_version' in _user_columns():
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.drop_column('token_version')
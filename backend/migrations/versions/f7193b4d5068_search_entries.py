@@ -0,0 +1,57 @@
+"""search entries
+
+Revision ID: f7193b4d5068
+Revises: 8b5e0d4c2a67
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7193b4d5068'
+down_revision = '8b5e0d4c2a67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    from app.models.search import SQLITE_FTS_DDL, rebuild_search_entries
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    inspector = sa.inspect(bind)
+
+    # db.create_all() may already have created the (empty) table with its indexes
+    if 'search_entries' not in inspector.get_table_names():
+        op.create_table(
+            'search_entries',
+            sa.Column('user_id', sa.Integer(), nullable=False, autoincrement=False),
+            sa.Column('school_id', sa.Integer(), nullable=True),
+            sa.Column('role', sa.String(length=20), nullable=True),
+            sa.Column('document', sa.Text(), nullable=False, server_default=''),
+            sa.PrimaryKeyConstraint('user_id'),
+        )
+        op.create_index('ix_search_entries_school_role', 'search_entries', ['school_id', 'role'])
+        if dialect == 'sqlite':
+            for statement in SQLITE_FTS_DDL:
+                op.execute(statement)
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            'CREATE INDEX IF NOT EXISTS ix_search_entries_document_trgm '
+            'ON search_entries USING gin (document gin_trgm_ops)'
+        )
+
+    # Backfill from users and students; on SQLite the triggers fill search_entries_fts
+    session = Session(bind=bind)
+    rebuild_search_entries(session=session)
+    session.close()
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_entries_fts')
+    if 'search_entries' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('search_entries')
@@ -0,0 +1,111 @@
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import User, Student, Teacher, Class, Subject, Attendance, Grade, School
+from app.models.user import UserRole
+from config import TestingConfig
+
+PASSWORD = 'Passw0rd!'
+
+class UnitTestConfig(TestingConfig):
+    """In-memory database and cheap password hashes"""
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    BCRYPT_LOG_ROUNDS = 4
+    JWT_SECRET_KEY = 'unit-test-jwt-secret-key-of-sufficient-length'
+    JWT_VERIFY_SUB = False
+
+@pytest.fixture
+def app(tmp_path):
+    # A database file rather than :memory:, so separate connections behave as in production
+    config = type('FileTestConfig', (UnitTestConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    app = create_app(config)
+
+    @app.teardown_request
+    def end_request_state(exc):
+        # Requests reuse the test's app context, so end their session and g as a real request would
+        db.session.remove()
+        for name in list(g):
+            g.pop(name)
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def school(app):
+    """A school with an admin, a teacher, one class and subject and three students with attendance and grades"""
+    school = School(name='Test School', code='TEST01')
+    db.session.add(school)
+    db.session.flush()
+
+    admin = User(email='admin@test.com', username='admin', password=PASSWORD, first_name='Ada', last_name='Admin',
+                 role=UserRole.SCHOOL_ADMIN, school_id=school.id)
+    teacher_user = User(email='teacher@test.com', username='teacher', password=PASSWORD, first_name='Tom', last_name='Teacher',
+                        role=UserRole.TEACHER, school_id=school.id)
+    db.session.add_all([admin, teacher_user])
+    db.session.flush()
+    teacher = Teacher(user_id=teacher_user.id, hire_date=date(2020, 1, 1), school_id=school.id)
+    db.session.add(teacher)
+    db.session.flush()
+    class_obj = Class(name='Grade 1', section='A', academic_year='2024-2025', school_id=school.id, class_teacher_id=teacher.id)
+    db.session.add(class_obj)
+    db.session.flush()
+    subject = Subject(name='Mathematics', class_id=class_obj.id, teacher_id=teacher.id, school_id=school.id)
+    db.session.add(subject)
+    db.session.flush()
+
+    students = []
+    for number in range(3):
+        user = User(email=f'student{number}@test.com', username=f'student{number}', password=PASSWORD,
+                    first_name=f'Student{number}', last_name='Pupil', role=UserRole.STUDENT, school_id=school.id)
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, admission_date=date(2024, 9, 1), school_id=school.id, current_class_id=class_obj.id)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(Attendance(student_id=student.id, class_id=class_obj.id, subject_id=subject.id, teacher_id=teacher.id,
+                                  date=date(2024, 9, 2), status='present', school_id=school.id))
+        db.session.add(Grade(student_id=student.id, class_id=class_obj.id, subject_id=subject.id, teacher_id=teacher.id,
+                             assignment_name='Quiz 1', assignment_type='quiz', score=60 + number * 10, max_score=100,
+                             school_id=school.id))
+        students.append(student.id)
+    db.session.commit()
+    ids = SimpleNamespace(id=school.id, admin=admin.id, teacher=teacher.id, teacher_user=teacher_user.id,
+                          class_id=class_obj.id, subject=subject.id, students=students)
+    # Leave no transaction open, as between two requests
+    db.session.remove()
+    return ids
+
+def auth_headers(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements run on the database inside the block, without transaction control"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith('BEGIN'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+
+class FakeRedis:
+    """In-memory stand-in for the redis-py calls the cache layer makes.
+
+    Set down = True to make every call raise ConnectionError, as an
+    unreachable server would.
+    """
+
+    def __init__(self):
+        self.down = False
+        self._data = {}
+        self._subscribers = []
+        self._lock = threading.RLock()
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError('Redis is unavailable')
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    @staticmethod
+    def _encode(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def get(self, key):
+        self._check()
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        self._check()
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            ttl = ex if ex else (px / 1000 if px else None)
+            self._data[key] = (self._encode(value), time.monotonic() + ttl if ttl else None)
+            return True
+
+    def incr(self, key):
+        self._check()
+        with self._lock:
+            entry = self._live(key)
+            value = int(entry[0]) + 1 if entry else 1
+            self._data[key] = (self._encode(value), entry[1] if entry else None)
+            return value
+
+    def delete(self, *keys):
+        self._check()
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        self._check()
+        with self._lock:
+            return 1 if self._live(key) else 0
+
+    def eval(self, script, numkeys, key, token):
+        """Only the lease release script: delete key if it still holds token"""
+        self._check()
+        with self._lock:
+            if self.get(key) == self._encode(token):
+                return self.delete(key)
+            return 0
+
+    def publish(self, channel, message):
+        self._check()
+        subscribers = [pubsub for pubsub in self._subscribers if channel in pubsub.channels]
+        for pubsub in subscribers:
+            pubsub.messages.put({'type': 'message', 'channel': channel, 'data': self._encode(message)})
+        return len(subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        self._check()
+        pubsub = FakePubSub(self)
+        self._subscribers.append(pubsub)
+        return pubsub
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.channels = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    def listen(self):
+        while True:
+            self.redis._check()
+            try:
+                yield self.messages.get(timeout=0.01)
+            except queue.Empty:
+                continue
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Attendance, Class
+
+from conftest import count_queries
+
+SECOND_DAY = date(2024, 9, 3)
+
+@pytest.fixture
+def register(school):
+    """A second day with one student of each of three statuses"""
+    for student_id, status in zip(school.students, ('absent', 'late', 'excused')):
+        db.session.add(Attendance(student_id=student_id, class_id=school.class_id, subject_id=school.subject,
+                                  teacher_id=school.teacher, date=SECOND_DAY, status=status, school_id=school.id))
+    db.session.commit()
+    return school
+
+def test_summary_counts_every_status_in_one_query(register):
+    with count_queries() as statements:
+        summary = Attendance.summarize(school_id=register.id)
+    assert len(statements) == 1
+    assert summary == {'total_records': 6, 'present': 3, 'absent': 1, 'late': 1, 'excused': 1,
+                       'attendance_percentage': 50.0}
+
+def test_empty_summary_is_zero(register):
+    assert Attendance.summarize(school_id=register.id, start_date=date(2025, 1, 1)) == Attendance.build_summary()
+
+def test_grouped_summaries_are_keyed_by_group_values(register):
+    by_date = Attendance.summarize(group_by='date', school_id=register.id)
+    assert by_date[date(2024, 9, 2)]['present'] == 3
+    assert by_date[SECOND_DAY]['attendance_percentage'] == 0
+
+    by_class_and_month = Attendance.summarize(group_by=['class', 'month'], class_id=[register.class_id])
+    assert list(by_class_and_month) == [(register.class_id, '2024-09')]
+
+def test_student_filters_read_raw_attendance(register):
+    summaries = Attendance.summarize(group_by='student', student_id=register.students[:2])
+    assert set(summaries) == set(register.students[:2])
+    assert (summaries[register.students[0]]['present'], summaries[register.students[0]]['absent']) == (1, 1)
+    assert summaries[register.students[1]]['late'] == 1
+
+@pytest.mark.parametrize('group_by', [None, 'date', 'month', ['class', 'subject']])
+def test_rollup_matches_raw_attendance(register, group_by):
+    filters = dict(group_by=group_by, school_id=register.id, start_date=date(2024, 9, 1), end_date=SECOND_DAY)
+    assert Attendance.summarize(**filters) == Attendance.summarize(use_rollup=False, **filters)
+
+def test_only_student_and_teacher_detail_reads_raw_attendance(app):
+    assert 'attendance_daily_summary' in str(Attendance.summary_statement('class'))
+    for filters in ({'group_by': 'student'}, {'group_by': 'teacher'}, {'student_id': 1}, {'use_rollup': False}):
+        assert 'attendance_daily_summary' not in str(Attendance.summary_statement(**filters))
+
+def test_unknown_group_is_rejected(register):
+    with pytest.raises(ValueError, match="Cannot group attendance summary by 'status'"):
+        Attendance.summarize(group_by='status')
+
+def test_class_summaries_share_one_query(register):
+    classes = Class.query.all()
+    with count_queries() as statements:
+        summaries = Class.get_attendance_summaries(classes, date=SECOND_DAY)
+    assert len(statements) == 1
+    assert (summaries[register.class_id]['absent'], summaries[register.class_id]['late']) == (1, 1)
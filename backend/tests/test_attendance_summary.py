@@ -0,0 +1,37 @@
+from datetime import date
+
+from app import db
+from app.models import Attendance
+from app.models.attendance_summary import AttendanceDailySummary
+
+def _rollup(school):
+    return db.session.get(AttendanceDailySummary, (school.id, school.class_id, school.subject, date(2024, 9, 2)))
+
+def test_rollup_counts_seeded_attendance(school):
+    row = _rollup(school)
+    assert (row.total_records, row.present, row.absent) == (3, 3, 0)
+
+def test_status_change_after_commit_moves_counts(school):
+    record = Attendance.query.filter_by(student_id=school.students[0]).one()
+    record.status = 'late'
+    db.session.commit()
+    # The commit expired every attribute; status is set without being loaded first
+    record.status = 'absent'
+    db.session.commit()
+
+    row = _rollup(school)
+    assert (row.total_records, row.present, row.late, row.absent) == (3, 2, 0, 1)
+
+def test_rollup_matches_rebuild(school):
+    record = Attendance.query.filter_by(student_id=school.students[1]).one()
+    record.status = 'late'
+    db.session.commit()
+    db.session.delete(Attendance.query.filter_by(student_id=school.students[2]).one())
+    db.session.commit()
+
+    maintained = _rollup(school)
+    maintained = (maintained.total_records, maintained.present, maintained.late)
+    AttendanceDailySummary.rebuild()
+    db.session.commit()
+    rebuilt = _rollup(school)
+    assert maintained == (rebuilt.total_records, rebuilt.present, rebuilt.late) == (2, 1, 1)
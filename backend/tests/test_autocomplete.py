@@ -0,0 +1,105 @@
+import time
+from datetime import date
+
+import pytest
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.autocomplete import GENERATION_ENTITY, AutocompleteIndexes
+from app.cache import TieredCache
+from app.models import Student, User
+from app.models.user import UserRole
+from app.response_cache import generation_key
+
+from conftest import PASSWORD, auth_headers
+from fake_redis import FakeRedis
+
+@pytest.fixture
+def builds(app, monkeypatch):
+    """Count index builds"""
+    counted = []
+    build = AutocompleteIndexes._build
+
+    def counting_build(self, school_id, generation):
+        counted.append(school_id)
+        return build(self, school_id, generation)
+
+    monkeypatch.setattr(AutocompleteIndexes, '_build', counting_build)
+    return counted
+
+def _names(school, prefix, **kwargs):
+    return [match['name'] for match in current_app.autocomplete.search(school.id, prefix, **kwargs)]
+
+def _renamed_elsewhere(email, first_name):
+    # A write by another process: none of this process's session hooks run
+    with db.engine.begin() as connection:
+        connection.execute(update(User).where(User.email == email).values(first_name=first_name))
+    # Later lookups come from new requests, which do not see this session's snapshot
+    db.session.remove()
+
+def test_prefixes_of_names_words_and_codes(school):
+    assert _names(school, 'student1') == ['Student1 Pupil']
+    assert len(_names(school, 'pup')) == 3
+    assert len(_names(school, 'pup', limit=2)) == 2
+    assert _names(school, 'tom t') == ['Tom Teacher']
+    code = db.session.get(Student, school.students[0]).student_id
+    assert _names(school, code[:-1].lower(), kinds={'student'})[0] == 'Student0 Pupil'
+    assert _names(school, 'tom', kinds={'student'}) == []
+    assert _names(school, '   ') == []
+
+def test_endpoint_validates_type(client, school):
+    headers = auth_headers(client, 'teacher@test.com')
+    response = client.get('/api/autocomplete/?q=stu&type=student', headers=headers)
+    assert len(response.get_json()['items']) == 3
+    assert client.get('/api/autocomplete/?q=stu&type=parent', headers=headers).status_code == 400
+
+def test_own_commits_update_the_loaded_index(school, builds):
+    _names(school, 'stu')
+    user = User.query.filter_by(email='student0@test.com').one()
+    user.first_name = 'Zelda'
+    new_user = User(email='new@test.com', username='new', password=PASSWORD, first_name='Newton', last_name='Pupil',
+                    role=UserRole.STUDENT, school_id=school.id)
+    db.session.add(new_user)
+    db.session.flush()
+    db.session.add(Student(user_id=new_user.id, admission_date=date(2024, 9, 1), school_id=school.id))
+    db.session.commit()
+
+    assert _names(school, 'zel') == ['Zelda Pupil']
+    assert _names(school, 'student0') == []
+    assert _names(school, 'newt') == ['Newton Pupil']
+    assert builds == [school.id]
+
+def test_without_redis_indexes_are_rebuilt_after_l1_ttl(app, school, builds):
+    app.cache_layer.l1_ttl = 0.05
+    assert _names(school, 'student1') == ['Student1 Pupil']
+    _renamed_elsewhere('student1@test.com', 'Elsewhere')
+    assert _names(school, 'student1') == ['Student1 Pupil']
+    time.sleep(0.06)
+    assert _names(school, 'elsewhere') == ['Elsewhere Pupil']
+    assert builds == [school.id, school.id]
+
+def test_with_redis_other_processes_bumps_trigger_a_rebuild(app, school, builds):
+    redis = FakeRedis()
+    app.cache_layer = TieredCache(redis, l1_ttl=0.05)
+    _names(school, 'stu')
+    time.sleep(0.06)
+    # Shared generations: an old index stays current until someone writes
+    _names(school, 'stu')
+    assert builds == [school.id]
+
+    _renamed_elsewhere('student1@test.com', 'Elsewhere')
+    redis.incr(generation_key(GENERATION_ENTITY, school.id))
+    time.sleep(0.06)
+    assert _names(school, 'elsewhere') == ['Elsewhere Pupil']
+    assert builds == [school.id, school.id]
+
+def test_idle_and_least_recently_used_schools_are_evicted(app, school):
+    indexes = AutocompleteIndexes(max_schools=1, idle_ttl=60)
+    indexes.get(school.id)
+    indexes.get(school.id + 1)
+    assert list(indexes._indexes) == [school.id + 1]
+    indexes.idle_ttl = 0.05
+    time.sleep(0.06)
+    indexes.get(school.id)
+    assert list(indexes._indexes) == [school.id]
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import School, Teacher, User
+from app.models.user import UserRole
+
+from conftest import PASSWORD, auth_headers
+
+@pytest.fixture
+def headers(client, school):
+    return auth_headers(client, 'admin@test.com')
+
+def _register(school, records, **extra):
+    return dict(class_id=school.class_id, subject_id=school.subject, date='2024-09-03', records=records, **extra)
+
+def test_marks_whole_register(client, school, headers):
+    records = [{'student_id': student_id, 'status': 'present'} for student_id in school.students]
+    response = client.post('/api/attendance/bulk', json=_register(school, records), headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['recorded'] == 3
+
+@pytest.mark.parametrize('student_id', [[1], {'id': 1}, '1', 1.5, True])
+def test_rejects_non_integer_student_id(client, school, headers, student_id):
+    records = [{'student_id': student_id, 'status': 'present'}]
+    response = client.post('/api/attendance/bulk', json=_register(school, records), headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 0, 'message': 'student_id must be an integer'}]
+
+def test_rejects_non_list_records(client, school, headers):
+    response = client.post('/api/attendance/bulk', json=_register(school, {'student_id': 1}), headers=headers)
+    assert response.status_code == 400
+
+def test_rejects_teacher_from_another_school(client, school, headers):
+    other = School(name='Other School', code='OTHER1')
+    db.session.add(other)
+    db.session.flush()
+    user = User(email='other@test.com', username='other', password=PASSWORD, first_name='Olive', last_name='Other',
+                role=UserRole.TEACHER, school_id=other.id)
+    db.session.add(user)
+    db.session.flush()
+    teacher = Teacher(user_id=user.id, hire_date=date(2020, 1, 1), school_id=other.id)
+    db.session.add(teacher)
+    db.session.commit()
+
+    records = [{'student_id': school.students[0], 'status': 'present'}]
+    for teacher_id in (teacher.id, [school.teacher]):
+        response = client.post('/api/attendance/bulk', json=_register(school, records, teacher_id=teacher_id), headers=headers)
+        assert response.status_code == 400
+        assert response.get_json()['message'] == 'Teacher does not belong to this school'
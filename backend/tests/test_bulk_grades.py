@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import auth_headers
+
+@pytest.fixture
+def headers(client, school):
+    return auth_headers(client, 'admin@test.com')
+
+def _assessment(school, scores, **extra):
+    return dict(class_id=school.class_id, subject_id=school.subject, assignment_name='Quiz 2',
+                assignment_type='quiz', max_score=20, scores=scores, **extra)
+
+def test_enters_whole_assessment(client, school, headers):
+    scores = [{'student_id': student_id, 'score': 15} for student_id in school.students]
+    response = client.post('/api/grades/bulk', json=_assessment(school, scores), headers=headers)
+    assert response.status_code == 201
+    assert response.get_json()['recorded'] == 3
+
+@pytest.mark.parametrize('student_id', [[1], {'id': 1}, '1', 1.5, True])
+def test_rejects_non_integer_student_id(client, school, headers, student_id):
+    scores = [{'student_id': student_id, 'score': 15}]
+    response = client.post('/api/grades/bulk', json=_assessment(school, scores), headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 0, 'message': 'student_id must be an integer'}]
+
+def test_rejects_non_list_scores(client, school, headers):
+    response = client.post('/api/grades/bulk', json=_assessment(school, {'student_id': 1}), headers=headers)
+    assert response.status_code == 400
+
+def test_rejects_malformed_dates(client, school, headers):
+    scores = [{'student_id': school.students[0], 'score': 15, 'submitted_date': 20240901}]
+    response = client.post('/api/grades/bulk', json=_assessment(school, scores, due_date=['2024-09-01']), headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'due_date must be in YYYY-MM-DD format'
@@ -0,0 +1,156 @@
+import time
+
+import pytest
+
+from app.cache import LocalCache, TieredCache
+
+from fake_redis import FakeRedis
+
+def _wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def _subscribed(redis):
+    return any(pubsub.channels for pubsub in redis._subscribers)
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+def test_local_cache_expires_entries():
+    cache = LocalCache()
+    cache.set('key', b'value', ttl=0.05)
+    assert cache.get('key') == (True, b'value')
+    time.sleep(0.06)
+    assert cache.get('key') == (False, None)
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('c') == (True, 3)
+    assert len(cache) == 2
+
+def test_set_writes_both_tiers(redis):
+    cache = TieredCache(redis)
+    cache.set('key', b'value', ttl=60)
+    assert redis.get('key') == b'value'
+    assert cache.get('key') == b'value'
+    assert cache.stats()['l1_hits'] == 1
+
+def test_l1_miss_reads_through_to_redis(redis):
+    cache = TieredCache(redis)
+    redis.set('key', b'value')
+    assert cache.get('key') == b'value'
+    assert cache.get('key') == b'value'
+    stats = cache.stats()
+    assert (stats['l1_misses'], stats['l2_hits'], stats['l1_hits']) == (1, 1, 1)
+
+def test_l1_entries_live_at_most_l1_ttl(redis):
+    cache = TieredCache(redis, l1_ttl=0.05)
+    cache.set('key', b'old', ttl=60)
+    # Another worker overwrote Redis without an invalidation
+    redis.set('key', b'new')
+    assert cache.get('key') == b'old'
+    time.sleep(0.06)
+    assert cache.get('key') == b'new'
+
+def test_redis_ttl_expires_entries(redis):
+    cache = TieredCache(redis, l1_ttl=0.05)
+    cache.set('key', b'value', ttl=0.1)
+    time.sleep(0.11)
+    assert cache.get('key') is None
+    assert cache.stats()['l2_misses'] == 1
+
+def test_l1_evicts_least_recently_used(redis):
+    cache = TieredCache(redis, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key.encode(), ttl=60)
+    assert cache.stats()['l1_entries'] == 2
+    # The evicted key is still served from Redis
+    assert cache.get('a') == b'a'
+    assert cache.stats()['l2_hits'] == 1
+
+def test_delete_invalidates_other_instances(redis):
+    first, second = TieredCache(redis), TieredCache(redis)
+    second.start_listener()
+    assert _wait_for(lambda: _subscribed(redis))
+    first.set('key', b'value', ttl=60)
+    assert second.get('key') == b'value'
+
+    first.delete('key')
+    assert _wait_for(lambda: second.local.get('key') == (False, None))
+    assert second.get('key') is None
+    assert second.stats()['invalidations_received'] == 1
+
+def test_incr_invalidates_other_instances(redis):
+    first, second = TieredCache(redis), TieredCache(redis)
+    second.start_listener()
+    assert _wait_for(lambda: _subscribed(redis))
+    assert second.get('counter') is None
+    value = first.incr('counter')
+    assert second.get('counter') == str(value).encode()
+
+    first.incr('counter')
+    assert _wait_for(lambda: second.get('counter') == str(value + 1).encode())
+
+def test_own_invalidations_are_ignored(redis):
+    cache = TieredCache(redis)
+    cache.set('key', b'value', ttl=60)
+    cache._handle_message(f'{cache.origin}\nkey')
+    assert cache.local.get('key') == (True, b'value')
+    assert cache.stats()['invalidations_received'] == 0
+
+def test_unavailable_redis_falls_back_to_l1(redis):
+    cache = TieredCache(redis)
+    cache.set('cached', b'value', ttl=60)
+    redis.down = True
+
+    assert cache.get('cached') == b'value'
+    assert cache.get('missing') is None
+    cache.set('key', b'value', ttl=60)
+    assert cache.get('key') == b'value'
+    cache.delete('cached')
+    assert cache.get('cached') is None
+    assert cache.get_or_set('computed', lambda: b'fresh', ttl=60) == b'fresh'
+    assert cache.stats()['l2_errors'] >= 4
+
+def test_without_redis_l1_keeps_full_ttl():
+    cache = TieredCache(None, l1_ttl=0.01)
+    cache.set('key', b'value', ttl=60)
+    time.sleep(0.02)
+    assert cache.get('key') == b'value'
+    value = cache.incr('counter')
+    assert cache.incr('counter') == value + 1 == cache.get_counter('counter')
+
+def test_counters_start_from_the_clock(redis):
+    for cache in (TieredCache(None), TieredCache(redis)):
+        before = time.time_ns() // 1000
+        assert cache.get_counter('counter') >= before
+        assert cache.incr('fresh') > before
+
+def test_counters_survive_l1_eviction():
+    cache = TieredCache(None, max_entries=2)
+    value = cache.incr('counter')
+    for number in range(5):
+        cache.set(f'key{number}', b'value')
+    assert cache.get_counter('counter') == value
+    assert cache.incr('counter') == value + 1
+
+def test_lost_redis_counter_never_repeats(redis):
+    cache = TieredCache(redis)
+    issued = {cache.incr('counter') for _ in range(3)}
+    # Evicted by Redis (or lost on restart), and gone from L1 after l1_ttl
+    redis.delete('counter')
+    cache.local.clear()
+    time.sleep(0.001)
+    assert cache.get_counter('counter') > max(issued)
+    assert cache.incr('counter') not in issued
@@ -0,0 +1,28 @@
+from app import db
+from app.models import Class, School, Student
+from app.models.counters import reconcile_counters
+
+def test_school_counters_follow_seeded_rows(school):
+    counts = db.session.get(School, school.id)
+    assert (counts.student_count, counts.teacher_count, counts.admin_count) == (3, 1, 1)
+    assert (counts.class_count, counts.subject_count) == (1, 1)
+    assert db.session.get(Class, school.class_id).current_strength == 3
+
+def test_class_change_after_commit_moves_strength(school):
+    second = Class(name='Grade 2', section='A', academic_year='2024-2025', school_id=school.id)
+    db.session.add(second)
+    student = db.session.get(Student, school.students[0])
+    db.session.commit()
+    # The commit expired every attribute; current_class_id is set without being loaded first
+    student.current_class_id = second.id
+    db.session.commit()
+
+    assert db.session.get(Class, school.class_id).current_strength == 2
+    assert db.session.get(Class, second.id).current_strength == 1
+    assert reconcile_counters() == 0
+
+def test_seed_data_needs_no_repair(app):
+    from seed_data import seed_data
+    seed_data()
+    assert reconcile_counters() == 0
+    assert Class.query.filter_by(name='10').one().current_strength == 1
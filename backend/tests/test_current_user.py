@@ -0,0 +1,25 @@
+from flask_jwt_extended import create_access_token
+
+from conftest import auth_headers
+
+def _lookups(response):
+    return int(response.headers['X-Identity-Lookups'])
+
+def test_claims_only_endpoint_never_loads_the_user(client, school):
+    response = client.get('/api/students/', headers=auth_headers(client, 'admin@test.com'))
+    assert response.status_code == 200
+    assert _lookups(response) == 0
+
+def test_database_backed_endpoint_loads_the_user_once(client, school):
+    response = client.get('/api/auth/profile', headers=auth_headers(client, 'admin@test.com'))
+    assert response.status_code == 200
+    assert response.get_json()['user']['email'] == 'admin@test.com'
+    assert _lookups(response) == 1
+
+def test_token_without_claims_is_resolved_once_for_decorator_and_route(client, school):
+    # Tokens issued before role claims were embedded fall back to the database
+    headers = {'Authorization': f'Bearer {create_access_token(identity=school.teacher_user)}'}
+    response = client.post('/api/attendance/bulk', json={}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'class_id is required'
+    assert _lookups(response) == 1
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from app import db
+from app import dashboard
+from app.cache import TieredCache
+from app.dashboard import SNAPSHOT_KEY, get_dashboard_snapshot, refresh_dashboard_snapshot
+from app.models import School
+
+from fake_redis import FakeRedis
+
+class RecordedThreads:
+    """Replaces threading.Thread in app.dashboard; targets run only when asked to"""
+
+    def __init__(self):
+        self.started = []
+
+    def __call__(self, target, args=(), daemon=None):
+        self.started.append((target, args))
+        return self
+
+    def start(self):
+        pass
+
+    def run_all(self):
+        for target, args in self.started:
+            target(*args)
+
+@pytest.fixture
+def threads(monkeypatch):
+    recorded = RecordedThreads()
+    monkeypatch.setattr(dashboard.threading, 'Thread', recorded)
+    return recorded
+
+def _add_school(code):
+    db.session.add(School(name=f'School {code}', code=code))
+    db.session.commit()
+
+def test_first_request_computes_and_caches(school, threads):
+    first = get_dashboard_snapshot()
+    assert first['stale'] is False
+    assert (first['total_schools'], first['total_students'], first['total_teachers']) == (1, 3, 1)
+    assert get_dashboard_snapshot()['version'] == first['version']
+    assert threads.started == []
+
+def test_tracked_write_serves_stale_snapshot_and_refreshes_once(app, school, threads):
+    first = get_dashboard_snapshot()
+    _add_school('NEW01')
+
+    stale = get_dashboard_snapshot()
+    assert (stale['stale'], stale['total_schools']) == (True, 1)
+    get_dashboard_snapshot()
+    assert len(threads.started) == 1
+
+    threads.run_all()
+    fresh = get_dashboard_snapshot()
+    assert (fresh['stale'], fresh['total_schools']) == (False, 2)
+    assert fresh['version'] > first['version']
+
+def test_snapshot_lives_in_the_cache_layer(app, school, threads):
+    first = refresh_dashboard_snapshot()
+    assert app.cache_layer.get(SNAPSHOT_KEY) is not None
+    # A worker with its own cache has no snapshot of this one's
+    app.cache_layer = TieredCache(None)
+    second = get_dashboard_snapshot()
+    assert second['stale'] is False
+    assert second['version'] != first['version']
+
+def test_without_redis_snapshots_are_fresh_for_l1_ttl(app, school, threads):
+    app.cache_layer.l1_ttl = 0.05
+    refresh_dashboard_snapshot()
+    assert get_dashboard_snapshot()['stale'] is False
+    # Another worker's writes cannot mark this worker's snapshot stale
+    time.sleep(0.06)
+    assert get_dashboard_snapshot()['stale'] is True
+    assert len(threads.started) == 1
+
+def test_with_redis_workers_share_the_snapshot(app, school, threads):
+    redis = FakeRedis()
+    app.cache_layer = TieredCache(redis, l1_ttl=0.05)
+    first = refresh_dashboard_snapshot()
+
+    app.cache_layer = TieredCache(redis, l1_ttl=0.05)
+    shared = get_dashboard_snapshot()
+    assert (shared['stale'], shared['version']) == (False, first['version'])
+
+    # Only one worker starts the background refresh
+    _add_school('NEW01')
+    for _ in range(2):
+        app.cache_layer = TieredCache(redis, l1_ttl=0.05)
+        assert get_dashboard_snapshot()['stale'] is True
+    assert len(threads.started) == 1
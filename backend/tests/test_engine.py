@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from app import db
+from app.models import User, School
+
+from conftest import PASSWORD
+
+def _write_lock_free(app):
+    """Whether another connection could take the write lock right now, without waiting"""
+    probe = sqlite3.connect(db.engine.url.database, timeout=0, isolation_level=None)
+    try:
+        probe.execute('BEGIN IMMEDIATE')
+        probe.execute('ROLLBACK')
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+
+def test_write_request_reads_hold_no_lock(app, school):
+    with app.test_request_context('/api/schools/', method='POST'):
+        assert db.session.get(User, school.admin) is not None
+        assert _write_lock_free(app)
+
+        db.session.add(School(name='Second School', code='TEST02'))
+        db.session.flush()
+        assert not _write_lock_free(app)
+        db.session.commit()
+        assert _write_lock_free(app)
+    assert School.query.filter_by(code='TEST02').count() == 1
+
+def test_write_request_rollback_discards_writes(app, school):
+    with app.test_request_context('/api/schools/', method='POST'):
+        db.session.add(School(name='Second School', code='TEST02'))
+        db.session.flush()
+        db.session.rollback()
+        assert _write_lock_free(app)
+    assert School.query.filter_by(code='TEST02').count() == 0
+
+def test_login_checks_password_without_the_write_lock(app, client, school, monkeypatch):
+    checked = []
+    check_password = User.check_password
+
+    def probing_check(user, password):
+        checked.append(_write_lock_free(app))
+        return check_password(user, password)
+
+    monkeypatch.setattr(User, 'check_password', probing_check)
+    response = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': PASSWORD})
+    assert response.status_code == 200
+    assert checked == [True]
+    assert db.session.get(User, school.admin).last_login is not None
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from conftest import auth_headers
+
+@pytest.fixture
+def headers(client, school):
+    return auth_headers(client, 'admin@test.com')
+
+def _export(client, school, headers, entity, **params):
+    response = client.get(f'/api/exports/schools/{school.id}/{entity}', query_string=params, headers=headers)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_end_date_includes_the_whole_day(client, school, headers):
+    # created_at is stored in UTC
+    today = datetime.utcnow().date().isoformat()
+    users = _export(client, school, headers, 'users', start_date=today, end_date=today)
+    assert len(users) == 5
+    assert all('password_hash' not in user for user in users)
+    assert _export(client, school, headers, 'users', end_date='2000-01-01') == []
+
+def test_date_filters_on_date_columns(client, school, headers):
+    assert len(_export(client, school, headers, 'attendance', start_date='2024-09-02', end_date='2024-09-02')) == 3
+    assert _export(client, school, headers, 'attendance', end_date='2024-09-01') == []
+
+def test_rows_are_exported_in_id_order(client, school, headers):
+    ids = [row['id'] for row in _export(client, school, headers, 'students')]
+    assert ids == sorted(school.students)
+
+def test_csv_export(client, school, headers):
+    response = client.get(f'/api/exports/schools/{school.id}/grades', query_string={'format': 'csv'}, headers=headers)
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.mimetype == 'text/csv'
+    assert lines[0].startswith('id,') and len(lines) == 4
@@ -0,0 +1,58 @@
+from app import db
+from app.models import Grade
+from app.models.grade_statistics import ClassSubjectGradeStatistics, StudentSubjectGradeStatistics
+
+def _snapshot():
+    return {model.__tablename__: {row[:2]: row[2:] for row in db.session.execute(
+        db.select(*(getattr(model, column) for column in model.KEY_COLUMNS + ('grade_count', 'score_sum', 'percentage_sum')))
+    )} for model in (StudentSubjectGradeStatistics, ClassSubjectGradeStatistics)}
+
+def test_totals_follow_seeded_grades(school):
+    assert Grade.get_class_statistics(school.class_id, school.subject, value='score') == \
+        {'count': 3, 'average': 70, 'std_dev': 8.16}
+    assert Grade.get_student_statistics(school.students[2], value='percentage') == \
+        {'count': 1, 'average': 80, 'std_dev': 0}
+
+def test_score_change_after_commit_moves_totals(school):
+    grade = Grade.query.filter_by(student_id=school.students[0]).one()
+    grade.score = 65
+    db.session.commit()
+    # The commit expired every attribute; both columns are set without being loaded first
+    grade.score = 90
+    grade.calculate_percentage()
+    db.session.commit()
+
+    assert Grade.get_student_average(school.students[0]) == 90
+    assert Grade.get_class_statistics(school.class_id, value='score')['average'] == 80
+
+def test_deleting_every_grade_removes_the_row(school):
+    db.session.delete(Grade.query.filter_by(student_id=school.students[1]).one())
+    db.session.commit()
+
+    assert db.session.get(StudentSubjectGradeStatistics, (school.students[1], school.subject)) is None
+    assert Grade.get_student_statistics(school.students[1]) == {'count': 0, 'average': 0, 'std_dev': 0}
+    assert Grade.get_class_statistics(school.class_id)['count'] == 2
+
+def test_rolled_back_changes_leave_totals_alone(school):
+    before = _snapshot()
+    db.session.add(Grade(student_id=school.students[0], class_id=school.class_id, subject_id=school.subject,
+                         teacher_id=school.teacher, assignment_name='Quiz 2', assignment_type='quiz', score=10,
+                         max_score=100, school_id=school.id))
+    db.session.flush()
+    db.session.rollback()
+    assert _snapshot() == before
+
+def test_running_totals_match_rebuild(school):
+    grade = Grade.query.filter_by(student_id=school.students[2]).one()
+    grade.score = 40
+    grade.calculate_percentage()
+    db.session.add(Grade(student_id=school.students[0], class_id=school.class_id, subject_id=school.subject,
+                         teacher_id=school.teacher, assignment_name='Quiz 2', assignment_type='quiz', score=50,
+                         max_score=100, school_id=school.id))
+    db.session.commit()
+
+    maintained = _snapshot()
+    for model in (StudentSubjectGradeStatistics, ClassSubjectGradeStatistics):
+        model.rebuild()
+    db.session.commit()
+    assert _snapshot() == maintained
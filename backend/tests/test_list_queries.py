@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import Student, User
+from app.models.user import UserRole
+
+from conftest import PASSWORD, auth_headers, count_queries
+
+EXPAND = 'attendance_percentage,average_grade'
+
+def _add_students(school, count):
+    for number in range(count):
+        user = User(email=f'extra{number}@test.com', username=f'extra{number}', password=PASSWORD,
+                    first_name=f'Extra{number}', last_name='Pupil', role=UserRole.STUDENT, school_id=school.id)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Student(user_id=user.id, admission_date=date(2024, 9, 1), school_id=school.id,
+                               current_class_id=school.class_id))
+    db.session.commit()
+    db.session.remove()
+
+def _get(client, url, headers):
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), statements
+
+@pytest.mark.parametrize('url, items', [
+    ('/api/students/', 'items'),
+    (f'/api/students/?expand={EXPAND}', 'items'),
+    ('/api/admin/users', 'users'),
+])
+def test_list_queries_do_not_grow_with_the_page(client, school, url, items):
+    headers = auth_headers(client, 'admin@test.com')
+    small, small_queries = _get(client, url, headers)
+    _add_students(school, 4)
+    large, large_queries = _get(client, url, headers)
+    assert len(large[items]) == len(small[items]) + 4
+    assert len(large_queries) == len(small_queries)
+
+def test_expand_adds_one_grouped_query_per_aggregate(client, school):
+    headers = auth_headers(client, 'admin@test.com')
+    plain, plain_queries = _get(client, '/api/students/', headers)
+    expanded, expanded_queries = _get(client, f'/api/students/?expand={EXPAND}', headers)
+    assert len(expanded_queries) == len(plain_queries) + 2
+    assert 'average_grade' not in plain['items'][0]
+
+    for item in expanded['items']:
+        student = db.session.get(Student, item['id'])
+        assert item['attendance_percentage'] == student.get_attendance_percentage() == 100
+        assert item['average_grade'] == student.get_average_grade()
+    assert sorted(item['average_grade'] for item in expanded['items']) == [60, 70, 80]
+
+def test_fields_skip_relationship_joins(client, school):
+    headers = auth_headers(client, 'admin@test.com')
+    full, full_queries = _get(client, '/api/students/', headers)
+    sparse, sparse_queries = _get(client, '/api/students/?fields=id,student_id', headers)
+    assert set(sparse['items'][0]) == {'id', 'student_id'}
+    # Names come from joined users and classes, which a sparse page does not need
+    assert any(' JOIN users ' in statement for statement in full_queries)
+    assert not any(' JOIN ' in statement for statement in sparse_queries)
+    assert full['items'][0]['full_name'] == 'Student0 Pupil'
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.query_plans import _hot_queries, _is_sqlite_full_scan, _postgresql_full_scans, check_query_plans
+
+# Index each served query is expected to use on SQLite
+EXPECTED_INDEXES = {
+    'attendance report by school and date range': 'ix_attendance_daily_summary_school_date',
+    'attendance report per class': 'ix_attendance_daily_summary_school_date',
+    'attendance report per month': 'ix_attendance_daily_summary_school_date',
+    'attendance by student': 'ix_attendance_student_id',
+    'grades report by school and date range': 'ix_grades_school_date_assigned',
+    'grades report per subject': 'ix_grades_school_date_assigned',
+    'grade statistics by class and subject': 'sqlite_autoindex_grade_statistics_class_subject_1',
+    'grade statistics by subject': 'ix_grade_statistics_class_subject_subject',
+    'grade statistics by student and subject': 'sqlite_autoindex_grade_statistics_student_subject_1',
+    'grade statistics per student': 'sqlite_autoindex_grade_statistics_student_subject_1',
+    'user search by school and role': 'search_entries_fts VIRTUAL TABLE INDEX',
+    'users by school, role and status': 'ix_users_school_role_active',
+    'users keyset page by school': 'ix_users_school_id_id',
+    'students keyset page by school and class': 'ix_students_school_class',
+    'students export by school and date range': 'ix_students_school_id',
+    'users export by school and date range': 'ix_users_school_id_id',
+    'attendance export by school and date range': 'ix_attendance_school_date_status',
+    'grades export by school and date range': 'ix_grades_school_date_assigned',
+}
+
+class FakePostgres:
+    """Stands in for db.session on PostgreSQL: answers EXPLAIN (FORMAT JSON) with a canned plan"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.statements = []
+        self.dialect = postgresql.dialect()
+
+    def execute(self, statement, *args, **kwargs):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return [{'Plan': self.plan}]
+
+    def get_bind(self, *args, **kwargs):
+        return self
+
+def _plan(statement):
+    sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+def test_every_hot_query_has_an_expected_index(app):
+    assert set(_hot_queries()) == set(EXPECTED_INDEXES)
+
+def test_no_hot_query_scans_a_table(school):
+    results = check_query_plans(school.id)
+    assert {name: scans for name, scans in results.items() if scans} == {}
+
+@pytest.mark.parametrize('name', sorted(EXPECTED_INDEXES))
+def test_hot_query_uses_expected_index(school, name):
+    plan = _plan(_hot_queries(school.id)[name])
+    assert any(EXPECTED_INDEXES[name] in detail for detail in plan), plan
+
+def test_attendance_reports_do_not_read_raw_attendance(school):
+    for name in ('attendance report by school and date range', 'attendance report per class', 'attendance report per month'):
+        assert not any(' attendance ' in f'{detail} ' for detail in _plan(_hot_queries(school.id)[name]))
+
+@pytest.mark.parametrize('detail, full_scan', [
+    ('SCAN attendance', True),
+    ('SCAN attendance USING INDEX ix_attendance_school_date_status', False),
+    ('SEARCH users USING INDEX ix_users_school_id_id (school_id=?)', False),
+    ('SCAN search_entries_fts VIRTUAL TABLE INDEX 0:M1', False),
+    ('SCAN search_entries_fts VIRTUAL TABLE INDEX 0:', True),
+    ('USE TEMP B-TREE FOR ORDER BY', False),
+])
+def test_sqlite_full_scan_detection(detail, full_scan):
+    assert _is_sqlite_full_scan(detail) is full_scan
+
+def test_postgresql_full_scans_walk_nested_plans(app, monkeypatch):
+    fake = FakePostgres({'Node Type': 'Nested Loop', 'Plans': [
+        {'Node Type': 'Index Scan', 'Relation Name': 'users'},
+        {'Node Type': 'Hash', 'Plans': [{'Node Type': 'Seq Scan', 'Relation Name': 'grades'}]},
+    ]})
+    monkeypatch.setattr(db.session, 'execute', fake.execute)
+
+    assert _postgresql_full_scans('SELECT 1') == ['Seq Scan on grades']
+    assert fake.statements == ['SET LOCAL enable_seqscan = off', 'EXPLAIN (FORMAT JSON) SELECT 1']
+
+def test_check_query_plans_on_postgresql(app, monkeypatch):
+    fake = FakePostgres({'Node Type': 'Index Scan', 'Relation Name': 'users'})
+    monkeypatch.setattr(db.session, 'get_bind', fake.get_bind)
+    monkeypatch.setattr(db.session, 'execute', fake.execute)
+
+    assert check_query_plans() == {name: [] for name in EXPECTED_INDEXES}
+    explained = [statement for statement in fake.statements if statement.startswith('EXPLAIN')]
+    assert len(explained) == len(EXPECTED_INDEXES)
+    # Literal binds, compiled for PostgreSQL
+    assert not any('?' in statement or '%(' in statement for statement in explained)
+    assert any('to_char(' in statement for statement in explained)
@@ -0,0 +1,72 @@
+import sqlite3
+import time
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import update
+
+from app import db
+from app.models import User
+from app.read_replica import is_pinned_to_primary
+
+from conftest import auth_headers
+
+@pytest.fixture
+def replica(app, school, tmp_path):
+    """A copy of the primary taken now, which later writes to the primary never reach"""
+    path = tmp_path / 'replica.db'
+    with sqlite3.connect(tmp_path / 'test.db') as primary, sqlite3.connect(path) as copy:
+        primary.backup(copy)
+    app.read_engine = sa.create_engine(f'sqlite:///{path}')
+    yield school
+    app.read_engine.dispose()
+    app.read_engine = None
+
+def _written_elsewhere(email, first_name):
+    with db.engine.begin() as connection:
+        connection.execute(update(User).where(User.email == email).values(first_name=first_name))
+
+def _profile_name(client, headers):
+    return client.get('/api/auth/profile', headers=headers).get_json()['user']['first_name']
+
+def test_get_requests_read_from_the_replica(client, replica):
+    headers = auth_headers(client, 'admin@test.com')
+    _written_elsewhere('admin@test.com', 'Primary')
+    assert _profile_name(client, headers) == 'Ada'
+
+def test_writer_reads_own_writes_from_the_primary(app, client, replica):
+    admin, teacher = auth_headers(client, 'admin@test.com'), auth_headers(client, 'teacher@test.com')
+    response = client.put('/api/auth/profile', json={'first_name': 'Renamed'}, headers=admin)
+    assert response.status_code == 200
+    assert _profile_name(client, admin) == 'Renamed'
+
+    # Only the writer is pinned
+    assert is_pinned_to_primary(replica.admin)
+    assert not is_pinned_to_primary(replica.teacher_user)
+    _written_elsewhere('teacher@test.com', 'Primary')
+    assert _profile_name(client, teacher) == 'Tom'
+
+def test_pin_expires_after_the_window(app, client, replica):
+    app.config['DATABASE_READ_YOUR_WRITES_WINDOW'] = 0.05
+    headers = auth_headers(client, 'admin@test.com')
+    client.put('/api/auth/profile', json={'first_name': 'Renamed'}, headers=headers)
+    assert _profile_name(client, headers) == 'Renamed'
+    time.sleep(0.06)
+    assert _profile_name(client, headers) == 'Ada'
+
+def test_writes_and_their_reads_use_the_primary(app, replica):
+    with app.test_request_context('/api/students/', method='GET'):
+        user = db.session.get(User, replica.admin)
+        assert db.session.get_bind(clause=sa.select(User)) is app.read_engine
+        user.first_name = 'Flushed'
+        db.session.flush()
+        # Once the session has written, reads must see the write
+        assert db.session.scalar(sa.select(User.first_name).where(User.id == replica.admin)) == 'Flushed'
+        assert db.session.get_bind(clause=sa.select(User)) is db.engine
+        db.session.rollback()
+
+    with app.test_request_context('/api/students/', method='POST'):
+        assert db.session.get_bind(clause=sa.select(User)) is db.engine
+    with app.test_request_context('/api/students/', method='GET'):
+        # Locking reads always go to the primary
+        assert db.session.get_bind(clause=sa.select(User).with_for_update()) is db.engine
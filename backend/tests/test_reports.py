@@ -0,0 +1,55 @@
+import pytest
+
+from conftest import auth_headers
+
+@pytest.fixture
+def headers(client, school):
+    return auth_headers(client, 'admin@test.com')
+
+def _report(client, school, kind, headers, query=''):
+    return client.get(f'/api/admin/schools/{school.id}/reports/{kind}{query}', headers=headers)
+
+@pytest.mark.parametrize('query, message', [
+    ('?start_date=2024-13-01', 'start_date must be in YYYY-MM-DD format'),
+    ('?end_date=yesterday', 'end_date must be in YYYY-MM-DD format'),
+    ('?start_date=2024-10-01&end_date=2024-09-01', 'start_date must be on or before end_date'),
+    ('?breakdown=class,teacher', "Invalid breakdown 'teacher'"),
+])
+@pytest.mark.parametrize('kind', ['attendance', 'grades'])
+def test_invalid_parameters_are_rejected(client, school, headers, kind, query, message):
+    response = _report(client, school, kind, headers, query)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
+
+def test_attendance_report_totals_and_breakdowns(client, school, headers):
+    report = _report(client, school, 'attendance', headers).get_json()['report']
+    assert (report['total_records'], report['present_count'], report['attendance_rate']) == (3, 3, 100)
+    assert report['period'] == 'All Time'
+    assert report['by_class'] == [dict(class_id=school.class_id, class_name='Grade 1-A', total_records=3, present=3,
+                                       absent=0, late=0, excused=0, attendance_percentage=100)]
+    assert report['by_subject'][0]['subject_name'] == 'Mathematics'
+    assert [row['month'] for row in report['by_month']] == ['2024-09']
+
+def test_grades_report_totals(client, school, headers):
+    report = _report(client, school, 'grades', headers).get_json()['report']
+    assert (report['total_grades'], report['average_score'], report['passing_rate']) == (3, 70, 100)
+    assert report['by_subject'][0]['total_grades'] == 3
+
+def test_breakdown_selects_groups(client, school, headers):
+    report = _report(client, school, 'attendance', headers, '?breakdown=month').get_json()['report']
+    assert 'by_month' in report
+    assert 'by_class' not in report and 'by_subject' not in report
+    report = _report(client, school, 'grades', headers, '?breakdown=').get_json()['report']
+    assert not any(key.startswith('by_') for key in report)
+
+def test_period_filters_records(client, school, headers):
+    report = _report(client, school, 'attendance', headers, '?start_date=2024-09-03').get_json()['report']
+    assert report['total_records'] == 0
+    assert report['by_class'] == []
+    assert report['period'] == '2024-09-03 to Today'
+    report = _report(client, school, 'attendance', headers, '?start_date=2024-09-02&end_date=2024-09-02').get_json()['report']
+    assert report['total_records'] == 3
+
+def test_other_schools_reports_are_forbidden(client, school, headers):
+    response = client.get(f'/api/admin/schools/{school.id + 1}/reports/attendance', headers=headers)
+    assert response.status_code == 403
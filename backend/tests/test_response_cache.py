@@ -0,0 +1,74 @@
+import time
+
+from sqlalchemy import update
+
+from app import db
+from app.cache import TieredCache
+from app.models import User
+from app.response_cache import get_generation
+
+from conftest import auth_headers
+from fake_redis import FakeRedis
+
+def _generations(school_id):
+    return get_generation('users', school_id), get_generation('students', school_id)
+
+def test_login_keeps_list_generations(client, school):
+    before = _generations(school.id)
+    auth_headers(client, 'student0@test.com')
+    assert User.query.filter_by(email='student0@test.com').one().last_login is not None
+    assert _generations(school.id) == before
+
+def test_listed_column_change_bumps_generations(school):
+    before = _generations(school.id)
+    user = User.query.filter_by(email='student0@test.com').one()
+    user.first_name = 'Renamed'
+    db.session.commit()
+    assert all(after > previous for after, previous in zip(_generations(school.id), before))
+
+def test_failed_invalidation_is_logged_and_counted(app, school, caplog):
+    redis = FakeRedis()
+    app.cache_layer = TieredCache(redis)
+    user = User.query.filter_by(email='student0@test.com').one()
+    user.first_name = 'Renamed'
+    redis.down = True
+    db.session.commit()
+    assert app.cache_layer.stats()['l2_errors'] >= 2
+    assert 'Could not invalidate cached users responses' in caplog.text
+
+def _renamed_elsewhere(email, first_name):
+    # A write by another worker: its generation bump never reaches this worker's counters
+    with db.engine.begin() as connection:
+        connection.execute(update(User).where(User.email == email).values(first_name=first_name))
+
+def _first_names(response):
+    return {user['first_name'] for user in response.get_json()['users']}
+
+def test_without_redis_lists_carry_no_generation_etag(client, school):
+    headers = auth_headers(client, 'admin@test.com')
+    response = client.get('/api/admin/users', headers=headers)
+    assert response.status_code == 200
+    assert response.headers.get('ETag') is None
+    student = client.get(f'/api/students/{school.students[0]}', headers=headers)
+    assert student.headers.get('ETag') is None and student.headers.get('Last-Modified') is None
+
+def test_without_redis_cached_lists_expire_after_l1_ttl(app, client, school):
+    app.cache_layer.l1_ttl = 0.05
+    headers = auth_headers(client, 'admin@test.com')
+    assert 'Student0' in _first_names(client.get('/api/admin/users', headers=headers))
+    _renamed_elsewhere('student0@test.com', 'Elsewhere')
+    time.sleep(0.06)
+    assert 'Elsewhere' in _first_names(client.get('/api/admin/users', headers=headers))
+
+def test_with_redis_list_etag_changes_on_write(app, client, school):
+    app.cache_layer = TieredCache(FakeRedis())
+    headers = auth_headers(client, 'admin@test.com')
+    etag = client.get('/api/admin/users', headers=headers).headers['ETag']
+    assert client.get('/api/admin/users', headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+    user = User.query.filter_by(email='student0@test.com').one()
+    user.first_name = 'Renamed'
+    db.session.commit()
+    response = client.get('/api/admin/users', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Renamed' in _first_names(response)
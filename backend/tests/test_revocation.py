@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.cache import TieredCache
+from app.models import User, RevokedToken
+from app.models.user import UserRole
+from app.revocation import revoke_token, revoke_user_tokens, is_token_revoked
+
+from conftest import PASSWORD
+from fake_redis import FakeRedis
+
+@pytest.fixture(params=['database', 'redis'])
+def store(request, app):
+    """Run a test against both revocation stores"""
+    if request.param == 'redis':
+        app.cache_layer = TieredCache(FakeRedis())
+    return request.param
+
+def _login(client, email):
+    return client.post('/api/auth/login', json={'email': email, 'password': PASSWORD}).get_json()
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def _payload(user, tv=0):
+    return {'jti': 'test-jti', 'sub': user.id, 'tv': tv, 'exp': (datetime.utcnow() + timedelta(hours=1)).timestamp()}
+
+def test_revocation_published_on_commit(school, store):
+    user = db.session.get(User, school.admin)
+    revoke_user_tokens(user)
+    assert not is_token_revoked(_payload(user))
+    db.session.commit()
+    assert user.token_version == 1
+    assert is_token_revoked(_payload(user))
+    assert not is_token_revoked(_payload(user, tv=1))
+
+def test_revocation_dropped_on_rollback(school, store):
+    user = db.session.get(User, school.teacher_user)
+    revoke_user_tokens(user)
+    db.session.rollback()
+    assert user.token_version == 0
+    assert not is_token_revoked(_payload(user))
+
+def test_deleted_user_tokens_are_rejected(client, school, store):
+    db.session.add(User(email='admin2@test.com', username='admin2', password=PASSWORD, first_name='Second',
+                        last_name='Admin', role=UserRole.SCHOOL_ADMIN, school_id=school.id))
+    db.session.commit()
+    doomed = _login(client, 'admin2@test.com')
+    assert client.get('/api/admin/users', headers=_bearer(doomed['access_token'])).status_code == 200
+
+    admin = _login(client, 'admin@test.com')
+    doomed_id = doomed['user']['id']
+    assert client.delete(f'/api/admin/users/{doomed_id}', headers=_bearer(admin['access_token'])).status_code == 200
+
+    assert client.get('/api/admin/users', headers=_bearer(doomed['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=_bearer(doomed['refresh_token'])).status_code == 401
+
+def test_logout_with_refresh_token_revokes_that_session(client, school, store):
+    session = _login(client, 'teacher@test.com')
+    other_session = _login(client, 'teacher@test.com')
+
+    response = client.post('/api/auth/logout', headers=_bearer(session['access_token']),
+                           json={'refresh_token': session['refresh_token']})
+    assert response.status_code == 200
+
+    assert client.get('/api/auth/profile', headers=_bearer(session['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=_bearer(session['refresh_token'])).status_code == 401
+    assert client.get('/api/auth/profile', headers=_bearer(other_session['access_token'])).status_code == 200
+    assert client.post('/api/auth/refresh', headers=_bearer(other_session['refresh_token'])).status_code == 200
+
+def test_logout_rejects_another_users_refresh_token(client, school, store):
+    session = _login(client, 'teacher@test.com')
+    other_user = _login(client, 'admin@test.com')
+    response = client.post('/api/auth/logout', headers=_bearer(session['access_token']),
+                           json={'refresh_token': other_user['refresh_token']})
+    assert response.status_code == 400
+    assert client.post('/api/auth/refresh', headers=_bearer(other_user['refresh_token'])).status_code == 200
+
+def test_logout_without_refresh_token_revokes_every_session(client, school, store):
+    session = _login(client, 'teacher@test.com')
+    other_session = _login(client, 'teacher@test.com')
+
+    assert client.post('/api/auth/logout', headers=_bearer(session['access_token'])).status_code == 200
+
+    for tokens in (session, other_session):
+        assert client.get('/api/auth/profile', headers=_bearer(tokens['access_token'])).status_code == 401
+        assert client.post('/api/auth/refresh', headers=_bearer(tokens['refresh_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=_bearer(_login(client, 'teacher@test.com')['refresh_token'])).status_code == 200
+
+def test_expired_revocations_are_pruned(school):
+    db.session.add(RevokedToken(jti='expired-jti', user_id=school.admin, expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+    revoke_token(_payload(db.session.get(User, school.admin)))
+    db.session.commit()
+    assert [row.jti for row in RevokedToken.query.all()] == ['test-jti']
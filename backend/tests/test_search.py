@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import mysql, postgresql
+
+from app import db
+from app.models import Student, User
+from app.models.search import SearchEntry, rebuild_search_entries, search_statement, search_user_ids
+from app.models.user import UserRole
+
+from conftest import auth_headers
+
+def _emails(text, school_id=None, role=None):
+    user_ids = search_user_ids(text, school_id, role)
+    emails = dict(db.session.query(User.id, User.email).filter(User.id.in_(user_ids))) if user_ids else {}
+    return [emails[user_id] for user_id in user_ids]
+
+def _entries():
+    return {row.user_id: (row.school_id, row.role, row.document) for row in SearchEntry.query.all()}
+
+def test_every_term_must_match_a_word_prefix(school):
+    assert sorted(_emails('stud')) == ['student0@test.com', 'student1@test.com', 'student2@test.com']
+    assert _emails('student1 pup') == ['student1@test.com']
+    assert _emails('student1 teacher') == []
+    assert _emails('  ') == [] and _emails('!!') == []
+
+def test_accents_and_case_are_ignored(school):
+    assert _emails('ÁDA') == ['admin@test.com']
+
+def test_school_and_role_filters(school):
+    assert _emails('test', role=UserRole.TEACHER) == ['teacher@test.com']
+    assert len(_emails('test', school_id=school.id)) == 5
+    assert _emails('test', school_id=school.id + 1) == []
+
+def test_student_details_are_searchable(school):
+    student = db.session.get(Student, school.students[0])
+    student.parent_name = 'Grace Hopper'
+    db.session.commit()
+    assert _emails('hopper') == ['student0@test.com']
+    assert _emails(student.student_id) == ['student0@test.com']
+
+def test_entries_follow_user_writes(school):
+    user = User.query.filter_by(email='student2@test.com').one()
+    user.first_name = 'Zelda'
+    db.session.commit()
+    assert _emails('zelda') == ['student2@test.com']
+    assert _entries()[user.id][2].startswith('zelda pupil ')
+
+    db.session.delete(db.session.get(Student, school.students[2]))
+    db.session.delete(user)
+    db.session.commit()
+    assert _emails('zelda') == []
+    assert user.id not in _entries()
+
+def test_maintained_entries_match_rebuild(school):
+    User.query.filter_by(email='teacher@test.com').one().last_name = 'Renamed'
+    db.session.commit()
+    maintained = _entries()
+    rebuild_search_entries()
+    db.session.commit()
+    assert _entries() == maintained
+    assert len(maintained) == 5
+
+def test_search_endpoint_returns_ranked_students(client, school):
+    headers = auth_headers(client, 'teacher@test.com')
+    response = client.get('/api/students/search?q=student1&fields=id', headers=headers)
+    assert response.get_json()['items'] == [{'id': school.students[1]}]
+    response = client.get('/api/students/search?q=pupil&limit=2', headers=headers)
+    assert len(response.get_json()['items']) == 2
+    assert client.get('/api/students/search', headers=headers).get_json()['items'] == []
+
+@pytest.fixture
+def dialect(app, monkeypatch):
+    """Compile search statements for another backend"""
+    def use(name):
+        engine = SimpleNamespace(dialect={'postgresql': postgresql, 'mysql': mysql}[name].dialect())
+        monkeypatch.setattr(db.session, 'get_bind', lambda *args, **kwargs: engine)
+        return engine.dialect
+    return use
+
+def _sql(statement, dialect):
+    return str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+def test_postgresql_uses_trigram_matching(dialect):
+    compile_for = dialect('postgresql')
+    sql = _sql(search_statement('Jo 50%', 1, UserRole.STUDENT), compile_for)
+    # Substrings of every term, or a typo-tolerant match of the whole phrase, best first
+    assert "search_entries.document LIKE '%%' || 'jo' || '%%'" in sql
+    assert "'jo 50' <%% search_entries.document" in sql
+    assert 'ORDER BY word_similarity(' in sql and 'DESC' in sql
+    assert "search_entries.role = 'STUDENT'" in sql
+    assert 'search_entries_fts' not in sql
+
+def test_other_backends_match_substrings(dialect):
+    compile_for = dialect('mysql')
+    sql = _sql(search_statement('o_brien', 1), compile_for)
+    assert "LIKE concat('%%', 'o', '%%')" in sql
+    assert 'word_similarity' not in sql and 'search_entries_fts' not in sql
@@ -0,0 +1,23 @@
+from sqlalchemy import inspect
+
+from app import db
+from app.models import Subject
+from app.models.serialization import FieldSelection
+
+def test_subject_fields_read_class_only_when_selected(school):
+    subject = db.session.get(Subject, school.subject)
+    assert subject.to_dict(FieldSelection(fields=['id', 'name'])) == {'id': school.subject, 'name': 'Mathematics'}
+    assert 'class_obj' in inspect(subject).unloaded
+
+    assert 'total_students' in subject.to_dict()
+    assert 'class_obj' not in inspect(subject).unloaded
+
+def test_subject_attendance_summary_reports_total_students(school):
+    subject = db.session.get(Subject, school.subject)
+    summary = subject.to_dict(FieldSelection(fields=['attendance_summary']))['attendance_summary']
+    assert summary['total_students'] == subject.get_total_students()
+    assert (summary['present'], summary['absent'], summary['late']) == (3, 0, 0)
+
+def test_subject_loader_options_follow_the_selection():
+    assert Subject.loader_options(FieldSelection(fields=['id'])) == []
+    assert len(Subject.loader_options(FieldSelection(fields=['id'], expand=['attendance_summary']))) == 1
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from app.cache import SingleFlight
+
+from fake_redis import FakeRedis
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+def _run_concurrently(functions):
+    results = [None] * len(functions)
+    errors = []
+    start = threading.Barrier(len(functions))
+
+    def run(index, function):
+        start.wait()
+        try:
+            results[index] = function()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(index, function)) for index, function in enumerate(functions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+def test_one_computation_per_key_in_process():
+    flights = SingleFlight()
+    counter = Counter()
+
+    def compute():
+        counter.bump()
+        time.sleep(0.1)
+        return 'value'
+
+    results, errors = _run_concurrently([lambda: flights.do('key', compute)] * 8)
+    assert not errors
+    assert results == ['value'] * 8
+    assert counter.calls == 1
+    assert flights.metrics.counts['coalesced_local'] == 7
+
+def test_distinct_keys_compute_separately():
+    flights = SingleFlight()
+    counter = Counter()
+    results, errors = _run_concurrently([lambda key=key: flights.do(key, counter.bump) for key in ('a', 'b', 'c')])
+    assert not errors
+    assert counter.calls == 3
+
+def test_one_computation_per_key_across_processes(redis):
+    # One SingleFlight per worker process, sharing Redis
+    workers = [SingleFlight(redis, poll_interval=0.01) for _ in range(4)]
+    counter = Counter()
+
+    def compute():
+        counter.bump()
+        time.sleep(0.1)
+        redis.set('result', b'value')
+        return b'value'
+
+    results, errors = _run_concurrently([lambda flights=flights: flights.do('key', compute, lambda: redis.get('result'))
+                                         for flights in workers])
+    assert not errors
+    assert results == [b'value'] * 4
+    assert counter.calls == 1
+    assert sum(flights.metrics.counts['coalesced_remote'] for flights in workers) == 3
+    assert not redis.exists('lease:key')
+
+def test_expired_lease_lets_a_waiter_compute(redis):
+    # A leader that died mid-computation leaves its lease until the lease TTL
+    redis.set('lease:key', 'dead-leader', px=100)
+    flights = SingleFlight(redis, wait_timeout=10, poll_interval=0.01)
+    started = time.monotonic()
+    assert flights.do('key', lambda: 'computed', lambda: redis.get('result')) == 'computed'
+    assert 0.09 <= time.monotonic() - started < 1
+    assert flights.metrics.counts['computations'] == 1
+
+def test_wait_timeout_bounds_a_stuck_leader(redis):
+    redis.set('lease:key', 'stuck-leader', px=60000)
+    flights = SingleFlight(redis, wait_timeout=0.1, poll_interval=0.01)
+    assert flights.do('key', lambda: 'computed', lambda: redis.get('result')) == 'computed'
+    # The stuck leader's lease is left alone
+    assert redis.get('lease:key') == b'stuck-leader'
+
+def test_local_waiters_compute_when_leader_fails():
+    flights = SingleFlight()
+    counter = Counter()
+    leader_started = threading.Event()
+
+    def failing():
+        leader_started.set()
+        time.sleep(0.1)
+        raise RuntimeError('leader failed')
+
+    def waiter():
+        leader_started.wait()
+        return flights.do('key', lambda: counter.bump() and 'fallback')
+
+    results, errors = _run_concurrently([lambda: flights.do('key', failing)] + [waiter] * 3)
+    assert [str(error) for error in errors] == ['leader failed']
+    assert results[1:] == ['fallback'] * 3
+    assert counter.calls == 3
+
+def test_remote_waiters_compute_when_leader_fails(redis):
+    leader, waiter = SingleFlight(redis, poll_interval=0.01), SingleFlight(redis, poll_interval=0.01)
+    leader_started = threading.Event()
+
+    def failing():
+        leader_started.set()
+        time.sleep(0.1)
+        raise RuntimeError('leader failed')
+
+    def wait():
+        leader_started.wait()
+        return waiter.do('key', lambda: 'fallback', lambda: redis.get('result'))
+
+    results, errors = _run_concurrently([lambda: leader.do('key', failing, lambda: redis.get('result')), wait])
+    assert [str(error) for error in errors] == ['leader failed']
+    assert results[1] == 'fallback'
+    # The failed leader released its lease instead of leaving it to expire
+    assert not redis.exists('lease:key')
+
+def test_unavailable_redis_computes_locally(redis):
+    redis.down = True
+    flights = SingleFlight(redis)
+    assert flights.do('key', lambda: 'computed', lambda: redis.get('result')) == 'computed'
+    assert flights.metrics.counts['l2_errors'] == 1
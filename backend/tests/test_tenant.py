@@ -0,0 +1,51 @@
+import pytest
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+from sqlalchemy import delete
+
+from app import db
+from app.models import User
+from app.models.user import UserRole
+from app.tenant import current_tenant
+
+from conftest import PASSWORD
+
+@pytest.fixture
+def super_admin(school):
+    user = User(email='root@test.com', username='root', password=PASSWORD, first_name='Sue', last_name='Per',
+                role=UserRole.SUPER_ADMIN)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def _tenant_for(app, token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    with app.test_request_context('/api/students/', headers=headers):
+        if token:
+            verify_jwt_in_request()
+        with db.engine.connect() as connection:
+            return current_tenant(connection)
+
+def test_role_claim_confines_to_school(app, school):
+    user = db.session.get(User, school.teacher_user)
+    assert _tenant_for(app, create_access_token(identity=user.id, additional_claims=user.get_token_claims())) == school.id
+
+def test_super_admin_claim_sees_every_school(app, super_admin):
+    user = db.session.get(User, super_admin)
+    assert _tenant_for(app, create_access_token(identity=user.id, additional_claims=user.get_token_claims())) is None
+
+def test_unauthenticated_request_sees_every_school(app, school):
+    assert _tenant_for(app) is None
+
+def test_token_without_role_claim_uses_the_database(app, school, super_admin):
+    assert _tenant_for(app, create_access_token(identity=school.teacher_user)) == school.id
+    assert _tenant_for(app, create_access_token(identity=super_admin)) is None
+
+def test_token_without_role_claim_for_missing_user_sees_nothing(app, school):
+    token = create_access_token(identity=school.teacher_user)
+    with app.test_request_context('/api/students/', headers={'Authorization': f'Bearer {token}'}):
+        verify_jwt_in_request()
+        # Deleted after the token was checked, as by a concurrent request
+        with db.engine.begin() as connection:
+            connection.execute(delete(User).where(User.id == school.teacher_user))
+        with db.engine.connect() as connection:
+            assert current_tenant(connection) == 0
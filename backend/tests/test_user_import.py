@@ -0,0 +1,81 @@
+import io
+
+import bcrypt
+import pytest
+
+from app.user_import import POOL_THRESHOLD, hash_passwords
+from app.models import User, Student
+
+from conftest import auth_headers
+
+CSV_HEADER = 'email,username,password,first_name,last_name,role'
+
+@pytest.fixture
+def headers(client, school):
+    return auth_headers(client, 'admin@test.com')
+
+def _csv(header, *rows):
+    return {'file': (io.BytesIO('\n'.join((header,) + rows).encode()), 'users.csv')}
+
+def test_imports_csv(client, school, headers):
+    data = _csv(CSV_HEADER, 'new@test.com,newbie,Passw0rd!,New,Student,student')
+    response = client.post(f'/api/admin/schools/{school.id}/users/import', data=data, headers=headers)
+    assert response.status_code == 201
+    assert response.get_json()['report']['created_count'] == 1
+    assert User.query.filter_by(email='new@test.com').one().student is not None
+
+def test_rejects_unknown_csv_columns(client, school, headers):
+    data = _csv(CSV_HEADER + ',nickname,grade', 'new@test.com,newbie,Passw0rd!,New,Student,student,Newt,7')
+    response = client.post(f'/api/admin/schools/{school.id}/users/import', data=data, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Unknown columns: nickname, grade'
+    assert User.query.filter_by(email='new@test.com').first() is None
+
+def test_reports_unknown_json_fields(client, school, headers):
+    users = [{'email': 'new@test.com', 'username': 'newbie', 'password': 'Passw0rd!', 'first_name': 'New',
+              'last_name': 'Student', 'role': 'student', 'nickname': 'Newt'}]
+    response = client.post(f'/api/admin/schools/{school.id}/users/import', json={'users': users}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['report']['errors'] == [{'row': 1, 'field': 'nickname', 'message': 'Unknown field nickname'}]
+
+def test_hashing_pool_is_shared_between_imports(app):
+    app.config['IMPORT_HASH_WORKERS'] = 2
+    passwords = [f'password-{number}' for number in range(POOL_THRESHOLD)]
+    first = hash_passwords(passwords)
+    pool = app.extensions['import_hash_pool']
+    second = hash_passwords(passwords)
+    assert app.extensions['import_hash_pool'] is pool
+    assert all(bcrypt.checkpw(password.encode(), hashed.encode())
+               for password, hashed in zip(passwords * 2, first + second))
+    pool.shutdown()
+
+def test_small_batches_hash_in_process(app):
+    app.config['IMPORT_HASH_WORKERS'] = 2
+    assert len(hash_passwords(['one', 'two'])) == 2
+    assert 'import_hash_pool' not in app.extensions
+
+def _student(number, **fields):
+    return {'email': f'new{number}@test.com', 'username': f'newbie{number}', 'password': 'Passw0rd!',
+            'first_name': 'New', 'last_name': 'Student', 'role': 'student', **fields}
+
+def test_reports_duplicate_student_ids(client, school, headers):
+    taken = Student.query.first().student_id
+    users = [_student(1, student_id='S-100'), _student(2, student_id='S-100'), _student(3, student_id=taken),
+             _student(4, student_id='S-200')]
+    response = client.post(f'/api/admin/schools/{school.id}/users/import', json={'users': users}, headers=headers)
+    report = response.get_json()['report']
+    assert report['errors'] == [
+        {'row': 2, 'field': 'student_id', 'message': 'Duplicate student_id (also on row 1)'},
+        {'row': 3, 'field': 'student_id', 'message': 'student_id already exists'},
+    ]
+    assert sorted(user['row'] for user in report['created']) == [1, 4]
+
+def test_checks_json_value_types(client, school, headers):
+    users = [_student(1, email=5), _student(2, first_name=['New']), _student(3, phone=5551234, current_class_id=True)]
+    response = client.post(f'/api/admin/schools/{school.id}/users/import', json={'users': users}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['report']['errors'] == [
+        {'row': 1, 'field': 'email', 'message': 'Invalid email format'},
+        {'row': 2, 'field': 'first_name', 'message': 'first_name must be a string'},
+        {'row': 3, 'field': 'current_class_id', 'message': 'current_class_id must be a number'},
+    ]
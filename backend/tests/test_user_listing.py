@@ -0,0 +1,69 @@
+import pytest
+
+from app import db
+from app.models import School, User
+from app.models.user import UserRole
+
+from conftest import PASSWORD, auth_headers, count_queries
+
+@pytest.fixture
+def headers(client, school):
+    return auth_headers(client, 'admin@test.com')
+
+def _list(client, headers, query=''):
+    response = client.get(f'/api/admin/users{query}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_pages_cover_every_user_once(client, headers):
+    ids, after_id = [], None
+    while True:
+        page = _list(client, headers, f'?limit=2&after_id={after_id or ""}')
+        assert len(page['users']) <= 2
+        ids.extend(user['id'] for user in page['users'])
+        after_id = page['next_after_id']
+        if after_id is None:
+            break
+        assert after_id == ids[-1]
+    assert ids == sorted(user.id for user in User.query.all())
+    assert len(ids) == 5
+
+def test_other_schools_users_are_not_listed(client, school, headers):
+    other = School(name='Other School', code='OTHER1')
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(User(email='outsider@test.com', username='outsider', password=PASSWORD, first_name='Out',
+                        last_name='Sider', role=UserRole.TEACHER, school_id=other.id))
+    db.session.commit()
+    emails = {user['email'] for user in _list(client, headers)['users']}
+    assert 'outsider@test.com' not in emails
+    assert len(emails) == 5
+
+def test_role_and_status_filters(client, school, headers):
+    assert {user['role'] for user in _list(client, headers, '?role=STUDENT')['users']} == {'student'}
+    User.query.filter_by(email='student0@test.com').one().is_active = False
+    db.session.commit()
+    inactive = _list(client, headers, '?is_active=false')['users']
+    assert [user['email'] for user in inactive] == ['student0@test.com']
+    assert len(_list(client, headers, '?role=student&is_active=true')['users']) == 2
+
+def test_invalid_role_is_rejected(client, headers):
+    response = client.get('/api/admin/users?role=janitor', headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Invalid role 'janitor'"
+
+def test_include_total_counts_the_filtered_users(client, headers):
+    page = _list(client, headers, '?include_total=true&role=student&limit=1')
+    assert (page['total'], page['total_is_exact'], len(page['users'])) == (3, True, 1)
+    assert 'total' not in _list(client, headers)
+
+def test_limit_is_clamped(client, headers):
+    assert len(_list(client, headers, '?limit=0')['users']) == 1
+    assert len(_list(client, headers, '?limit=500')['users']) == 5
+
+def test_school_is_loaded_only_for_school_name(client, headers):
+    with count_queries() as statements:
+        page = _list(client, headers, '?fields=id,email')
+    assert set(page['users'][0]) == {'id', 'email'}
+    assert not any('schools' in statement for statement in statements)
+    assert _list(client, headers, '?fields=id,school_name')['users'][0]['school_name'] == 'Test School'
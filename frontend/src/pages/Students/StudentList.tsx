@@ -387,6 +387,7 @@ export default function StudentList() {
   const fetchStudents = async () => {
     try {
       const response = await axios.get('/api/students/', {
+        params: { expand: 'attendance_percentage,average_grade' },
         headers: {
           Authorization: `Bearer ${localStorage.getItem('access_token')}`,
         },